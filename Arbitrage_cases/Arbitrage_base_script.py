@@ -4,10 +4,19 @@ Rotman BMO Finance Research and Trading Lab, Uniersity of Toronto (C)
 All rights reserved.
 """
 
+import os
+import sys
 import requests
 from time import sleep
 import numpy as np
 import arbTrading as arb
+import marketSnapshot as ms
+from marketRecorder import MarketRecorder
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import eventLog as elog
+import latencyMonitor as lat
+from eventLoop import EventLoop
 
 '''
 If you are not familiar with Python or feeling a little bit rusty, highly recommend you to go through the following link:
@@ -36,7 +45,7 @@ RITC = "RITC"   # ETF quoted in USD
 
 # Per problem statement
 FEE_MKT = 0.02           # $/share (market)
-REBATE_LMT = 0.01        # $/share (passive) - not used in this baseline
+REBATE_LMT = 0.01        # $/share (passive) - earned in arbTrading's passive execution mode
 MAX_SIZE_EQUITY = 10000 # per order for BULL/BEAR/RITC
 MAX_SIZE_FX = 2500000  # per order for CAD/USD
 
@@ -50,9 +59,23 @@ ORDER_QTY     = 5000    # child order size for arb legs
 # 3 legs with market orders => ~0.06 CAD/sh cost; add a bit more for safety.
 ARB_THRESHOLD_CAD = 0.07
 
+# Set to a folder (e.g. "sessions/run1") to record books, edges, tenders and fills for replay
+RECORD_DIR = None
+recorder = None
+
+# Structured event log (JSONL, written off the trading thread). elog.TICK adds the per-tick status lines;
+# CONSOLE_LEVEL = elog.OFF keeps the terminal quiet and leaves everything in the file
+LOG_FILE = "logs/arbitrage_events.jsonl"
+LOG_LEVEL = elog.INFO
+CONSOLE_LEVEL = elog.INFO
+
+# Per-stage and per-endpoint latency histograms, rewritten at every heartbeat and at the end
+LATENCY_FILE = "logs/arbitrage_latency.json"
+
 # --------- SESSION ----------
 s = requests.Session()
 s.headers.update(HDRS)
+lat.instrument_session(s)
 
 # --------- HELPERS ----------
 def get_tick_status():
@@ -68,8 +91,8 @@ def best_bid_ask(ticker):
     r.raise_for_status()
     book = r.json()
     'Why choose [0] here, not [1]? Is the price for bids and asks also generated by r'
-    bid = float(book["bids"][0]["price"]) if book["bids"] else 0.0
-    ask = float(book["asks"][0]["price"]) if book["asks"] else 1e12
+    bid = float(book["bids"][0]["price"]) if book["bids"] else ms.EMPTY_BID
+    ask = float(book["asks"][0]["price"]) if book["asks"] else ms.EMPTY_ASK
     return bid, ask
 
 def positions_map():
@@ -83,9 +106,11 @@ def positions_map():
 
 def place_mkt(ticker, action, qty): # type LMT?
     # Sends Market orders; price param is ignored by most RIT cases when type=MARKET
-    return s.post(f"{API}/orders",
-                  params={"ticker": ticker, "type": "MARKET",
-                          "quantity": int(qty), "action": action}).ok
+    r = s.post(f"{API}/orders",
+               params={"ticker": ticker, "type": "MARKET",
+                       "quantity": int(qty), "action": action})
+    arb.get_trader(s).on_order_ack(ticker, action, qty, r)  # tracked like the trader's own orders
+    return r.ok
 
 def within_limits():
     # Simple gross/net guard using equity legs only
@@ -94,29 +119,32 @@ def within_limits():
     net   = pos[BULL] + pos[BEAR] + pos[RITC]  # simple net; refine as desired
     return (gross < MAX_GROSS) and (MAX_SHORT_NET < net < MAX_LONG_NET)
 
-def accept_active_tender_offers():
-    # Retrieve active tender offers from the RIT API, and accept the offer
-    r = s.get(f"{API}/tenders")  # replace with the correct endpoint
+def accept_active_tender_offers(snap):
+    # Retrieve active tender offers from the RIT API and score every one of them against the books
+    r = s.get(f"{API}/tenders")
     r.raise_for_status()
     offers = r.json()
-        
+    if recorder is not None:
+        recorder.record_tenders(offers)
+
     if offers:
-        tender_id = offers[0]['tender_id']
-        price = offers[0]['price']
-        if offers[0]['is_fixed_bid']:
-            resp = s.post(f"{API}/tenders/{tender_id}")
-        else:
-            resp = s.post(f"{API}/tenders/{tender_id}", params={"price": price})
-        return print("Tender Offer Accepted:", resp.ok)
-    print("No active tenders")
+        return arb.get_trader(s).handle_tenders(offers, snap)
+    return []
 
 # --------- CORE LOGIC ----------
-def step_once():
+def step_once(snap=None):
+    # Fetch all four books in one round trip; skip the cycle if they are too far apart in time
+    if snap is None:
+        snap = ms.fetch_snapshot(s)
+    if not snap.is_consistent():
+        elog.get_log().warn("stale_snapshot", "Skipping stale snapshot: skew={skew_ms:.1f}ms", skew_ms=snap.skew_ms)
+        return
+
     # Get executable prices
-    bull_bid, bull_ask = best_bid_ask(BULL)
-    bear_bid, bear_ask = best_bid_ask(BEAR)
-    ritc_bid_usd, ritc_ask_usd = best_bid_ask(RITC)
-    usd_bid, usd_ask = best_bid_ask(USD)   # USD quoted in CAD (USD/CAD)
+    bull_bid, bull_ask = snap.best_bid_ask(BULL)
+    bear_bid, bear_ask = snap.best_bid_ask(BEAR)
+    ritc_bid_usd, ritc_ask_usd = snap.best_bid_ask(RITC)
+    usd_bid, usd_ask = snap.best_bid_ask(USD)   # USD quoted in CAD (USD/CAD)
 
     # Convert RITC to CAD using USD book
     ritc_bid_cad = ritc_bid_usd * usd_bid
@@ -134,11 +162,16 @@ def step_once():
     # SELL RITC (hit bid in USD), BUY basket (lift asks) -> compare in CAD
     edge2 = ritc_bid_cad - basket_buy_cost
 
-    arb.trader(s, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_cad, ritc_ask_cad, usd_bid, usd_ask)
+    if recorder is not None:
+        recorder.record_snapshot(snap, edge1, edge2)
+
+    # The trader converts RITC to CAD itself, so hand it the USD quotes
+    arb.trader(s, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_usd, ritc_ask_usd, usd_bid, usd_ask, snap)
 
-    """accept_active_tender_offers() # Automatically checking and acceptting all of the tender offer
+    # Accept or decline every tender within this tick
+    accept_active_tender_offers(snap)
 
-    traded = False
+    """traded = False
     
     if edge1 >= ARB_THRESHOLD_CAD and within_limits():
         # Basket rich: sell BULL & BEAR, buy RITC
@@ -164,14 +197,35 @@ def step_once():
         "ritc_bid_cad": ritc_bid_cad, "ritc_ask_cad": ritc_ask_cad
     }"""
 
+def observe(tick):
+    # What the event loop watches: the four books (plus the tick, so tenders and closes are seen every tick)
+    snap = ms.fetch_snapshot(s)
+    return (tick, snap.fingerprint()), snap
+
+def on_change(tick, snap):
+    if recorder is not None:
+        recorder.set_tick(tick)
+    step_once(snap)
+
 def main():
-    tick, status = get_tick_status()
-    while status == "ACTIVE":
-        step_once()
-        # Optional: print a lightweight heartbeat every 1s
-        #print(f"tick={tick} e1={e1:.4f} e2={e2:.4f} ritc_ask_cad={info['ritc_ask_cad']:.4f}")
-        sleep(0.5)
-        tick, status = get_tick_status()
+    global recorder
+    elog.configure(path=LOG_FILE, level=LOG_LEVEL, console_level=CONSOLE_LEVEL)
+    lat.configure(export_path=LATENCY_FILE)
+    if RECORD_DIR:
+        recorder = MarketRecorder(RECORD_DIR)
+        arb.get_trader(s).recorder = recorder
+
+    # Evaluate only when the tick or a book changes; poll fast while it does, back off when quiet
+    loop = EventLoop(s, observe, on_change)
+    loop.run()
+    arb.get_trader(s).quoter.cancel_all()  # no resting RITC quote outlives the strategy
+    elog.get_log().info("loop", loop.summary(), **loop.stats())
+
+    if recorder is not None:
+        recorder.close()
+    elog.get_log().info("orders", "Order tracker: {report}", report=arb.get_trader(s).tracker.report())
+    lat.dump()
+    elog.get_log().close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
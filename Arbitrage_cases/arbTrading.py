@@ -7,9 +7,29 @@ This module implements ETF arbitrage strategies using creation/redemption mechan
 to close positions efficiently and capture arbitrage opportunities.
 """
 
+import os
+import sys
 import requests
 import numpy as np
 from time import sleep
+from positionLedger import PositionLedger
+from executionGateway import ExecutionGateway, PackageResult
+from depthEngine import size_arbitrage
+from tenderEngine import evaluate_tenders
+from etfConverter import EtfConverter, conversion_cost, converter_uses
+from passiveExecution import PassiveQuoter
+from fxHedger import FxHedger
+from packageInventory import PackageInventory
+from edgeStats import EdgeStats, EDGE_WINDOW
+import marketSnapshot as ms
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import orderScheduler as osch
+import eventLog as elog
+import latencyMonitor as lat
+from orderTracker import OrderTracker
+
+API = "http://localhost:9999/v1"
 
 # Tickers
 CAD = "CAD"    # currency instrument quoted in CAD
@@ -21,14 +41,15 @@ RITC = "RITC"  # ETF quoted in USD
 # Trading parameters
 FEE_MKT = 0.02           # $/share (market orders)
 REBATE_LMT = 0.01        # $/share (passive orders)
-MAX_SIZE_EQUITY = 100000  # per order for BULL/BEAR/RITC
+MAX_SIZE_EQUITY = 10000   # per order for BULL/BEAR/RITC (problem statement)
 MAX_SIZE_FX = 2500000    # per order for CAD/USD
 
 # Risk management parameters
 MAX_LONG_NET = 50000
 MAX_SHORT_NET = -50000
 MAX_GROSS = 500000
-ORDER_QTY = 5000         # child order size for arb legs
+ORDER_QTY = 5000         # child order size for arb legs (top-of-book sizing)
+MAX_ARB_QTY = 50000      # largest package the depth engine may size
 
 # Arbitrage threshold - must cover fees and slippage
 ARB_THRESHOLD_CAD = 0.15  # Base threshold for fees and slippage
@@ -36,121 +57,226 @@ ARB_THRESHOLD_CAD = 0.15  # Base threshold for fees and slippage
 # Position closing parameters
 MEAN_REVERSION_THRESHOLD = 0.1  # Close position when edge shrinks to this level
 
+# Adaptive thresholds from the rolling distribution of each edge (edgeStats.py)
+ADAPTIVE_THRESHOLDS = True   # False: always use the fixed thresholds above
+ENTRY_QUANTILE = 0.95        # enter when the edge is in the top 5% of its window...
+MIN_EDGE_CAD = 3 * FEE_MKT   # ...and at least pays the three market fees
+EXIT_Z = 0.5                 # exit once the edge is back within EXIT_Z std of its rolling mean
+MAX_HOLD_HALF_LIVES = 4.0    # give up on packages that have not reverted after this many half-lives
+MIN_EDGE_SAMPLES = 30        # fixed thresholds until the window holds this many observations
+
+# Execution mode: "market" crosses the spread on all three legs, "passive" works the
+# RITC leg as a limit order and hedges BULL+BEAR with market orders as it fills
+EXECUTION_MODE = "market"
+PASSIVE_THRESHOLD_CAD = 0.05  # edge left after 2 x FEE_MKT - REBATE_LMT to keep a passive quote up
+
+# Strategy parameters a trader can override (backtest.py sweeps these)
+DEFAULT_PARAMS = {
+    "arb_threshold": ARB_THRESHOLD_CAD,
+    "mean_reversion_threshold": MEAN_REVERSION_THRESHOLD,
+    "order_qty": ORDER_QTY,
+    "max_arb_qty": MAX_ARB_QTY,
+    "max_long_net": MAX_LONG_NET,
+    "max_short_net": MAX_SHORT_NET,
+    "max_gross": MAX_GROSS,
+    "adaptive": ADAPTIVE_THRESHOLDS,
+    "entry_quantile": ENTRY_QUANTILE,
+    "min_edge": MIN_EDGE_CAD,
+    "exit_z": EXIT_Z,
+    "max_hold_half_lives": MAX_HOLD_HALF_LIVES,
+    "edge_window": EDGE_WINDOW,
+    "execution_mode": EXECUTION_MODE,
+    "passive_threshold": PASSIVE_THRESHOLD_CAD,
+}
+
 class ArbitrageTrader:
-    def __init__(self, session):
+    def __init__(self, session, params=None, scheduler=None):
         self.session = session
-        self.arb_positions = []  # Track open arbitrage positions
+        p = dict(DEFAULT_PARAMS, **(params or {}))
+        self.arb_threshold = p["arb_threshold"]
+        self.mean_reversion_threshold = p["mean_reversion_threshold"]
+        self.order_qty = p["order_qty"]
+        self.max_arb_qty = p["max_arb_qty"]
+        self.max_long_net = p["max_long_net"]
+        self.max_short_net = p["max_short_net"]
+        self.max_gross = p["max_gross"]
+        self.adaptive = p["adaptive"]
+        self.entry_quantile = p["entry_quantile"]
+        self.min_edge = p["min_edge"]
+        self.exit_z = p["exit_z"]
+        self.max_hold_half_lives = p["max_hold_half_lives"]
+        self.execution_mode = p["execution_mode"]
+        self.passive_threshold = p["passive_threshold"]
+        self.edge_stats = EdgeStats(p["edge_window"])  # rolling edge1/edge2 statistics, one update per tick
+        self.arb_positions = PackageInventory(clock=lambda: self.edge_stats.count)  # netted as they are added
         self.last_prices = {}    # Cache for price data
+        self.ledger = PositionLedger(session)  # In-memory positions, synced with /securities now and then
+        self.recorder = None                   # optional MarketRecorder for fills
+        self.gateway = ExecutionGateway(session, scheduler or osch.get_scheduler(session), MAX_SIZE_EQUITY, MAX_SIZE_FX,
+                                        on_ack=self.on_order_ack)
+        self.fx = FxHedger(self.gateway)       # nets USD exposure from RITC and converter legs
+        self.tracker = OrderTracker(session, on_fill=self.on_fill)  # order IDs, fills and slippage
+        self.converter = EtfConverter(session, on_convert=self.on_convert)
+        self.quoter = PassiveQuoter(session, self.gateway, self.tracker, on_fill=self.on_passive_fill)
         
     
+    def on_order_ack(self, ticker, action, qty, response):
+        """Every child order acknowledgement goes to the tracker"""
+        order = self.tracker.on_order_ack(ticker, action, qty, response)
+        if order is None:
+            self.ledger.mark_dirty()  # rejected or unreadable - the server knows better than we do
+        else:
+            self.ledger.track_order(order.order_id)  # later fills are booked against this sync
+    
+    def on_fill(self, ticker, action, qty, price, order_id):
+        """Every fill the tracker sees, at acknowledgement or later, moves the ledger and the USD exposure (and is recorded)"""
+        self.ledger.apply_order_fill(order_id, ticker, action, qty)
+        self.fx.on_fill(ticker, action, qty, price)
+        if self.recorder is not None:
+            self.recorder.record_fill(ticker, action, qty, price, order_id)
+    
+    def on_convert(self, ticker, action, qty):
+        """Every converter leg moves the ledger and the USD exposure"""
+        self.ledger.apply_fill(ticker, action, qty)
+        self.fx.on_convert(ticker, action, qty)
+    
     def get_positions(self):
-        """Get current positions for all securities"""
+        """Get current positions for all securities from the ledger"""
         try:
-            r = self.session.get("http://localhost:9999/v1/securities")
-            r.raise_for_status()
-            securities = r.json()
-            
-            positions = {}
-            for sec in securities:
-                ticker = sec["ticker"]
-                positions[ticker] = int(sec.get("position", 0))
-                
-            # Ensure all tickers are present
-            for ticker in [BULL, BEAR, RITC, USD, CAD]:
-                positions.setdefault(ticker, 0)
-                
-            return positions
+            return self.ledger.get_positions()
             
         except Exception as e:
-            print(f"Error getting positions: {e}")
+            elog.get_log().warn("positions_error", "Error getting positions: {error}", error=str(e))
             return None
     
-    def place_order(self, ticker, action, qty, order_type="MARKET"):
-        """Place an order with proper size limits"""
+    def place_order(self, ticker, action, qty, order_type="MARKET", priority=osch.PRIORITY_OPEN):
+        """Place an order with proper size limits (child slices go out in parallel)"""
         if qty <= 0:
             return False
             
-        # Handle size limits
-        max_size = MAX_SIZE_EQUITY if ticker in [BULL, BEAR, RITC] else MAX_SIZE_FX
-        
-        while qty > max_size:
-            params = {
-                'ticker': ticker,   
-                'type': order_type,
-                'quantity': max_size,
-                'action': action
-            }
-            response = self.session.post('http://localhost:9999/v1/orders', params=params)
-            if not response.ok:
-                print(f"Order failed: {response.text}")
-                return False
-            qty -= max_size
-        
-        if qty > 0:
-            params = {
-                'ticker': ticker,
-                'type': order_type,
-                'quantity': qty,
-                'action': action
-            }
-            response = self.session.post('http://localhost:9999/v1/orders', params=params)
-            if not response.ok:
-                print(f"Order failed: {response.text}")
-                return False
-                
-        return True
+        result = self.gateway.submit_package([(ticker, action, qty)], order_type, priority=priority)
+        for leg in result.failed_legs:
+            elog.get_log().warn("order_failed", "Order failed: {errors}", ticker=ticker, errors=leg.errors)
+        return result.ok
     
-    def close_position_market(self, position, current_prices):
-        """Close arbitrage position by trading in the market when mean reversion occurs"""
-        if not position or not current_prices:
-            return False
-            
-        # Calculate current arbitrage edge
-        arb_data = self.detect_arbitrage_opportunity(current_prices)
-        if not arb_data:
-            return False
-            
-        current_edge1 = arb_data["edge1"]
-        current_edge2 = arb_data["edge2"]
-        
-        # Determine if we should close the position based on mean reversion
-        should_close = False
-        
+    def execute_package(self, legs):
+        """Send all legs of an arbitrage package at once; unwind whatever filled if a leg breaks"""
+        result = self.gateway.submit_package(legs)
+        if not result.ok:
+            elog.get_log().warn("package_failed", "Package leg failed: {failed}",
+                                failed=[(leg.ticker, leg.errors) for leg in result.failed_legs])
+            self.unwind_package(result)
+        return result
+    
+    def unwind_package(self, result, keep=0):
+        """Reverse the filled quantity of every leg of a broken package (beyond keep units, if given)"""
+        reverse = {"BUY": "SELL", "SELL": "BUY"}
+        legs = [(leg.ticker, reverse[leg.action], leg.filled - keep) for leg in result.legs if leg.filled > keep]
+        if legs:
+            unwind = self.gateway.submit_package(legs, priority=osch.PRIORITY_HEDGE)
+            elog.get_log().warn("package_unwound", "Unwound broken package: {legs} ok={ok}", legs=legs, ok=unwind.ok)
+    
+    def adaptive_ready(self):
+        return self.adaptive and self.edge_stats.ready(MIN_EDGE_SAMPLES)
+
+    def entry_threshold(self, direction):
+        """Gross edge needed to open a package in this direction"""
+        if not self.adaptive_ready():
+            return self.arb_threshold
+        return max(self.min_edge, self.edge_stats[direction].quantile(self.entry_quantile))
+
+    def exit_threshold(self, direction):
+        """Edge at or below which a package in this direction has mean-reverted"""
+        if not self.adaptive_ready():
+            return self.mean_reversion_threshold
+        stats = self.edge_stats[direction]
+        return stats.mean + self.exit_z * stats.std
+
+    def should_close(self, position, arb_data):
+        """Mean reversion: the edge the package was opened on has shrunk back (or is taking too long to)"""
+        if self.adaptive_ready():
+            age = self.edge_stats.count - position["opened"]
+            if age > self.max_hold_half_lives * self.edge_stats[position["type"]].half_life:
+                elog.get_log().info("close_stale", "Closing {direction} position: no reversion after {age} ticks",
+                                    direction=position["type"], age=age)
+                return True
+
         if position["type"] == "basket_rich":
             # We're short BULL+BEAR, long RITC
-            # Close when the edge shrinks significantly (mean reversion)
-            if current_edge1 <= MEAN_REVERSION_THRESHOLD:
-                should_close = True
-                print(f"Mean reversion detected - closing basket_rich position. Edge: {current_edge1:.4f} CAD")
-                
+            if arb_data["edge1"] <= self.exit_threshold("basket_rich"):
+                elog.get_log().info("close_reverted", "Mean reversion detected - closing {direction} position. Edge: {edge:.4f} CAD",
+                                    direction="basket_rich", edge=arb_data["edge1"])
+                return True
+
         elif position["type"] == "etf_rich":
-            # We're long BULL+BEAR, short RITC  
-            # Close when the edge shrinks significantly (mean reversion)
-            if current_edge2 <= MEAN_REVERSION_THRESHOLD:
-                should_close = True
-                print(f"Mean reversion detected - closing etf_rich position. Edge: {current_edge2:.4f} CAD")
-        
-        if should_close:
-            # Execute opposite trades to close the position
-            close_qty = abs(position["bull_qty"])
-            
-            if position["type"] == "basket_rich":
-                # Close: Buy back BULL+BEAR (cover shorts), sell RITC (close long)
-                self.place_order(BULL, "BUY", close_qty)
-                self.place_order(BEAR, "BUY", close_qty)
-                self.place_order(RITC, "SELL", close_qty)
-                print(f"Closed basket_rich position: Bought {close_qty} BULL+BEAR, Sold {close_qty} RITC")
-                
-            elif position["type"] == "etf_rich":
-                # Close: Sell BULL+BEAR (close longs), buy RITC (cover short)
-                self.place_order(BULL, "SELL", close_qty)
-                self.place_order(BEAR, "SELL", close_qty)
-                self.place_order(RITC, "BUY", close_qty)
-                print(f"Closed etf_rich position: Sold {close_qty} BULL+BEAR, Bought {close_qty} RITC")
-                
-            return True
-            
+            # We're long BULL+BEAR, short RITC
+            if arb_data["edge2"] <= self.exit_threshold("etf_rich"):
+                elog.get_log().info("close_reverted", "Mean reversion detected - closing {direction} position. Edge: {edge:.4f} CAD",
+                                    direction="etf_rich", edge=arb_data["edge2"])
+                return True
+
         return False
+
+    def close_packages(self, packages, arb_data, snapshot=None):
+        """
+        Close packages together. Opposite packages cancel without trading; the net
+        remainder is redeemed/created through the converter or unwound in the market,
+        whichever costs less right now.
+        """
+        net = sum(p["ritc_qty"] for p in packages)  # > 0: long RITC against short BULL+BEAR
+        qty = abs(net)
+        remainder = qty
+        if qty:
+            # Market unwind of a long-RITC remainder is the etf_rich trade, and vice versa
+            if snapshot is not None:
+                edge1, edge2 = snapshot.depth.edges([qty])
+                edge = float((edge2 if net > 0 else edge1)[0])
+            else:
+                edge = arb_data["edge2"] if net > 0 else arb_data["edge1"]
+            market_value = (edge - 3 * FEE_MKT) * qty if edge == edge else float("-inf")  # NaN: not enough depth
+
+            p = self.last_prices
+            converter_value = -conversion_cost(qty, (p["ritc_bid_usd"] + p["ritc_ask_usd"]) / 2, p["usd_bid"], p["usd_ask"])
+            if converter_value >= market_value:
+                done = self.converter.redeem(qty) if net > 0 else self.converter.create(qty)
+                remainder -= done
+                elog.get_log().info("converted", "Converted {qty} units in {uses} uses (cost {cost:.0f} vs market {market:.0f} CAD)",
+                                    qty=done, uses=converter_uses(done), cost=-converter_value, market=-market_value)
+
+        if remainder:
+            basket_action, ritc_action = ("BUY", "SELL") if net > 0 else ("SELL", "BUY")
+            result = self.gateway.submit_package([(BULL, basket_action, remainder), (BEAR, basket_action, remainder),
+                                                  (RITC, ritc_action, remainder)], priority=osch.PRIORITY_CLOSE)
+            if result.ok:
+                remainder = 0
+                elog.get_log().info("closed_market", "Closed {qty} in the market: {basket_action} BULL+BEAR, {ritc_action} RITC",
+                                    qty=qty, basket_action=basket_action, ritc_action=ritc_action)
+            else:
+                # Only what every leg filled is closed; reverse the rest so the packages still match the book
+                closed = min(leg.filled for leg in result.legs)
+                remainder -= closed
+                elog.get_log().warn("package_failed", "Market close leg failed, {open} units stay open: {failed}",
+                                    open=remainder, failed=[(leg.ticker, leg.errors) for leg in result.failed_legs])
+                self.unwind_package(result, keep=closed)
+
+        if remainder:
+            self.arb_positions.reduce(packages, qty - remainder)
+        else:
+            for p in packages:
+                self.arb_positions.remove(p)
+        elog.get_log().info("closed", "Closed {qty} of {packages} packages (net {net} RITC)",
+                            qty=qty - remainder, packages=len(packages), net=net)
+
+    def risk_room(self, positions, direction):
+        """Largest package size that keeps gross and net inside the limits"""
+        gross = abs(positions[BULL]) + abs(positions[BEAR]) + abs(positions[RITC])
+        net = positions[BULL] + positions[BEAR] + positions[RITC]
+        gross_room = (self.max_gross - gross) // 3
+        # basket_rich adds -qty to net (short 2, long 1), etf_rich adds +qty
+        net_room = net - self.max_short_net if direction == "basket_rich" else self.max_long_net - net
+        # Netting against open packages of the other direction only shrinks the book
+        offset = sum(abs(p["ritc_qty"]) for p in self.arb_positions if p["type"] != direction)
+        return int(max(0, min(gross_room, net_room - 1), offset))
     
     def within_risk_limits(self, positions):
         """Check if positions are within risk limits"""
@@ -160,14 +286,14 @@ class ArbitrageTrader:
         gross = abs(positions[BULL]) + abs(positions[BEAR]) + abs(positions[RITC])
         net = positions[BULL] + positions[BEAR] + positions[RITC]
         
-        return (gross < MAX_GROSS) and (MAX_SHORT_NET < net < MAX_LONG_NET)
+        return (gross < self.max_gross) and (self.max_short_net < net < self.max_long_net)
     
-    def detect_arbitrage_opportunity(self, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_cad, ritc_ask_cad, usd_bid, usd_ask):
+    def detect_arbitrage_opportunity(self, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_usd, ritc_ask_usd, usd_bid, usd_ask):
         """Detect arbitrage opportunities between ETF and underlying basket"""
             
         # Convert RITC prices to CAD
-        ritc_bid_cad = ritc_bid_cad * usd_bid
-        ritc_ask_cad = ritc_ask_cad * usd_ask
+        ritc_bid_cad = ritc_bid_usd * usd_bid
+        ritc_ask_cad = ritc_ask_usd * usd_ask
         
         # Basket prices
         basket_bid = bull_bid + bear_bid  # Sell basket
@@ -183,6 +309,7 @@ class ArbitrageTrader:
         return {"edge1": edge1, "edge2": edge2, "ritc_bid_cad": ritc_bid_cad, 
                 "ritc_ask_cad": ritc_ask_cad, "basket_bid": basket_bid, "basket_ask": basket_ask}
     
+    @lat.timed("arb.execute")
     def execute_arbitrage_trade(self, arb_data, positions):
         """Execute arbitrage trade and close position using converters"""
         if not arb_data or not self.within_risk_limits(positions):
@@ -192,19 +319,31 @@ class ArbitrageTrader:
         edge2 = arb_data["edge2"]
         traded = False
         
+        if "qty1" in arb_data:
+            # Depth-sized: trade the largest size that clears the threshold after fees
+            qty1 = min(arb_data["qty1"], self.risk_room(positions, "basket_rich"))
+            qty2 = min(arb_data["qty2"], self.risk_room(positions, "etf_rich"))
+        else:
+            # Top of book only: fixed size when the touch clears the threshold
+            qty1 = min(self.order_qty, MAX_SIZE_EQUITY) if edge1 >= self.entry_threshold("basket_rich") else 0
+            qty2 = min(self.order_qty, MAX_SIZE_EQUITY) if edge2 >= self.entry_threshold("etf_rich") else 0
+        
         # Direction 1: Basket rich - sell BULL+BEAR, buy RITC, then create ETF to close
-        if edge1 >= ARB_THRESHOLD_CAD:
-            print(f"Basket Rich Arbitrage: Edge = {edge1:.4f} CAD")
+        if qty1 > 0:
+            elog.get_log().info("open", "Basket Rich Arbitrage: Edge = {edge:.4f} CAD, Size = {qty}",
+                                direction="basket_rich", edge=edge1, qty=qty1)
             
             # Execute the arbitrage trade
-            qty = min(ORDER_QTY, MAX_SIZE_EQUITY)
+            qty = qty1
             
-            # Sell BULL and BEAR (hit bids)
-            self.place_order(BULL, "SELL", qty)
-            self.place_order(BEAR, "SELL", qty)
-            
-            # Buy RITC (lift ask)
-            self.place_order(RITC, "BUY", qty)
+            # Sell BULL and BEAR (hit bids), buy RITC (lift ask) - all legs at once
+            p = self.last_prices
+            with self.tracker.decision("basket_rich", edge1, qty,
+                                       {(BULL, "SELL"): p["bull_bid"], (BEAR, "SELL"): p["bear_bid"],
+                                        (RITC, "BUY"): p["ritc_ask_usd"]}, rates={RITC: p["usd_ask"]}):
+                result = self.execute_package([(BULL, "SELL", qty), (BEAR, "SELL", qty), (RITC, "BUY", qty)])
+            if not result.ok:
+                return False
             
             # Record the position for later closure
             self.arb_positions.append({
@@ -218,18 +357,21 @@ class ArbitrageTrader:
             traded = True
             
         # Direction 2: ETF rich - buy BULL+BEAR, sell RITC, then redeem ETF to close
-        elif edge2 >= ARB_THRESHOLD_CAD:
-            print(f"ETF Rich Arbitrage: Edge = {edge2:.4f} CAD")
+        elif qty2 > 0:
+            elog.get_log().info("open", "ETF Rich Arbitrage: Edge = {edge:.4f} CAD, Size = {qty}",
+                                direction="etf_rich", edge=edge2, qty=qty2)
             
             # Execute the arbitrage trade
-            qty = min(ORDER_QTY, MAX_SIZE_EQUITY)
+            qty = qty2
             
-            # Buy BULL and BEAR (lift asks)
-            self.place_order(BULL, "BUY", qty)
-            self.place_order(BEAR, "BUY", qty)
-            
-            # Sell RITC (hit bid)
-            self.place_order(RITC, "SELL", qty)
+            # Buy BULL and BEAR (lift asks), sell RITC (hit bid) - all legs at once
+            p = self.last_prices
+            with self.tracker.decision("etf_rich", edge2, qty,
+                                       {(BULL, "BUY"): p["bull_ask"], (BEAR, "BUY"): p["bear_ask"],
+                                        (RITC, "SELL"): p["ritc_bid_usd"]}, rates={RITC: p["usd_bid"]}):
+                result = self.execute_package([(BULL, "BUY", qty), (BEAR, "BUY", qty), (RITC, "SELL", qty)])
+            if not result.ok:
+                return False
             
             # Record the position for later closure
             self.arb_positions.append({
@@ -244,56 +386,233 @@ class ArbitrageTrader:
             
         return traded
     
-    def close_arbitrage_positions(self, positions):
-        """Close arbitrage positions using market trades when mean reversion occurs"""
+    def on_passive_fill(self, direction, qty, price):
+        """A passive RITC quote filled: hedge the basket at market and book the package"""
+        basket_action = "SELL" if direction == "basket_rich" else "BUY"
+        result = self.gateway.submit_package([(BULL, basket_action, qty), (BEAR, basket_action, qty)],
+                                             priority=osch.PRIORITY_HEDGE)
+        if not result.ok:
+            elog.get_log().warn("package_failed", "Passive hedge leg failed: {failed}",
+                                failed=[(leg.ticker, leg.errors) for leg in result.failed_legs])
+
+        p = self.last_prices
+        if direction == "basket_rich":
+            signed, edge = qty, p["bull_bid"] + p["bear_bid"] - price * p["usd_ask"]
+        else:
+            signed, edge = -qty, price * p["usd_bid"] - p["bull_ask"] - p["bear_ask"]
+        self.arb_positions.append({
+            "type": direction,
+            "bull_qty": -signed,
+            "bear_qty": -signed,
+            "ritc_qty": signed,
+            "edge": edge
+        })
+        elog.get_log().info("passive_fill", "Passive {direction} fill: {qty} RITC @ {price}, hedged {basket_action} BULL+BEAR",
+                             direction=direction, qty=qty, price=price, basket_action=basket_action)
+
+    @lat.timed("arb.quote_passive")
+    def quote_passive(self, positions):
+        """Keep a RITC limit quote up in each direction whose passive edge clears passive_threshold"""
+        p = self.last_prices
+        ritc_bid, ritc_ask = p["ritc_bid_usd"], p["ritc_ask_usd"]
+        buy_px = self.quoter.quote_price("basket_rich", ritc_bid, ritc_ask)
+        sell_px = self.quoter.quote_price("etf_rich", ritc_bid, ritc_ask)
+        cost = 2 * FEE_MKT - REBATE_LMT
+        net1 = p["bull_bid"] + p["bear_bid"] - buy_px * p["usd_ask"] - cost
+        net2 = sell_px * p["usd_bid"] - p["bull_ask"] - p["bear_ask"] - cost
+
+        targets = {}
+        for direction, price, net in (("basket_rich", buy_px, net1), ("etf_rich", sell_px, net2)):
+            qty = min(self.order_qty, MAX_SIZE_EQUITY, self.risk_room(positions, direction))
+            targets[direction] = (price, qty) if net >= self.passive_threshold and qty > 0 else None
+        self.quoter.update(targets)
+
+    def incoming_direction(self, arb_data):
+        """Direction execute_arbitrage_trade is about to open, if any"""
+        if not arb_data:
+            return None
+        if "qty1" in arb_data:
+            return "basket_rich" if arb_data["qty1"] > 0 else "etf_rich" if arb_data["qty2"] > 0 else None
+        if arb_data["edge1"] >= self.entry_threshold("basket_rich"):
+            return "basket_rich"
+        return "etf_rich" if arb_data["edge2"] >= self.entry_threshold("etf_rich") else None
+
+    @lat.timed("arb.close")
+    def close_arbitrage_positions(self, positions, snapshot=None, incoming=None):
+        """
+        Close packages on mean reversion, or all of them when the risk limits are used up.
+        Packages opposite to the one about to open are left alone: the new package nets them for free.
+        """
         if not self.arb_positions or not positions:
             return
             
-        # Get current prices for mean reversion analysis
-        current_prices = self.get_best_prices()
+        # Use the quotes from this tick for mean reversion analysis
+        current_prices = self.last_prices
         if not current_prices:
             return
-            
-        for pos in self.arb_positions[:]:  # Copy list to modify during iteration
-            # Check if position should be closed based on mean reversion
-            if self.close_position_market(pos, current_prices):
-                # Position was successfully closed, remove it from tracking
-                self.arb_positions.remove(pos)
-                print(f"Removed closed position from tracking")
+
+        arb_data = self.detect_arbitrage_opportunity(**current_prices)
+        if not self.within_risk_limits(positions):
+            # Converting frees gross limit far cheaper than trading out of every leg
+            closing = list(self.arb_positions)
+        else:
+            closing = [pos for pos in self.arb_positions
+                       if (incoming is None or pos["type"] == incoming) and self.should_close(pos, arb_data)]
+        if closing:
+            self.close_packages(closing, arb_data, snapshot)
     
-    def trade(self, session, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_cad, ritc_ask_cad, usd_bid, usd_ask):
+    @lat.timed("arb.tenders")
+    def handle_tenders(self, offers, snapshot):
         """
-        Main trading function for ETF arbitrage
+        Accept or decline every active tender this tick. An accepted block is unwound
+        straight away: the RITC-book share with one market order, the converter share as
+        the basket legs of an arbitrage package that the normal closing logic takes over.
         """
-        # Get current market data
+        positions = self.get_positions()
+        if not offers or not positions:
+            return []
+
+        positions = dict(positions)
+        by_id = {o["tender_id"]: o for o in offers}
+        reverse = {"BUY": "SELL", "SELL": "BUY"}
+        decisions = evaluate_tenders(offers, snapshot.depth)
+        for d in sorted(decisions, key=lambda d: d.pnl_cad, reverse=True):
+            offer = by_id[d.tender_id]
+            action, qty = offer["action"], int(offer["quantity"])
+            # Long RITC against short basket after a BUY tender, the other way round after a SELL
+            package_type = "basket_rich" if action == "BUY" else "etf_rich"
+            if d.accept and d.convert_qty > self.risk_room(positions, package_type):
+                elog.get_log().info("tender_over_limits", "Tender {tender_id} clears ({edge:.4f} CAD/sh) but breaks risk limits",
+                                    tender_id=d.tender_id, edge=d.edge_per_share)
+                d.accept = False
+
+            if not d.accept:
+                self.session.delete(f"{API}/tenders/{d.tender_id}")
+                continue
+
+            params = {"price": d.price} if d.price is not None else None
+            resp = self.session.post(f"{API}/tenders/{d.tender_id}", params=params)
+            if not resp.ok or not resp.json().get("success", True):
+                elog.get_log().warn("tender_rejected", "Tender {tender_id} not taken at {price}", tender_id=d.tender_id, price=d.price)
+                d.accept = False
+                continue
+            self.ledger.apply_fill(RITC, action, qty)
+            self.fx.on_fill(RITC, action, qty, d.price if d.price is not None else offer["price"])
+            elog.get_log().info("tender_accepted", "Tender {tender_id} accepted: {action} {qty} RITC, edge {edge:.4f} CAD/sh, "
+                               "book {book_qty} / convert {convert_qty}", tender_id=d.tender_id, action=action, qty=qty,
+                               edge=d.edge_per_share, book_qty=d.book_qty, convert_qty=d.convert_qty)
+
+            legs = [(RITC, reverse[action], d.book_qty)] if d.book_qty else []
+            if d.convert_qty:
+                basket_action = reverse[action]  # sell the basket against long RITC, buy it against short
+                legs += [(BULL, basket_action, d.convert_qty), (BEAR, basket_action, d.convert_qty)]
+            result = self.gateway.submit_package(legs, priority=osch.PRIORITY_HEDGE)
+            book_done, hedged = d.book_qty, d.convert_qty
+            if not result.ok:
+                elog.get_log().warn("package_failed", "Tender unwind leg failed: {failed}",
+                                    failed=[(leg.ticker, leg.errors) for leg in result.failed_legs])
+                # Only the RITC sold/bought and the basket filled on both legs count; square a lone basket leg
+                book_done = sum(leg.filled for leg in result.legs if leg.ticker == RITC)
+                basket = PackageResult([leg for leg in result.legs if leg.ticker != RITC])
+                hedged = min((leg.filled for leg in basket.legs), default=0)
+                self.unwind_package(basket, keep=hedged)
+
+            sign = 1 if action == "BUY" else -1
+            signed = sign * hedged
+            if hedged:
+                self.arb_positions.append({
+                    "type": package_type,
+                    "bull_qty": -signed,
+                    "bear_qty": -signed,
+                    "ritc_qty": signed,
+                    "edge": d.edge_per_share
+                })
+            positions[RITC] += sign * (qty - book_done)
+            positions[BULL] -= signed
+            positions[BEAR] -= signed
+        return decisions
+
+    @lat.timed("arb.trade")
+    def trade(self, session, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_usd, ritc_ask_usd, usd_bid, usd_ask,
+              snapshot=None):
+        """
+        Main trading function for ETF arbitrage. Pass the MarketSnapshot to size trades off the full books.
+        """
+        self.last_prices = {"bull_bid": bull_bid, "bull_ask": bull_ask, "bear_bid": bear_bid, "bear_ask": bear_ask,
+                            "ritc_bid_usd": ritc_bid_usd, "ritc_ask_usd": ritc_ask_usd,
+                            "usd_bid": usd_bid, "usd_ask": usd_ask}
+
+        # Fills of orders still working since their acks (one batched /orders call at most)
+        self.tracker.poll()
+
+        # Get current positions from the ledger (no REST call unless a resync is due)
         positions = self.get_positions()
         
         if not positions:
             return
             
-        # Close any existing arbitrage positions first
-        self.close_arbitrage_positions(positions)
-        
-        # Detect new arbitrage opportunities
-        arb_data = self.detect_arbitrage_opportunity(bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_cad, ritc_ask_cad, usd_bid, usd_ask)
+        self.fx.mark((ritc_bid_usd + ritc_ask_usd) / 2)
+        if not self.fx.synced:
+            self.fx.sync(positions)
+
+        # Detect new arbitrage opportunities, and feed the edge statistics
+        arb_data = self.detect_arbitrage_opportunity(bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_usd, ritc_ask_usd,
+                                                     usd_bid, usd_ask)
+        # An empty book side (bid 0, ask 1e12) makes the edges meaningless: keep them out of the statistics
+        if not any(ms.one_sided(bid, ask) for bid, ask in ((bull_bid, bull_ask), (bear_bid, bear_ask),
+                                                           (ritc_bid_usd, ritc_ask_usd), (usd_bid, usd_ask))):
+            self.edge_stats.update(arb_data["edge1"], arb_data["edge2"])
+        incoming = None
+        if self.execution_mode != "passive":
+            if self.quoter.working:
+                self.quoter.cancel_all()  # out of passive mode: no RITC quote keeps resting
+            if snapshot is not None:
+                if self.adaptive_ready():
+                    # size_arbitrage compares edges after fees; the adaptive thresholds are gross
+                    threshold = (self.entry_threshold("basket_rich") - 3 * FEE_MKT,
+                                 self.entry_threshold("etf_rich") - 3 * FEE_MKT)
+                else:
+                    threshold = self.arb_threshold
+                with lat.timer("arb.size"):
+                    arb_data.update(size_arbitrage(snapshot.depth, threshold, FEE_MKT, self.max_arb_qty))
+            incoming = self.incoming_direction(arb_data)
+
+        # Close existing arbitrage positions first (except what the new package will net)
+        self.close_arbitrage_positions(positions, snapshot, incoming)
+
+        # Square the netted USD exposure once it is over the band
+        self.fx.maybe_hedge()
         
+        if self.execution_mode == "passive":
+            self.quote_passive(positions)
+            return
+
         if arb_data:
             # Execute new arbitrage trades if profitable
             self.execute_arbitrage_trade(arb_data, positions)
             
-            # Print current status
-            print(f"Arbitrage Status:")
-            print(f"  Basket Rich Edge: {arb_data['edge1']:.4f} CAD")
-            print(f"  ETF Rich Edge: {arb_data['edge2']:.4f} CAD")
-            print(f"  Open Positions: {len(self.arb_positions)}")
-            print(f"  Current Positions - BULL: {positions[BULL]}, BEAR: {positions[BEAR]}, RITC: {positions[RITC]}")
+            # Per-tick status: one ring-buffer slot, formatted (if at all) on the log's writer thread
+            elog.get_log().tick("status", "Basket Rich Edge: {edge1:.4f} CAD, ETF Rich Edge: {edge2:.4f} CAD, "
+                                "Open Positions: {open}, BULL: {bull}, BEAR: {bear}, RITC: {ritc}",
+                                edge1=arb_data["edge1"], edge2=arb_data["edge2"], open=len(self.arb_positions),
+                                bull=positions[BULL], bear=positions[BEAR], ritc=positions[RITC])
         
 
+# One trader for the whole case, so open packages and the ledger survive between ticks
+_trader = None
+
+def get_trader(session):
+    """Return the case-wide ArbitrageTrader, creating it on first use"""
+    global _trader
+    if _trader is None or _trader.session is not session:
+        _trader = ArbitrageTrader(session)
+    return _trader
+
 # Compatibility function for existing code structure
-def trader(session, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_cad, ritc_ask_cad, usd_bid, usd_ask):
+def trader(session, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_usd, ritc_ask_usd, usd_bid, usd_ask, snapshot=None):
     """
     Compatibility wrapper for the main trading function
     """
-    trader = ArbitrageTrader(session)
-    trader.trade(session, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_cad, ritc_ask_cad, usd_bid, usd_ask)
+    get_trader(session).trade(session, bull_bid, bull_ask, bear_bid, bear_ask, ritc_bid_usd, ritc_ask_usd, usd_bid, usd_ask,
+                              snapshot)
 
@@ -0,0 +1,366 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Backtest Engine
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Runs the real ArbitrageTrader decision logic over a recorded session (see
+marketRecorder.py) or a synthetic book stream (the mock server's market
+model), against a simulated exchange that fills market orders through the
+book with FEE_MKT, resting limit orders with REBATE_LMT and converter uses at
+CONVERTER_COST_CAD. A grid of
+parameter combinations is spread over a process pool; every worker builds the
+book stream once and then runs its share of the grid.
+
+    python backtest.py --synthetic 7 --adaptive 0 --arb-threshold 0.03:0.30:0.01 \\
+        --mean-reversion-threshold=-0.05:0.15:0.01 --max-arb-qty 10000,25000,50000
+    python backtest.py --synthetic 7 --entry-quantile 0.9:0.99:0.01 --exit-z 0,0.5,1 --edge-window 60,120
+
+Ranges are start:stop:step (stop included) or comma-separated lists. With
+adaptive thresholds on (the trader's default), --arb-threshold and
+--mean-reversion-threshold only apply until the edge window holds
+MIN_EDGE_SAMPLES observations; sweep them with --adaptive 0, or sweep
+--adaptive 0,1 to compare both.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import redirect_stdout
+from time import perf_counter
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+import arbTrading as arb
+import etfConverter as conv
+from marketSnapshot import MarketSnapshot
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import eventLog as elog
+
+TICKERS = (arb.BULL, arb.BEAR, arb.RITC, arb.USD)
+BOOK_LEVELS = 50
+
+
+# --------- SIMULATED EXCHANGE ----------
+class InlineScheduler:
+    """Drop-in for OrderScheduler that sends each order immediately on the calling thread"""
+    def submit(self, ticker, fn, priority=None):
+        future = Future()
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class SimResponse:
+    def __init__(self, payload, ok=True):
+        self.payload = payload
+        self.ok = ok
+        self.status_code = 200 if ok else 400
+        self.text = "" if ok else str(payload)
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(self.text)
+
+
+class SimExchange:
+    """Stands in for the requests.Session the trader talks to"""
+
+    def __init__(self, fee=arb.FEE_MKT, rebate=arb.REBATE_LMT):
+        self.fee = fee
+        self.rebate = rebate
+        self.positions = {t: 0 for t in (arb.BULL, arb.BEAR, arb.RITC, arb.USD, arb.CAD)}
+        self.cash = {"CAD": 0.0, "USD": 0.0}
+        self.books = {}
+        self.orders = {}
+        self.open_orders = {}
+        self.next_id = 1
+        self.leases = {}
+        self.conversions = 0
+        self.turnover = 0.0  # CAD notional traded
+        self.fees = 0.0
+        self.tick = 0
+        self.usd_mid = 1.0
+
+    def set_snapshot(self, tick, snapshot):
+        self.tick = tick
+        self.books = {t: {"bids": [[lvl["price"], lvl["quantity"] - lvl.get("quantity_filled", 0)] for lvl in b["bids"]],
+                          "asks": [[lvl["price"], lvl["quantity"] - lvl.get("quantity_filled", 0)] for lvl in b["asks"]]}
+                      for t, b in snapshot.books.items()}
+        bid, ask = snapshot.best_bid_ask(arb.USD)
+        self.usd_mid = (bid + ask) / 2
+        self._match_resting()
+
+    def _settle(self, ticker, action, qty, price, fee_per_share):
+        signed = qty if action == "BUY" else -qty
+        self.positions[ticker] += signed
+        if ticker == arb.USD:
+            self.cash["CAD"] -= signed * price
+            self.turnover += qty * price
+            return
+        currency = "USD" if ticker == arb.RITC else "CAD"
+        fx = self.usd_mid if currency == "USD" else 1.0
+        self.cash[currency] -= signed * price + qty * fee_per_share
+        self.turnover += qty * price * fx
+        self.fees += qty * fee_per_share * fx
+
+    def _walk(self, ticker, action, qty, limit=None):
+        side = self.books[ticker]["asks" if action == "BUY" else "bids"]
+        filled, notional = 0, 0.0
+        while side and filled < qty:
+            price, avail = side[0]
+            if limit is not None and (price > limit if action == "BUY" else price < limit):
+                break
+            take = min(avail, qty - filled)
+            filled += take
+            notional += take * price
+            if take == avail:
+                side.pop(0)
+            else:
+                side[0][1] -= take
+        return filled, (notional / filled if filled else None)
+
+    def _match_resting(self):
+        for order_id, order in list(self.open_orders.items()):
+            side = self.books[order["ticker"]]["asks" if order["action"] == "BUY" else "bids"]
+            if not side:
+                continue
+            touch = side[0][0]
+            if (touch <= order["price"]) if order["action"] == "BUY" else (touch >= order["price"]):
+                fill = min(order["quantity"] - order["quantity_filled"], side[0][1])
+                self._settle(order["ticker"], order["action"], fill, order["price"], -self.rebate)
+                order["quantity_filled"] += fill
+                order["vwap"] = order["price"]
+                if order["quantity_filled"] == order["quantity"]:
+                    order["status"] = "TRANSACTED"
+                    del self.open_orders[order_id]
+
+    def _convert(self, lease_id, params):
+        converter = self.leases.get(lease_id)
+        qty = int(params.get("quantity1", 0))
+        if converter is None or not 0 < qty <= conv.CONVERTER_SIZE:
+            return SimResponse({"code": "INVALID_CONVERSION", "message": f"bad conversion {params}"}, ok=False)
+        for ticker in conv.CONVERT_FROM[converter]:
+            self.positions[ticker] -= qty
+        for ticker in conv.CONVERT_TO[converter]:
+            self.positions[ticker] += qty
+        self.cash["CAD"] -= conv.CONVERTER_COST_CAD
+        self.fees += conv.CONVERTER_COST_CAD
+        self.conversions += 1
+        return SimResponse({"id": lease_id, "ticker": converter})
+
+    # --------- requests.Session interface ----------
+    def post(self, url, params=None):
+        p = params or {}
+        path = urlparse(url).path.rstrip("/")
+        if path.endswith("/leases"):
+            lease_id = len(self.leases) + 1
+            self.leases[lease_id] = p["ticker"]
+            return SimResponse({"id": lease_id, "ticker": p["ticker"]})
+        if "/leases/" in path:
+            return self._convert(int(path.rsplit("/", 1)[1]), p)
+        ticker, action, qty, order_type = p["ticker"], p["action"], int(p["quantity"]), p.get("type", "MARKET")
+        max_size = arb.MAX_SIZE_EQUITY if ticker in (arb.BULL, arb.BEAR, arb.RITC) else arb.MAX_SIZE_FX
+        if qty <= 0 or qty > max_size or ticker not in self.books:
+            return SimResponse({"code": "INVALID_QUANTITY", "message": f"bad order {p}"}, ok=False)
+        limit = float(p["price"]) if order_type == "LIMIT" else None
+        order = {"order_id": self.next_id, "tick": self.tick, "ticker": ticker, "type": order_type,
+                 "quantity": qty, "action": action, "price": limit, "quantity_filled": 0, "vwap": None,
+                 "status": "OPEN"}
+        self.next_id += 1
+        self.orders[order["order_id"]] = order
+        filled, vwap = self._walk(ticker, action, qty, limit)
+        if filled:
+            self._settle(ticker, action, filled, vwap, self.fee if ticker != arb.USD else 0.0)
+            order["quantity_filled"], order["vwap"] = filled, vwap
+        if order_type == "MARKET" or filled == qty:
+            order["status"] = "TRANSACTED"
+        else:
+            self.open_orders[order["order_id"]] = order
+        return SimResponse(dict(order))
+
+    def get(self, url, params=None):
+        path = urlparse(url).path.rstrip("/")
+        if path.endswith("/securities"):
+            return SimResponse([{"ticker": t, "position": q} for t, q in self.positions.items()])
+        if "/orders/" in path:
+            return SimResponse(dict(self.orders[int(path.rsplit("/", 1)[1])]))
+        if path.endswith("/orders"):
+            status = (params or {}).get("status", "OPEN")
+            if status == "OPEN":
+                return SimResponse([dict(o) for o in self.open_orders.values()])
+            return SimResponse([dict(o) for o in self.orders.values() if o["status"] == status])
+        if path.endswith("/leases"):
+            return SimResponse([{"id": i, "ticker": t} for i, t in self.leases.items()])
+        return SimResponse([])
+
+    def delete(self, url, params=None):
+        order = self.open_orders.pop(int(urlparse(url).path.rsplit("/", 1)[1]), None)
+        if order is not None:
+            order["status"] = "CANCELLED"
+        return SimResponse({"success": order is not None}, ok=order is not None)
+
+    def equity(self, snapshot):
+        """Mark-to-mid value in CAD"""
+        value = self.cash["CAD"] + self.cash["USD"] * self.usd_mid
+        for ticker in (arb.BULL, arb.BEAR, arb.RITC, arb.USD):
+            bid, ask = snapshot.best_bid_ask(ticker)
+            mid = (bid + ask) / 2
+            value += self.positions[ticker] * mid * (self.usd_mid if ticker == arb.RITC else 1.0)
+        return value
+
+
+# --------- BOOK STREAMS ----------
+def _snapshot(books, ts_ns=0):
+    return MarketSnapshot(MappingProxyType(books), MappingProxyType({t: ts_ns for t in books}), ts_ns)
+
+
+def synthetic_stream(seed, ticks=300, levels=BOOK_LEVELS):
+    """Book stream from the mock server's market model"""
+    from mockRitServer import Market
+    market = Market("arbitrage", ticks=ticks, seed=seed, book_levels=levels, tender_every=0)
+    stream = []
+    for tick in range(1, ticks + 1):
+        market.advance_to(tick)
+        stream.append((tick, _snapshot({t: market.book(t, levels) for t in TICKERS})))
+    return stream
+
+
+def recorded_stream(directory):
+    """Book stream from a MarketRecorder session"""
+    from marketRecorder import load_session
+    session = load_session(directory)
+    return [(int(session.index[i]["tick"]), _snapshot(session.books_at(i), int(session.index[i]["ts_ns"])))
+            for i in range(len(session))]
+
+
+def load_stream(source):
+    kind, value = source
+    return synthetic_stream(int(value)) if kind == "synthetic" else recorded_stream(value)
+
+
+# --------- ONE RUN ----------
+def run_backtest(stream, params):
+    exchange = SimExchange()
+    trader = arb.ArbitrageTrader(exchange, params, scheduler=InlineScheduler())
+    trader.fx.clock = lambda: exchange.tick  # one RIT tick is one second
+    trader.tracker.clock = lambda: exchange.tick
+    elog.get_log().level = elog.OFF  # trade events are dropped at the call site, not formatted and discarded
+    peak, max_drawdown, equity = 0.0, 0.0, 0.0
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for tick, snapshot in stream:
+            exchange.set_snapshot(tick, snapshot)
+            quotes = [q for t in TICKERS for q in snapshot.best_bid_ask(t)]
+            trader.trade(exchange, *quotes, snapshot=snapshot)
+            equity = exchange.equity(snapshot)
+            peak = max(peak, equity)
+            max_drawdown = max(max_drawdown, peak - equity)
+    pos = exchange.positions
+    return dict(params, pnl=equity, turnover=exchange.turnover, fees=exchange.fees, orders=exchange.next_id - 1,
+                conversions=exchange.conversions,
+                max_drawdown=max_drawdown, open_packages=len(trader.arb_positions),
+                netted=trader.arb_positions.netted_qty,
+                final_gross=abs(pos[arb.BULL]) + abs(pos[arb.BEAR]) + abs(pos[arb.RITC]))
+
+
+# --------- SWEEP ----------
+_stream = None
+
+def _init_worker(source):
+    global _stream
+    _stream = load_stream(source)
+
+
+def _run_chunk(chunk):
+    return [run_backtest(_stream, params) for params in chunk]
+
+
+def parameter_grid(axes):
+    """axes: {name: [values]} -> list of param dicts (cartesian product)"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def sweep(grid, source, workers=None, chunk_size=8):
+    chunks = [grid[i:i + chunk_size] for i in range(0, len(grid), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,)) as pool:
+        rows = [row for rows in pool.map(_run_chunk, chunks) for row in rows]
+    return pd.DataFrame(rows).sort_values("pnl", ascending=False, ignore_index=True)
+
+
+def parse_axis(text, cast=float):
+    """'0.05:0.30:0.01' -> inclusive range, '1,2,3' -> list"""
+    if ":" in text:
+        start, stop, step = (float(x) for x in text.split(":"))
+        return [cast(round(v, 10)) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(v) for v in text.split(",")]
+
+
+def parse_flag(text):
+    """'0' / '1' (or any number) -> bool, for parse_axis"""
+    return bool(int(float(text)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--synthetic", metavar="SEED", help="synthetic book stream from the mock market model")
+    src.add_argument("--recorded", metavar="DIR", help="session recorded by MarketRecorder")
+    parser.add_argument("--arb-threshold", default=str(arb.ARB_THRESHOLD_CAD),
+                        help="fixed entry edge (CAD); with --adaptive 1 only until the edge window warms up")
+    parser.add_argument("--mean-reversion-threshold", default=str(arb.MEAN_REVERSION_THRESHOLD),
+                        help="fixed exit edge (CAD); with --adaptive 1 only until the edge window warms up")
+    parser.add_argument("--adaptive", default=str(int(arb.ADAPTIVE_THRESHOLDS)),
+                        help="1: thresholds from the rolling edge statistics, 0: always the fixed thresholds")
+    parser.add_argument("--entry-quantile", default=str(arb.ENTRY_QUANTILE), help="adaptive entry quantile")
+    parser.add_argument("--min-edge", default=str(arb.MIN_EDGE_CAD), help="adaptive entry floor (CAD)")
+    parser.add_argument("--exit-z", default=str(arb.EXIT_Z), help="adaptive exit: std above the rolling mean")
+    parser.add_argument("--max-hold-half-lives", default=str(arb.MAX_HOLD_HALF_LIVES),
+                        help="adaptive stale exit, in edge half-lives")
+    parser.add_argument("--edge-window", default=str(arb.EDGE_WINDOW), help="rolling edge window (ticks)")
+    parser.add_argument("--order-qty", default=str(arb.ORDER_QTY))
+    parser.add_argument("--max-arb-qty", default=str(arb.MAX_ARB_QTY))
+    parser.add_argument("--max-net", default=str(arb.MAX_LONG_NET), help="symmetric net limit")
+    parser.add_argument("--max-gross", default=str(arb.MAX_GROSS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="backtest_results.csv")
+    args = parser.parse_args()
+
+    axes = {
+        "arb_threshold": parse_axis(args.arb_threshold),
+        "mean_reversion_threshold": parse_axis(args.mean_reversion_threshold),
+        "order_qty": parse_axis(args.order_qty, int),
+        "max_arb_qty": parse_axis(args.max_arb_qty, int),
+        "max_long_net": parse_axis(args.max_net, int),
+        "max_gross": parse_axis(args.max_gross, int),
+        "adaptive": parse_axis(args.adaptive, parse_flag),
+        "entry_quantile": parse_axis(args.entry_quantile),
+        "min_edge": parse_axis(args.min_edge),
+        "exit_z": parse_axis(args.exit_z),
+        "max_hold_half_lives": parse_axis(args.max_hold_half_lives),
+        "edge_window": parse_axis(args.edge_window, int),
+    }
+    grid = parameter_grid(axes)
+    for params in grid:
+        params["max_short_net"] = -params["max_long_net"]
+    source = ("synthetic", args.synthetic) if args.synthetic is not None else ("recorded", args.recorded)
+
+    start = perf_counter()
+    table = sweep(grid, source, args.workers)
+    table.to_csv(args.out, index=False)
+    print(f"{len(grid)} combinations in {perf_counter() - start:.1f}s -> {args.out}")
+    print(table.head(10).to_markdown(), end="\n" * 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Execution Benchmark
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Times a three-leg arbitrage package sent the old serial way (one POST after
+another) against ExecutionGateway.submit_package, using a small local
+/orders server with an injected per-request delay. Stop the RIT client first,
+since the mock binds to the same port.
+
+    python bench_execution.py --delay-ms 5 --qty 25000 --rounds 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from statistics import median
+from time import perf_counter_ns, sleep
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from executionGateway import API, ExecutionGateway
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+from orderScheduler import OrderScheduler
+
+MAX_SIZE_EQUITY = 10000
+MAX_SIZE_FX = 2500000
+
+
+def make_handler(delay_s):
+    order_ids = count(1)
+
+    class OrderHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            sleep(delay_s)
+            q = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            body = json.dumps({"order_id": next(order_ids), "ticker": q["ticker"], "action": q["action"],
+                               "quantity": int(q["quantity"]), "quantity_filled": int(q["quantity"]),
+                               "status": "TRANSACTED"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return OrderHandler
+
+
+def serial_submit(session, legs):
+    """The previous path: every child slice of every leg, one after another"""
+    for ticker, action, qty in legs:
+        while qty > MAX_SIZE_EQUITY:
+            session.post(f"{API}/orders", params={'ticker': ticker, 'type': "MARKET", 'quantity': MAX_SIZE_EQUITY, 'action': action})
+            qty -= MAX_SIZE_EQUITY
+        if qty > 0:
+            session.post(f"{API}/orders", params={'ticker': ticker, 'type': "MARKET", 'quantity': qty, 'action': action})
+
+
+def time_ms(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = perf_counter_ns()
+        fn()
+        samples.append((perf_counter_ns() - start) / 1e6)
+    return median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-ms", type=float, default=5.0, help="server delay per order")
+    parser.add_argument("--qty", type=int, default=5000, help="shares per leg")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    port = urlparse(API).port
+    server = ThreadingHTTPServer(("localhost", port), make_handler(args.delay_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    legs = [("BULL", "SELL", args.qty), ("BEAR", "SELL", args.qty), ("RITC", "BUY", args.qty)]
+    with requests.Session() as session:
+        scheduler = OrderScheduler(session)
+        scheduler.limits_loaded = True  # the mock has no /securities; run unthrottled
+        gateway = ExecutionGateway(session, scheduler, MAX_SIZE_EQUITY, MAX_SIZE_FX)
+        serial_submit(session, legs)  # warm up the keep-alive connections
+        gateway.submit_package(legs)
+
+        serial_p50, serial_max = time_ms(lambda: serial_submit(session, legs), args.rounds)
+        parallel_p50, parallel_max = time_ms(lambda: gateway.submit_package(legs), args.rounds)
+
+    server.shutdown()
+    n_orders = sum(len(gateway.slices(t, q)) for t, _, q in legs)
+    print(f"package: 3 legs x {args.qty} shares = {n_orders} child orders, server delay {args.delay_ms} ms")
+    print(f"serial   p50={serial_p50:8.2f} ms  max={serial_max:8.2f} ms")
+    print(f"parallel p50={parallel_p50:8.2f} ms  max={parallel_max:8.2f} ms")
+    print(f"speedup  {serial_p50 / parallel_p50:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Depth Engine
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Walks the full BULL, BEAR, RITC and USD books instead of only level [0].
+Cumulative sums over the levels give the cost of trading any quantity, so the
+executable edge can be evaluated for a whole grid of sizes in one NumPy pass,
+and the largest size that still clears the threshold after fees is returned.
+"""
+
+import numpy as np
+
+# Tickers
+USD = "USD"
+BULL = "BULL"
+BEAR = "BEAR"
+RITC = "RITC"
+
+LOT = 100            # size grid resolution (shares)
+LEGS = 3             # BULL, BEAR and RITC each pay the market fee
+
+
+class BookSide:
+    """One side of a book as cumulative arrays"""
+    __slots__ = ("prices", "cum_qty", "cum_notional")
+
+    def __init__(self, levels):
+        prices = np.fromiter((lvl["price"] for lvl in levels), dtype=float, count=len(levels))
+        qty = np.fromiter((lvl["quantity"] - lvl.get("quantity_filled", 0) for lvl in levels),
+                          dtype=float, count=len(levels))
+        self.prices = prices
+        self.cum_qty = np.cumsum(qty)
+        self.cum_notional = np.cumsum(prices * qty)
+
+    @property
+    def depth(self):
+        return self.cum_qty[-1] if len(self.cum_qty) else 0.0
+
+    def fill_value(self, qty):
+        """
+        Total value of trading qty against this side (vectorized over qty).
+        Quantities beyond the visible depth come back as NaN.
+        """
+        qty = np.asarray(qty, dtype=float)
+        if not len(self.prices):
+            return np.full(qty.shape, np.nan)
+        idx = np.searchsorted(self.cum_qty, qty, side="left")
+        inside = idx < len(self.prices)
+        idx = np.minimum(idx, len(self.prices) - 1)
+        prev_qty = np.where(idx > 0, self.cum_qty[idx - 1], 0.0)
+        prev_notional = np.where(idx > 0, self.cum_notional[idx - 1], 0.0)
+        value = prev_notional + (qty - prev_qty) * self.prices[idx]
+        return np.where(inside, value, np.nan)
+
+
+class DepthBook:
+    """Bid and ask sides of the four arbitrage books"""
+    def __init__(self, books):
+        self.bids = {t: BookSide(books[t]["bids"]) for t in (BULL, BEAR, RITC, USD)}
+        self.asks = {t: BookSide(books[t]["asks"]) for t in (BULL, BEAR, RITC, USD)}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(snapshot.books)
+
+    def edges(self, qty):
+        """
+        Per-share executable edges in CAD for each quantity in qty (before fees).
+
+        edge1: sell BULL+BEAR into the bids, buy RITC from the asks and the USD for it
+        edge2: sell RITC into the bids and the USD proceeds, buy BULL+BEAR from the asks
+        """
+        qty = np.asarray(qty, dtype=float)
+        with np.errstate(invalid="ignore"):
+            basket_sell = self.bids[BULL].fill_value(qty) + self.bids[BEAR].fill_value(qty)
+            basket_buy = self.asks[BULL].fill_value(qty) + self.asks[BEAR].fill_value(qty)
+            ritc_buy_cad = self.asks[USD].fill_value(self.asks[RITC].fill_value(qty))
+            ritc_sell_cad = self.bids[USD].fill_value(self.bids[RITC].fill_value(qty))
+            edge1 = (basket_sell - ritc_buy_cad) / qty
+            edge2 = (ritc_sell_cad - basket_buy) / qty
+        return edge1, edge2
+
+
+def size_grid(max_qty, lot=LOT):
+    return np.arange(lot, max_qty + lot, lot, dtype=float)
+
+
+def largest_clearing_size(qty, edge, threshold, fee):
+    """Largest quantity whose per-share edge after LEGS market fees still clears threshold"""
+    ok = (edge - LEGS * fee) >= threshold  # NaN (not enough depth) compares False
+    if not ok.any():
+        return 0, np.nan
+    i = np.flatnonzero(ok)[-1]
+    return int(qty[i]), float(edge[i] - LEGS * fee)
+
+
+def size_arbitrage(depth_book, threshold, fee, max_qty, lot=LOT):
+    """
+    Best executable size in each direction.
+
+    Returns {"qty1", "net_edge1", "qty2", "net_edge2"}, where net edges are per
+    share after fees at the returned size (qty 0 when nothing clears).
+    threshold is one value for both directions or a (direction 1, direction 2) pair.
+    """
+    threshold1, threshold2 = threshold if isinstance(threshold, tuple) else (threshold, threshold)
+    qty = size_grid(max_qty, lot)
+    edge1, edge2 = depth_book.edges(qty)
+    qty1, net1 = largest_clearing_size(qty, edge1, threshold1, fee)
+    qty2, net2 = largest_clearing_size(qty, edge2, threshold2, fee)
+    return {"qty1": qty1, "net_edge1": net1, "qty2": qty2, "net_edge2": net2}
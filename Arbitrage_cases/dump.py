@@ -4,11 +4,17 @@ Rotman BMO Finance Research and Trading Lab, Uniersity of Toronto (C)
 All rights reserved.
 """
 
+import os
+import sys
 import requests
 from time import sleep
 import numpy as np
 import arbTrading as arb
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import eventLog as elog
+import liquidationEngine as liq
+
 '''
 If you are not familiar with Python or feeling a little bit rusty, highly recommend you to go through the following link:
     https://github.com/trekhleb/learn-python
@@ -83,15 +89,11 @@ def positions_map():
 
 def place_mkt(ticker, action, qty): # type LMT?
     # Sends Market orders; price param is ignored by most RIT cases when type=MARKET
-    if qty > 10000:
-        while(qty > 10000):
-            s.post(f"{API}/orders",
-                  params={"ticker": ticker, "type": "MARKET",
-                          "quantity": 10000, "action": action}).ok
-            qty -= 10000
-    s.post(f"{API}/orders",
-                  params={"ticker": ticker, "type": "MARKET",
-                          "quantity": int(qty), "action": action}).ok
+    max_size = MAX_SIZE_FX if ticker in (USD, CAD) else MAX_SIZE_EQUITY
+    for q in liq.slices(int(qty), max_size):
+        s.post(f"{API}/orders",
+               params={"ticker": ticker, "type": "MARKET",
+                       "quantity": q, "action": action})
 
 def within_limits():
     # Simple gross/net guard using equity legs only
@@ -113,8 +115,9 @@ def accept_active_tender_offers():
             resp = s.post(f"{API}/tenders/{tender_id}")
         else:
             resp = s.post(f"{API}/tenders/{tender_id}", params={"price": price})
-        return print("Tender Offer Accepted:", resp.ok)
-    print("No active tenders")
+        elog.get_log().info("tender_accepted", "Tender Offer Accepted: {ok}", tender_id=tender_id, ok=resp.ok)
+        return
+    elog.get_log().info("tender_none", "No active tenders")
     
 def get_positions(session):
         """Get current positions for all securities"""
@@ -135,16 +138,13 @@ def get_positions(session):
 
 # --------- CORE LOGIC ----------
 def step_once():
-    positions = get_positions(s)
-    print("Current Positions:", positions)
-    for ticker in positions:
-        shares = positions[ticker]
-        if shares > 0:
-            # Sell all long positions
-            place_mkt(ticker, "SELL", shares)
-        elif shares < 0:
-            # Cover all short positions by buying back
-            place_mkt(ticker, "BUY", abs(shares))
+    # One /securities read plans every ticker's slices from its own max_trade_size; the slices go out
+    # in parallel through the order scheduler, FX last, and one final read checks the book is flat
+    residual = liq.LiquidationEngine(s).liquidate()
+    if residual:
+        elog.get_log().warn("liquidation_residual", "Still open: {residual}", residual=residual)
+    else:
+        elog.get_log().info("flat", "Flat")
 
 
 def main():
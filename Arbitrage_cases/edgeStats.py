@@ -0,0 +1,154 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Streaming Edge Statistics
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Rolling statistics of edge1 and edge2 over the last `window` observations,
+with fixed memory:
+
+    mean / variance   rolling Welford (add the new value, drop the oldest), O(1)
+    quantiles         a sorted copy of the window kept with bisect: an O(window)
+                      list shift per update, exact O(1) quantile reads
+    half-life         AR(1) fit x[t] = a + b x[t-1] from rolling lag-1 sums,
+                      half-life = -ln 2 / ln b (in observations), O(1)
+
+The sorted window is a trade-off. Its shift is a memmove in C, about 1 us
+at the default window of 300 (2 us at 3000). A fixed-bin histogram would
+update in O(1), but it gives approximate quantiles and each read scans the
+bins, and the thresholds read two quantiles every tick. P² cannot forget
+values that leave the window.
+
+Every `window` updates the running sums are rebuilt from the ring buffer, so
+floating-point drift cannot build up over a long case.
+"""
+
+import math
+from bisect import bisect_left, insort
+
+EDGE_WINDOW = 300  # observations kept per edge
+
+
+class RollingStats:
+    __slots__ = ("window", "buf", "i", "n", "mean", "m2", "sorted", "sx", "sy", "sxx", "sxy", "since_rebuild")
+
+    def __init__(self, window=EDGE_WINDOW):
+        self.window = window
+        self.buf = [0.0] * window  # ring buffer, oldest value at self.i once full
+        self.i = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sorted = []
+        # Lag-1 pair sums over (x[t-1], x[t]) for every consecutive pair in the window
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+        self.since_rebuild = 0
+
+    def push(self, x):
+        w = self.window
+        if self.n:
+            last = self.buf[(self.i - 1) % w]
+            self.sx += last
+            self.sy += x
+            self.sxx += last * last
+            self.sxy += last * x
+
+        if self.n < w:
+            self.n += 1
+            d = x - self.mean
+            self.mean += d / self.n
+            self.m2 += d * (x - self.mean)
+        else:
+            old = self.buf[self.i]
+            nxt = self.buf[(self.i + 1) % w]
+            # The oldest pair (old, nxt) leaves the window
+            self.sx -= old
+            self.sy -= nxt
+            self.sxx -= old * old
+            self.sxy -= old * nxt
+            mean = self.mean + (x - old) / w
+            self.m2 += (x - old) * (x - mean + old - self.mean)
+            self.mean = mean
+            del self.sorted[bisect_left(self.sorted, old)]
+
+        self.buf[self.i] = x
+        self.i = (self.i + 1) % w
+        insort(self.sorted, x)
+
+        self.since_rebuild += 1
+        if self.since_rebuild >= w:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Recompute the running sums exactly from the buffer"""
+        values = self.values()
+        n = len(values)
+        self.mean = sum(values) / n
+        self.m2 = sum((v - self.mean) ** 2 for v in values)
+        prev, curr = values[:-1], values[1:]
+        self.sx, self.sy = sum(prev), sum(curr)
+        self.sxx = sum(v * v for v in prev)
+        self.sxy = sum(a * b for a, b in zip(prev, curr))
+        self.since_rebuild = 0
+
+    def values(self):
+        """Window contents, oldest first"""
+        if self.n < self.window:
+            return self.buf[:self.n]
+        return self.buf[self.i:] + self.buf[:self.i]
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.var, 0.0))
+
+    def quantile(self, q):
+        """Linear-interpolated quantile of the window"""
+        if not self.n:
+            return math.nan
+        pos = q * (self.n - 1)
+        lo = int(pos)
+        hi = min(lo + 1, self.n - 1)
+        return self.sorted[lo] + (pos - lo) * (self.sorted[hi] - self.sorted[lo])
+
+    @property
+    def ar1(self):
+        """Slope b of x[t] on x[t-1]"""
+        pairs = self.n - 1
+        if pairs < 2:
+            return math.nan
+        den = pairs * self.sxx - self.sx * self.sx
+        return (pairs * self.sxy - self.sx * self.sy) / den if den > 0 else math.nan
+
+    @property
+    def half_life(self):
+        """Observations for a deviation to halve; inf when the series does not mean-revert"""
+        b = self.ar1
+        if not 0.0 < b < 1.0:
+            return math.inf
+        return -math.log(2.0) / math.log(b)
+
+
+class EdgeStats:
+    """Rolling statistics of both arbitrage edges"""
+
+    def __init__(self, window=EDGE_WINDOW):
+        self.edges = {"basket_rich": RollingStats(window), "etf_rich": RollingStats(window)}
+        self.count = 0  # observations so far (the clock packages are aged with)
+
+    def update(self, edge1, edge2):
+        """Add one observation of both edges; a non-finite edge (no depth, empty book) is skipped"""
+        if not (math.isfinite(edge1) and math.isfinite(edge2)):
+            return False
+        self.edges["basket_rich"].push(edge1)
+        self.edges["etf_rich"].push(edge2)
+        self.count += 1
+        return True
+
+    def __getitem__(self, direction):
+        return self.edges[direction]
+
+    def ready(self, min_samples):
+        return self.count >= min_samples
@@ -0,0 +1,104 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - ETF Converter
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Creates and redeems RITC through the case's ETF-Creation and ETF-Redemption
+converters (RIT leases API) instead of crossing the spread on all three
+books. One lease per converter is taken on first use and kept; every use
+converts up to CONVERTER_SIZE units 1 RITC <-> 1 BULL + 1 BEAR for a flat
+cost.
+"""
+
+import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import eventLog as elog
+
+API = "http://localhost:9999/v1"
+
+# Tickers
+BULL = "BULL"
+BEAR = "BEAR"
+RITC = "RITC"
+
+CREATION = "ETF-Creation"      # BULL + BEAR -> RITC
+REDEMPTION = "ETF-Redemption"  # RITC -> BULL + BEAR
+
+CONVERTER_SIZE = 10000       # units per converter use
+CONVERTER_COST_CAD = 1500.0  # cost per converter use (check the case brief)
+
+CONVERT_FROM = {CREATION: (BULL, BEAR), REDEMPTION: (RITC,)}
+CONVERT_TO = {CREATION: (RITC,), REDEMPTION: (BULL, BEAR)}
+
+
+def converter_uses(qty):
+    return math.ceil(abs(qty) / CONVERTER_SIZE)
+
+
+def conversion_cost(qty, ritc_usd, usd_bid, usd_ask):
+    """
+    CAD cost of converting qty units: the flat fee per use, plus half the USD
+    spread on the RITC notional, since the USD side of the package is squared
+    in the FX book instead of by trading RITC.
+    """
+    return converter_uses(qty) * CONVERTER_COST_CAD + abs(qty) * ritc_usd * (usd_ask - usd_bid) / 2
+
+
+class EtfConverter:
+    def __init__(self, session, on_convert=None):
+        self.session = session
+        self.on_convert = on_convert  # (ticker, action, qty) for every leg moved, e.g. PositionLedger.apply_fill
+        self.leases = {}              # converter ticker -> lease id
+
+    def lease_id(self, converter):
+        """Lease id for a converter, reusing an existing lease when there is one"""
+        if converter not in self.leases:
+            r = self.session.get(f"{API}/leases")
+            r.raise_for_status()
+            for lease in r.json():
+                self.leases.setdefault(lease["ticker"], lease["id"])
+        if converter not in self.leases:
+            r = self.session.post(f"{API}/leases", params={"ticker": converter})
+            r.raise_for_status()
+            self.leases[converter] = r.json()["id"]
+        return self.leases[converter]
+
+    def convert(self, converter, qty):
+        """Convert qty units in CONVERTER_SIZE chunks; returns the quantity converted"""
+        try:
+            lease_id = self.lease_id(converter)
+        except Exception as e:
+            elog.get_log().warn("lease_error", "Could not lease {converter}: {error}", converter=converter, error=str(e))
+            return 0
+
+        done = 0
+        while done < qty:
+            chunk = min(CONVERTER_SIZE, qty - done)
+            params = {}
+            for i, ticker in enumerate(CONVERT_FROM[converter], start=1):
+                params[f"from{i}"] = ticker
+                params[f"quantity{i}"] = chunk
+            r = self.session.post(f"{API}/leases/{lease_id}", params=params)
+            if not r.ok:
+                elog.get_log().warn("convert_failed", "{converter} failed after {done}/{qty}: {error}",
+                                     converter=converter, done=done, qty=qty, error=r.text)
+                self.leases.pop(converter, None)  # the lease may have expired; take a new one next time
+                break
+            if self.on_convert is not None:
+                for ticker in CONVERT_FROM[converter]:
+                    self.on_convert(ticker, "SELL", chunk)
+                for ticker in CONVERT_TO[converter]:
+                    self.on_convert(ticker, "BUY", chunk)
+            done += chunk
+        return done
+
+    def create(self, qty):
+        """BULL + BEAR -> RITC"""
+        return self.convert(CREATION, qty)
+
+    def redeem(self, qty):
+        """RITC -> BULL + BEAR"""
+        return self.convert(REDEMPTION, qty)
@@ -0,0 +1,123 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Execution Gateway
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Submits every leg of an arbitrage package - and every child slice of legs
+larger than the per-order maximum - at the same time, instead of one POST
+after another. Child orders go through the shared OrderScheduler, so they are
+paced by the server's per-ticker order rate. Returns a PackageResult with per-leg order IDs and latencies
+so a failed leg can be spotted and the rest of the package unwound at once.
+"""
+
+import os
+import sys
+from dataclasses import dataclass, field
+from functools import partial
+from time import perf_counter_ns
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import latencyMonitor as lat
+from orderScheduler import PRIORITY_OPEN
+
+API = "http://localhost:9999/v1"
+
+# Tickers
+BULL = "BULL"
+BEAR = "BEAR"
+RITC = "RITC"
+
+
+@dataclass
+class LegResult:
+    ticker: str
+    action: str
+    qty: int
+    filled: int = 0
+    order_ids: list = field(default_factory=list)
+    latency_ms: float = 0.0  # until the last child slice was acknowledged
+    errors: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+@dataclass
+class PackageResult:
+    legs: list
+    latency_ms: float = 0.0  # until the whole package was acknowledged
+
+    @property
+    def ok(self):
+        return all(leg.ok for leg in self.legs)
+
+    @property
+    def failed_legs(self):
+        return [leg for leg in self.legs if not leg.ok]
+
+
+class ExecutionGateway:
+    def __init__(self, session, scheduler, max_size_equity, max_size_fx, on_ack=None):
+        self.session = session
+        self.scheduler = scheduler
+        self.max_size_equity = max_size_equity
+        self.max_size_fx = max_size_fx
+        self.on_ack = on_ack  # called as on_ack(ticker, action, qty, response) for every child order
+
+    def max_size(self, ticker):
+        return self.max_size_equity if ticker in (BULL, BEAR, RITC) else self.max_size_fx
+
+    def slices(self, ticker, qty):
+        """Split a quantity into child orders no larger than the ticker's max size"""
+        max_size = self.max_size(ticker)
+        qty = int(qty)
+        out = [max_size] * (qty // max_size)
+        if qty % max_size:
+            out.append(qty % max_size)
+        return out
+
+    def _send(self, ticker, action, qty, order_type, price):
+        params = {'ticker': ticker, 'type': order_type, 'quantity': qty, 'action': action}
+        if price is not None:
+            params['price'] = price
+        start = perf_counter_ns()
+        response = self.session.post(f"{API}/orders", params=params)
+        elapsed_ms = (perf_counter_ns() - start) / 1e6
+        if self.on_ack is not None:
+            self.on_ack(ticker, action, qty, response)
+        return response, elapsed_ms
+
+    @lat.timed("gateway.submit_package")
+    def submit_package(self, legs, order_type="MARKET", price=None, priority=PRIORITY_OPEN):
+        """
+        Send all legs at once.
+
+        legs : list of (ticker, action, qty) tuples
+        priority : scheduler priority shared by every child order
+        """
+        start = perf_counter_ns()
+        results = [LegResult(ticker, action, int(qty)) for ticker, action, qty in legs]
+
+        pending = []
+        for leg in results:
+            for child_qty in self.slices(leg.ticker, leg.qty):
+                send = partial(self._send, leg.ticker, leg.action, child_qty, order_type, price)
+                future = self.scheduler.submit(leg.ticker, send, priority)
+                pending.append((leg, child_qty, future))
+
+        for leg, child_qty, future in pending:
+            try:
+                response, elapsed_ms = future.result()
+            except Exception as e:
+                leg.errors.append(str(e))
+                continue
+            leg.latency_ms = max(leg.latency_ms, elapsed_ms)
+            if not response.ok:
+                leg.errors.append(response.text)
+                continue
+            order = response.json()
+            leg.order_ids.append(order.get("order_id"))
+            leg.filled += int(order.get("quantity_filled", 0))
+
+        return PackageResult(results, (perf_counter_ns() - start) / 1e6)
@@ -0,0 +1,91 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - USD/CAD Hedger
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+RITC is quoted in USD, so the arbitrage leaves USD exposure behind. The
+exposure is USD cash plus the RITC position marked at mid. A RITC trade
+moves both sides and nets to roughly nothing; converting RITC into
+BULL+BEAR (or back) and FX fills change it for real. Changes are
+accumulated here. A USD order goes out only once the net crosses
+FX_BAND_USD, at most once per FX_WINDOW_SECONDS, as a few orders of up
+to MAX_SIZE_FX, instead of one small FX trade per package.
+"""
+
+import os
+import sys
+from threading import Lock
+from time import monotonic
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import eventLog as elog
+import latencyMonitor as lat
+from orderScheduler import PRIORITY_HEDGE
+
+# Tickers
+USD = "USD"
+RITC = "RITC"
+
+FX_BAND_USD = 50000.0     # hedge once the net USD exposure is larger than this
+FX_WINDOW_SECONDS = 1.0   # at most one hedge per window, so exposure nets across packages
+
+
+class FxHedger:
+    def __init__(self, gateway, band_usd=FX_BAND_USD, window_seconds=FX_WINDOW_SECONDS, clock=monotonic):
+        self.gateway = gateway
+        self.clock = clock       # seconds; the backtest swaps in the tick counter
+        self.band_usd = band_usd
+        self.window_seconds = window_seconds
+        self.exposure_usd = 0.0  # + long USD, - short USD
+        self.ritc_mid = None     # USD, updated every tick
+        self.synced = False
+        self.last_hedge = None
+        self.hedges = 0
+        self.lock = Lock()       # fills arrive from the order threads
+
+    def mark(self, ritc_mid):
+        self.ritc_mid = ritc_mid
+
+    def sync(self, positions):
+        """Start from the account's current exposure (USD cash plus RITC at mid)"""
+        with self.lock:
+            self.exposure_usd = positions.get(USD, 0) + positions.get(RITC, 0) * (self.ritc_mid or 0.0)
+        self.synced = True
+
+    def on_fill(self, ticker, action, qty, price=None):
+        """A fill of qty at price (USD for RITC); other tickers leave USD exposure alone"""
+        signed = qty if action == "BUY" else -qty
+        with self.lock:
+            if ticker == USD:
+                self.exposure_usd += signed
+            elif ticker == RITC:
+                mark = self.ritc_mid if self.ritc_mid is not None else price
+                self.exposure_usd += signed * (mark - (price if price is not None else mark))
+
+    def on_convert(self, ticker, action, qty):
+        """Converter leg (EtfConverter on_convert): RITC appears or disappears without any USD moving"""
+        if ticker == RITC and self.ritc_mid is not None:
+            with self.lock:
+                self.exposure_usd += (qty if action == "BUY" else -qty) * self.ritc_mid
+
+    @lat.timed("arb.fx_hedge")
+    def maybe_hedge(self, force=False):
+        """Send the netted exposure to the USD book when it is over the band (or force)"""
+        now = self.clock()
+        if not force and self.last_hedge is not None and now - self.last_hedge < self.window_seconds:
+            return None
+        with self.lock:
+            qty = int(round(abs(self.exposure_usd)))
+            action = "SELL" if self.exposure_usd > 0 else "BUY"
+        if qty == 0 or (not force and qty < self.band_usd):
+            return None
+
+        self.last_hedge = now
+        self.hedges += 1
+        result = self.gateway.submit_package([(USD, action, qty)], priority=PRIORITY_HEDGE)
+        if not result.ok:
+            elog.get_log().warn("fx_hedge_failed", "FX hedge failed: {errors}",
+                                errors=[leg.errors for leg in result.failed_legs])
+        elog.get_log().info("fx_hedge", "FX hedge: {action} {qty} USD in {orders} orders",
+                            action=action, qty=qty, orders=len(result.legs[0].order_ids))
+        return result
@@ -0,0 +1,181 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Market Data Recorder
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Records every book snapshot, edge (edge1, edge2), tender and fill of a
+session as fixed-width NumPy structured records. The hot loop only drops a
+reference onto a queue; a background thread packs the records in batches and
+appends them to flat binary files. Replay memory-maps those files, so a whole
+session loads without copying.
+
+Files in a session directory:
+    books.bin   one row per book level     (BOOK_DTYPE)
+    edges.bin   one row per snapshot       (EDGE_DTYPE)
+    index.bin   one row per snapshot, pointing into books.bin (INDEX_DTYPE)
+    tenders.bin one row per tender seen    (TENDER_DTYPE)
+    fills.bin   one row per fill           (FILL_DTYPE)
+    schema.json dtypes and ticker codes, so old sessions stay readable
+"""
+
+import json
+import os
+from queue import Empty, SimpleQueue
+from threading import Thread
+from time import time_ns
+
+import numpy as np
+
+TICKERS = ("BULL", "BEAR", "RITC", "USD", "CAD")
+TICKER_CODE = {t: i for i, t in enumerate(TICKERS)}
+ACTION_CODE = {"BUY": 0, "SELL": 1}
+BID, ASK = 0, 1
+
+BOOK_DTYPE = np.dtype([("tick", "<i4"), ("ts_ns", "<i8"), ("ticker", "u1"), ("side", "u1"),
+                       ("level", "<u2"), ("price", "<f8"), ("qty", "<f8")])
+EDGE_DTYPE = np.dtype([("tick", "<i4"), ("ts_ns", "<i8"), ("edge1", "<f8"), ("edge2", "<f8"),
+                       ("skew_ms", "<f4")])
+INDEX_DTYPE = np.dtype([("tick", "<i4"), ("ts_ns", "<i8"), ("book_start", "<i8"), ("book_rows", "<i4")])
+TENDER_DTYPE = np.dtype([("tick", "<i4"), ("ts_ns", "<i8"), ("tender_id", "<i4"), ("ticker", "u1"),
+                         ("action", "u1"), ("is_fixed_bid", "u1"), ("quantity", "<f8"), ("price", "<f8"),
+                         ("expires", "<i4")])
+FILL_DTYPE = np.dtype([("tick", "<i4"), ("ts_ns", "<i8"), ("order_id", "<i8"), ("ticker", "u1"),
+                       ("action", "u1"), ("quantity", "<f8"), ("price", "<f8")])
+
+STREAMS = {"books": BOOK_DTYPE, "edges": EDGE_DTYPE, "index": INDEX_DTYPE,
+           "tenders": TENDER_DTYPE, "fills": FILL_DTYPE}
+
+FLUSH_SECONDS = 0.25  # writer wakes at least this often
+
+
+class MarketRecorder:
+    def __init__(self, directory, flush_seconds=FLUSH_SECONDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.queue = SimpleQueue()
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), "ab") for name in STREAMS}
+        self.book_rows = os.path.getsize(os.path.join(directory, "books.bin")) // BOOK_DTYPE.itemsize
+        self.tick = 0
+        with open(os.path.join(directory, "schema.json"), "w") as f:
+            json.dump({"tickers": TICKERS, "actions": list(ACTION_CODE),
+                       "dtypes": {name: dtype.descr for name, dtype in STREAMS.items()}}, f)
+        self.writer = Thread(target=self._write_loop, name="recorder", daemon=True)
+        self.writer.start()
+
+    # --------- HOT PATH (just enqueue) ----------
+    def set_tick(self, tick):
+        self.tick = tick
+
+    def record_snapshot(self, snapshot, edge1, edge2):
+        self.queue.put(("snapshot", self.tick, time_ns(), snapshot, edge1, edge2))
+
+    def record_tenders(self, offers):
+        if offers:
+            self.queue.put(("tenders", self.tick, time_ns(), offers))
+
+    def record_fill(self, ticker, action, qty, price, order_id):
+        """Same signature as the OrderTracker on_fill hook: the new quantity and its price (None: unknown)"""
+        self.queue.put(("fill", self.tick, time_ns(), ticker, action, qty, price, order_id))
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+    # --------- WRITER THREAD ----------
+    def _write_loop(self):
+        running = True
+        while running:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_seconds))
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except Empty:
+                pass
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            if batch:
+                self._write_batch(batch)
+        for f in self.files.values():
+            f.close()
+
+    def _write_batch(self, batch):
+        books, edges, index, tenders, fills = [], [], [], [], []
+        for item in batch:
+            kind, tick, ts = item[0], item[1], item[2]
+            if kind == "snapshot":
+                snapshot, edge1, edge2 = item[3], item[4], item[5]
+                start = self.book_rows + len(books)
+                for ticker, book in snapshot.books.items():
+                    code = TICKER_CODE[ticker]
+                    for side, levels in ((BID, book["bids"]), (ASK, book["asks"])):
+                        for level, lvl in enumerate(levels):
+                            books.append((tick, ts, code, side, level, lvl["price"],
+                                          lvl["quantity"] - lvl.get("quantity_filled", 0)))
+                index.append((tick, ts, start, self.book_rows + len(books) - start))
+                edges.append((tick, ts, edge1, edge2, snapshot.skew_ms))
+            elif kind == "tenders":
+                for o in item[3]:
+                    tenders.append((tick, ts, o["tender_id"], TICKER_CODE.get(o.get("ticker"), 255),
+                                    ACTION_CODE.get(o.get("action"), 255), bool(o.get("is_fixed_bid")),
+                                    o.get("quantity", 0), o.get("price") or np.nan, o.get("expires", 0)))
+            elif kind == "fill":
+                ticker, action, qty, price, order_id = item[3:]
+                fills.append((tick, ts, order_id if order_id is not None else -1, TICKER_CODE[ticker],
+                              ACTION_CODE[action], qty, price if price is not None else np.nan))
+
+        for name, rows in (("books", books), ("edges", edges), ("index", index),
+                           ("tenders", tenders), ("fills", fills)):
+            if rows:
+                self.files[name].write(np.array(rows, dtype=STREAMS[name]).tobytes())
+                self.files[name].flush()
+        self.book_rows += len(books)
+
+
+# --------- REPLAY ----------
+class RecordedSession:
+    """Memory-mapped, read-only view of a recorded session"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        for name, dtype in STREAMS.items():
+            path = os.path.join(directory, f"{name}.bin")
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            rows = size // dtype.itemsize
+            data = np.memmap(path, dtype=dtype, mode="r", shape=(rows,)) if rows else np.empty(0, dtype)
+            setattr(self, name, data)
+
+    def __len__(self):
+        return len(self.index)
+
+    def book_rows(self, i):
+        """Book levels of snapshot i (a view into books.bin)"""
+        entry = self.index[i]
+        return self.books[entry["book_start"]: entry["book_start"] + entry["book_rows"]]
+
+    def side(self, i, ticker, side):
+        """(prices, qty) arrays for one side of one ticker's book in snapshot i"""
+        rows = self.book_rows(i)
+        rows = rows[(rows["ticker"] == TICKER_CODE[ticker]) & (rows["side"] == side)]
+        return rows["price"], rows["qty"]
+
+    def books_at(self, i):
+        """Snapshot i rebuilt in the /securities/book JSON layout"""
+        rows = self.book_rows(i)
+        books = {}
+        for ticker, code in TICKER_CODE.items():
+            mine = rows[rows["ticker"] == code]
+            if not len(mine):
+                continue
+            books[ticker] = {
+                key: [{"price": float(p), "quantity": float(q), "quantity_filled": 0}
+                      for p, q in zip(mine["price"][mine["side"] == side], mine["qty"][mine["side"] == side])]
+                for key, side in (("bids", BID), ("asks", ASK))
+            }
+        return books
+
+
+def load_session(directory):
+    return RecordedSession(directory)
@@ -0,0 +1,114 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Market Snapshot Module
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Fetches the BULL, BEAR, RITC and USD order books at the same time over one
+keep-alive session and freezes them into a single immutable snapshot, so the
+edge is computed from quotes taken at (almost) the same moment.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from time import time_ns
+from types import MappingProxyType
+
+from depthEngine import DepthBook
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import latencyMonitor as lat
+
+API = "http://localhost:9999/v1"
+
+# Tickers
+USD = "USD"    # price of 1 USD in CAD (i.e., USD/CAD)
+BULL = "BULL"  # stock in CAD
+BEAR = "BEAR"  # stock in CAD
+RITC = "RITC"  # ETF quoted in USD
+
+BOOK_TICKERS = (BULL, BEAR, RITC, USD)
+
+BOOK_DEPTH = 50  # levels per side to request (the API returns 20 by default)
+
+# Quotes reported for an empty book side
+EMPTY_BID = 0.0
+EMPTY_ASK = 1e12
+
+# Skip a decision when the books were received further apart than this
+MAX_SNAPSHOT_SKEW_MS = 50.0
+
+# Levels per side that count as "the book changed" for the event loop
+FINGERPRINT_LEVELS = 5
+
+# One worker per book, so all four requests are in flight together
+_pool = ThreadPoolExecutor(max_workers=len(BOOK_TICKERS), thread_name_prefix="book")
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Order books for all arbitrage tickers, fetched together"""
+    books: MappingProxyType       # ticker -> raw /securities/book payload
+    received_ns: MappingProxyType  # ticker -> receive time (time_ns)
+    sent_ns: int                  # when the requests were fired
+
+    def best_bid_ask(self, ticker):
+        """Best bid and ask for a ticker, same conventions as best_bid_ask()"""
+        book = self.books[ticker]
+        bid = float(book["bids"][0]["price"]) if book["bids"] else EMPTY_BID
+        ask = float(book["asks"][0]["price"]) if book["asks"] else EMPTY_ASK
+        return bid, ask
+
+    @cached_property
+    @lat.timed("arb.depth_book")
+    def depth(self):
+        """Cumulative-depth view of the books, built once per snapshot"""
+        return DepthBook(self.books)
+
+    def fingerprint(self, levels=FINGERPRINT_LEVELS):
+        """Hashable summary of the top of every book; equal fingerprints mean nothing worth re-evaluating"""
+        return tuple((lvl["price"], lvl["quantity"] - lvl.get("quantity_filled", 0))
+                     for ticker in sorted(self.books)
+                     for side in ("bids", "asks")
+                     for lvl in self.books[ticker][side][:levels])
+
+    @property
+    def skew_ms(self):
+        """Spread between the first and last book receive times"""
+        times = self.received_ns.values()
+        return (max(times) - min(times)) / 1e6
+
+    @property
+    def latency_ms(self):
+        """Time from sending the requests to receiving the last book"""
+        return (max(self.received_ns.values()) - self.sent_ns) / 1e6
+
+    def is_consistent(self, max_skew_ms=MAX_SNAPSHOT_SKEW_MS):
+        """True when the books are close enough in time to trade on"""
+        return self.skew_ms <= max_skew_ms
+
+
+def one_sided(bid, ask):
+    """True when either quote is the empty-side placeholder"""
+    return bid <= EMPTY_BID or ask >= EMPTY_ASK
+
+
+def _fetch_book(session, ticker):
+    r = session.get(f"{API}/securities/book", params={"ticker": ticker, "limit": BOOK_DEPTH})
+    r.raise_for_status()
+    return r.json(), time_ns()
+
+
+@lat.timed("arb.fetch_snapshot")
+def fetch_snapshot(session, tickers=BOOK_TICKERS):
+    """Request every book in parallel and return one MarketSnapshot"""
+    sent_ns = time_ns()
+    futures = {t: _pool.submit(_fetch_book, session, t) for t in tickers}
+
+    books, received_ns = {}, {}
+    for ticker, future in futures.items():
+        books[ticker], received_ns[ticker] = future.result()
+
+    return MarketSnapshot(MappingProxyType(books), MappingProxyType(received_ns), sent_ns)
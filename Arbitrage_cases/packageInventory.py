@@ -0,0 +1,69 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Package Inventory
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Open arbitrage packages, netted as they are added. A basket_rich package
+(short BULL+BEAR, long RITC) and an etf_rich package (long BULL+BEAR, short
+RITC) of the same size hold no position between them, so a new package first
+cancels the oldest packages of the other direction (FIFO) without any order.
+Only the residual stays open, which means the inventory only ever holds one
+direction and closing it is one sized order per ticker.
+"""
+
+
+def _shrink(package, qty):
+    """Take qty units off a package, towards flat"""
+    sign = 1 if package["ritc_qty"] > 0 else -1
+    package["ritc_qty"] -= sign * qty
+    package["bull_qty"] += sign * qty
+    package["bear_qty"] += sign * qty
+
+
+class PackageInventory:
+    def __init__(self, clock=lambda: 0):
+        self.clock = clock   # stamps package["opened"], so stale packages can be aged out
+        self.packages = []   # oldest first, all one direction after netting
+        self.netted_qty = 0  # units cancelled internally (orders saved: 3 per package closed this way)
+
+    def __len__(self):
+        return len(self.packages)
+
+    def __iter__(self):
+        return iter(list(self.packages))
+
+    def append(self, package):
+        """Add a package, netting it against open packages of the other direction first"""
+        qty = abs(package["ritc_qty"])
+        for other in list(self.packages):
+            if qty == 0:
+                break
+            if other["type"] == package["type"]:
+                continue
+            take = min(qty, abs(other["ritc_qty"]))
+            _shrink(other, take)
+            qty -= take
+            self.netted_qty += take
+            if other["ritc_qty"] == 0:
+                self.packages.remove(other)
+        if qty:
+            _shrink(package, abs(package["ritc_qty"]) - qty)
+            package.setdefault("opened", self.clock())
+            self.packages.append(package)
+        return abs(package["ritc_qty"]) if qty else 0
+
+    def remove(self, package):
+        self.packages.remove(package)
+
+    def reduce(self, packages, qty):
+        """Take qty units off these packages, oldest first, dropping the ones that go flat"""
+        for package in packages:
+            take = min(qty, abs(package["ritc_qty"]))
+            _shrink(package, take)
+            qty -= take
+            if package["ritc_qty"] == 0:
+                self.packages.remove(package)
+
+    def net_ritc(self):
+        """Signed RITC units held across all packages (> 0: long RITC against short BULL+BEAR)"""
+        return sum(p["ritc_qty"] for p in self.packages)
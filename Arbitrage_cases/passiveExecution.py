@@ -0,0 +1,115 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Passive Execution
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Works the RITC leg of an arbitrage package as a limit order at or one tick
+inside the touch, so it earns REBATE_LMT instead of paying FEE_MKT. Every
+snapshot the quotes are checked through the OrderTracker (one batched
+/orders refresh for all of them): fills since the last check are handed to
+on_fill (which hedges BULL+BEAR with market orders), and a quote whose
+price is no longer wanted is cancelled and replaced.
+"""
+
+import os
+import sys
+from dataclasses import dataclass
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import eventLog as elog
+
+API = "http://localhost:9999/v1"
+
+# Tickers
+RITC = "RITC"
+
+TICK = 0.01  # RITC price increment
+
+# Package direction -> RITC side we work passively
+ACTIONS = {"basket_rich": "BUY", "etf_rich": "SELL"}
+
+
+@dataclass
+class WorkingQuote:
+    order_id: int
+    direction: str
+    action: str
+    price: float
+    qty: int
+    filled: int = 0  # fills already handed to on_fill
+
+
+class PassiveQuoter:
+    def __init__(self, session, gateway, tracker, on_fill):
+        self.session = session
+        self.gateway = gateway
+        self.tracker = tracker  # OrderTracker the gateway acknowledges into
+        self.on_fill = on_fill  # (direction, qty, price) for every new RITC fill
+        self.working = {}       # direction -> WorkingQuote
+
+    def quote_price(self, direction, ritc_bid, ritc_ask):
+        """Join or improve the touch by one tick, without stepping over our own quote"""
+        quote = self.working.get(direction)
+        if direction == "basket_rich":
+            if quote is not None and quote.price >= ritc_bid:
+                return quote.price  # we are the best bid already
+            return round(ritc_bid + TICK, 2) if ritc_ask - ritc_bid > TICK * 1.5 else ritc_bid
+        if quote is not None and quote.price <= ritc_ask:
+            return quote.price
+        return round(ritc_ask - TICK, 2) if ritc_ask - ritc_bid > TICK * 1.5 else ritc_ask
+
+    def _poll(self, quote):
+        """Hand new fills of a working quote to on_fill; True while it is still working"""
+        order = self.tracker.get(quote.order_id)
+        if order is None:
+            return False
+        if order.filled > quote.filled:
+            self.on_fill(quote.direction, order.filled - quote.filled, quote.price)
+            quote.filled = order.filled
+        return order.status == "OPEN"
+
+    def _cancel(self, quote):
+        self.session.delete(f"{API}/orders/{quote.order_id}")
+        self.tracker.refresh(quote.order_id)  # catch anything that filled before the cancel landed
+        self._poll(quote)
+        del self.working[quote.direction]
+
+    def update(self, targets):
+        """
+        targets: direction -> (price, qty) to keep working, or None to stand down.
+        Polls every working quote, then cancels/replaces whatever no longer matches.
+        """
+        if self.working:
+            self.tracker.poll(force=True)
+        for direction, target in targets.items():
+            quote = self.working.get(direction)
+            if quote is not None and not self._poll(quote):
+                del self.working[direction]
+                quote = None
+
+            if quote is not None and (target is None or target[0] != quote.price):
+                self._cancel(quote)
+                quote = None
+
+            if quote is None and target is not None and target[1] > 0:
+                self._place(direction, *target)
+
+    def _place(self, direction, price, qty):
+        action = ACTIONS[direction]
+        result = self.gateway.submit_package([(RITC, action, qty)], order_type="LIMIT", price=price)
+        leg = result.legs[0]
+        if not leg.ok or not leg.order_ids:
+            elog.get_log().warn("passive_rejected", "Passive {action} {qty} RITC @ {price} rejected: {errors}",
+                                 action=action, qty=qty, price=price, errors=leg.errors)
+            return
+        quote = WorkingQuote(leg.order_ids[0], direction, action, price, qty)
+        if leg.filled:
+            self.on_fill(direction, leg.filled, price)
+            quote.filled = leg.filled
+        if quote.filled < qty:
+            self.working[direction] = quote
+
+    def cancel_all(self):
+        """Pull every working quote (fills that land before the cancel still reach on_fill)"""
+        for quote in list(self.working.values()):
+            self._cancel(quote)
@@ -0,0 +1,87 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Position Ledger
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Keeps an in-memory copy of our positions, updated from the fills the order
+tracker reports, so the trading loop does not need a /securities GET every
+tick. The ledger reconciles against the server on a slow cadence, or straight
+away when an order was rejected or its fills cannot be booked safely.
+"""
+
+from threading import Lock
+from time import monotonic
+
+API = "http://localhost:9999/v1"
+
+# Tickers
+CAD = "CAD"
+USD = "USD"
+BULL = "BULL"
+BEAR = "BEAR"
+RITC = "RITC"
+
+RECONCILE_SECONDS = 5.0  # full /securities refresh at least this often
+
+
+class PositionLedger:
+    def __init__(self, session, reconcile_seconds=RECONCILE_SECONDS):
+        self.session = session
+        self.reconcile_seconds = reconcile_seconds
+        self.positions = {t: 0 for t in (BULL, BEAR, RITC, USD, CAD)}
+        self.last_reconcile = None  # monotonic time of the last /securities sync
+        self.dirty = True           # force a sync before the first decision
+        self.reconcile_count = 0
+        self.order_syncs = {}       # order_id -> reconcile_count when we last heard of the order
+        self.lock = Lock()          # acks arrive from the order threads
+
+    def apply_fill(self, ticker, action, qty):
+        """Book a fill we know about"""
+        signed = qty if action == "BUY" else -qty
+        with self.lock:
+            self.positions[ticker] = self.positions.get(ticker, 0) + signed
+
+    def track_order(self, order_id):
+        """Remember an acknowledged order against the current /securities sync"""
+        with self.lock:
+            self.order_syncs.setdefault(order_id, self.reconcile_count)
+
+    def apply_order_fill(self, order_id, ticker, action, qty):
+        """
+        Book a fill of one of our orders, unless a /securities sync since we last
+        heard of the order may already hold it: the fill happened somewhere between
+        that look and now, so adding it could count it twice - resync instead.
+        """
+        with self.lock:
+            synced = self.order_syncs.get(order_id)
+            self.order_syncs[order_id] = self.reconcile_count
+            if synced is not None and synced != self.reconcile_count:
+                self.dirty = True
+                return
+        self.apply_fill(ticker, action, qty)
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def needs_reconcile(self):
+        if self.dirty or self.last_reconcile is None:
+            return True
+        return monotonic() - self.last_reconcile >= self.reconcile_seconds
+
+    def reconcile(self):
+        """Replace the ledger with the server's view of positions"""
+        r = self.session.get(f"{API}/securities")
+        r.raise_for_status()
+        with self.lock:
+            for sec in r.json():
+                self.positions[sec["ticker"]] = int(sec.get("position", 0))
+            self.last_reconcile = monotonic()
+            self.dirty = False
+            self.reconcile_count += 1
+
+    def get_positions(self):
+        """Current positions, reconciling first only when it is due"""
+        if self.needs_reconcile():
+            self.reconcile()
+        with self.lock:
+            return dict(self.positions)
@@ -0,0 +1,139 @@
+"""
+RIT Market Simulator Algorithmic ETF Arbitrage Case - Tender Engine
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Scores every active tender offer against the cost of unwinding the block
+right now. A RITC block can be unwound through the RITC book (netting the
+USD proceeds back to CAD) or through the converter into BULL+BEAR (paying
+the USD/CAD leg through the USD book), or any split of the two. All offers,
+split fractions and (for competitive tenders) candidate prices are evaluated
+in one NumPy pass on top of the depthEngine cumulative books.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from etfConverter import CONVERTER_COST_CAD, CONVERTER_SIZE
+
+# Tickers
+USD = "USD"
+BULL = "BULL"
+BEAR = "BEAR"
+RITC = "RITC"
+
+FEE_MKT = 0.02               # $/share (market orders)
+MIN_TENDER_EDGE = 0.02       # CAD/share left over after every unwind cost
+BEYOND_DEPTH_SLIPPAGE = 0.05  # extra $/share assumed past the last visible level
+
+SPLITS = np.linspace(0.0, 1.0, 21)          # fraction of the block unwound through the RITC book
+PRICE_OFFSETS = np.arange(-40, 41) * 0.01   # competitive price grid around the reference (USD)
+
+
+@dataclass
+class TenderDecision:
+    tender_id: int
+    accept: bool
+    price: float           # price to submit (None for fixed bids)
+    pnl_cad: float         # expected unwind P&L of the whole block
+    edge_per_share: float  # pnl_cad / quantity
+    book_qty: int          # shares unwound through the RITC book
+    convert_qty: int       # shares unwound through the converter
+
+
+def _walk(side, qty, worse):
+    """Value of qty against a BookSide, extrapolating past the visible depth (worse=+1 asks, -1 bids)"""
+    qty = np.asarray(qty, dtype=float)
+    if not len(side.prices):
+        return np.full(qty.shape, np.nan)
+    depth = side.depth
+    inside = side.fill_value(np.minimum(qty, depth))
+    beyond = np.maximum(qty - depth, 0.0) * (side.prices[-1] + worse * BEYOND_DEPTH_SLIPPAGE)
+    return inside + beyond
+
+
+def _to_cad(usd, usd_bid, usd_ask):
+    """Net USD amount in CAD at the touch (sell surplus USD at the bid, buy shortfall at the ask)"""
+    return np.where(usd >= 0, usd * usd_bid, usd * usd_ask)
+
+
+def unwind_pnl(depth_book, action, qty, price, fee=FEE_MKT):
+    """
+    P&L in CAD of taking a tender of qty RITC at price (USD), unwound immediately.
+
+    qty and price broadcast; the trailing axis of the result is SPLITS.
+    action is from our side: BUY means we receive RITC and pay price.
+    """
+    qty = np.asarray(qty, dtype=float)[..., None]
+    price = np.asarray(price, dtype=float)[..., None]
+    book_qty = np.round(qty * SPLITS / 100) * 100
+    convert_qty = qty - book_qty
+    usd_bid, usd_ask = depth_book.bids[USD].prices[0], depth_book.asks[USD].prices[0]
+    uses = np.ceil(convert_qty / CONVERTER_SIZE)
+
+    with np.errstate(invalid="ignore"):
+        if action == "BUY":
+            # Part sold into the RITC bids: only the USD difference needs converting
+            book_usd = _walk(depth_book.bids[RITC], book_qty, -1) - book_qty * (price + fee)
+            # Part redeemed and sold as BULL+BEAR, paying for the USD through the USD asks
+            proceeds = _walk(depth_book.bids[BULL], convert_qty, -1) + _walk(depth_book.bids[BEAR], convert_qty, -1)
+            cost = _walk(depth_book.asks[USD], convert_qty * price, +1)
+        else:
+            book_usd = book_qty * (price - fee) - _walk(depth_book.asks[RITC], book_qty, +1)
+            # BULL+BEAR bought and created into RITC, the USD received sold through the USD bids
+            proceeds = _walk(depth_book.bids[USD], convert_qty * price, -1)
+            cost = _walk(depth_book.asks[BULL], convert_qty, +1) + _walk(depth_book.asks[BEAR], convert_qty, +1)
+        convert_cad = proceeds - cost - 2 * fee * convert_qty - uses * CONVERTER_COST_CAD
+        return _to_cad(book_usd, usd_bid, usd_ask) + convert_cad, book_qty, convert_qty
+
+
+def _best_split(pnl, book_qty, convert_qty):
+    """Best split along the trailing axis (NaN treated as unusable)"""
+    i = np.argmax(np.where(np.isnan(pnl), -np.inf, pnl), axis=-1)[..., None]
+    take = lambda a: np.take_along_axis(np.broadcast_to(a, pnl.shape), i, axis=-1)[..., 0]
+    return take(pnl), take(book_qty), take(convert_qty)
+
+
+def evaluate_tenders(offers, depth_book, min_edge=MIN_TENDER_EDGE, fee=FEE_MKT):
+    """
+    One TenderDecision per RITC offer.
+
+    Fixed bids are scored at their price. Competitive tenders with a shown reserve
+    are answered at exactly that price (the client takes nothing worse and we gain
+    nothing by bidding better). Without one, every price on PRICE_OFFSETS around the
+    RITC mid is scored and the one most attractive to the client that still leaves
+    min_edge per share is submitted.
+    """
+    ritc_mid = (depth_book.bids[RITC].prices[0] + depth_book.asks[RITC].prices[0]) / 2
+    decisions = []
+    for action in ("BUY", "SELL"):
+        batch = [o for o in offers if o.get("action") == action and o.get("ticker", RITC) == RITC]
+        if not batch:
+            continue
+        qty = np.array([o["quantity"] for o in batch], dtype=float)
+        ref = np.array([o.get("price") or ritc_mid for o in batch], dtype=float)
+        prices = ref[:, None] + PRICE_OFFSETS[None, :]          # (offers, prices)
+        pnl, book_qty, convert_qty = _best_split(*unwind_pnl(depth_book, action, qty[:, None], prices, fee))
+        edge = pnl / qty[:, None]
+
+        at_ref = np.searchsorted(PRICE_OFFSETS, 0.0)
+        for k, offer in enumerate(batch):
+            j, price = at_ref, None
+            if not offer.get("is_fixed_bid", True):
+                clearing = np.flatnonzero(edge[k] >= min_edge)
+                if offer.get("price") is None and len(clearing):
+                    # Unknown reserve: the highest bid (BUY) or lowest offer (SELL) that still clears
+                    j = clearing[-1] if action == "BUY" else clearing[0]
+                # A shown reserve is the best price the client will take, so submit exactly that
+                price = round(float(prices[k, j]), 2)
+            decisions.append(TenderDecision(
+                tender_id=offer["tender_id"],
+                accept=bool(edge[k, j] >= min_edge),
+                price=price,
+                pnl_cad=float(pnl[k, j]),
+                edge_per_share=float(edge[k, j]),
+                book_qty=int(book_qty[k, j]),
+                convert_qty=int(convert_qty[k, j]),
+            ))
+    return decisions
@@ -0,0 +1,272 @@
+"""
+RIT Market Simulator - Benchmark Suite
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Times the decision loops of both cases against the local stand-in server
+(mockRitServer) with its clock frozen: every cycle advances the market by
+exactly one tick, and every benchmark starts from a fresh market built from
+a fixed scenario (seed, tender and news frequency), so two runs see the same
+prices, tenders, fills and news.
+
+    arb.step_once        Arbitrage_base_script.step_once (snapshot, decision, orders, tenders)
+    arb.trade            ArbitrageTrader.trade on a prefetched snapshot
+    vol.main_iteration   one pass of the Volatility_base_script loop (observe + step)
+    vol.Trading.trade    Trading.trade on an evaluated OptionChain (rows and hedge record)
+    vol.Strategy_2.trade Strategy_2.trade on the same chain
+    vol.Parse.kelly      Parse.kelly for every option of the chain
+
+Only the benchmarked call is timed; fetching its inputs and advancing the
+tick are not. Each row reports cycles/s, p50/p99 latency and REST calls per
+cycle (counted by the server). --save writes a baseline; later runs are
+compared with it and a p50 or p99 more than --tolerance slower, or more REST
+calls per cycle over the same --cycles, is flagged as a REGRESSION (exit
+status 1). Stop the RIT client first, since the stand-in binds the same port.
+
+    python benchmarkSuite.py --save                 # record the baseline
+    python benchmarkSuite.py                        # compare against it
+    python benchmarkSuite.py --only arb --cycles 100 --latency-ms 2
+"""
+
+import argparse
+import json
+import os
+import sys
+from time import perf_counter_ns
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for case_dir in ("Arbitrage_cases", "Volatility_cases"):
+    sys.path.append(os.path.join(HERE, os.pardir, case_dir))
+
+import eventLog as elog
+from mockRitServer import MockRitServer
+
+BASELINE_FILE = os.path.join(HERE, "benchmark_baseline.json")
+CYCLES = 50          # timed cycles per benchmark and scenario
+WARMUP = 5           # untimed cycles first (connections, caches, first-use setup)
+TOLERANCE = 0.25     # relative slowdown of p50/p99 that counts as a regression
+VOL = 0.20           # volatility estimate the volatility benchmarks price with
+
+# Fixed market scenarios (Market keyword arguments)
+SCENARIOS = {
+    "arb_calm": {"case": "arbitrage", "seed": 1},
+    "arb_tenders": {"case": "arbitrage", "seed": 2, "tender_every": 3},
+    "vol_calm": {"case": "volatility", "seed": 1},
+    "vol_news": {"case": "volatility", "seed": 2, "news_every": 5},
+}
+
+
+# --------- BENCHMARKS ----------
+# Each factory returns (prepare, run): prepare() builds the cycle's inputs untimed, run(inputs) is timed.
+
+def bench_arb_step_once(server):
+    import Arbitrage_base_script as ab
+    import arbTrading as arb
+    arb._trader = None
+    ab.recorder = None
+
+    def run(_):
+        ab.step_once()
+    return lambda: None, run
+
+
+def bench_arb_trade(server):
+    import Arbitrage_base_script as ab
+    import arbTrading as arb
+    import marketSnapshot as ms
+    arb._trader = None
+
+    def prepare():
+        snap = ms.fetch_snapshot(ab.s)
+        quotes = [q for t in (ab.BULL, ab.BEAR, ab.RITC, ab.USD) for q in snap.best_bid_ask(t)]
+        return quotes, snap
+
+    def run(inputs):
+        quotes, snap = inputs
+        arb.trader(ab.s, *quotes, snap)
+    return prepare, run
+
+
+def _vol_frames(vb):
+    market = vb.fetch(vb.session)
+    assets2, helper = vb.evaluate(vb.session, market, VOL)
+    return assets2, helper, market
+
+
+def bench_vol_main_iteration(server):
+    import Volatility_base_script as vb
+    vb.last_newsid = 0
+
+    def run(_):
+        _, market = vb.observe(vb.fetch(vb.session))
+        vb.step(vb.session, market, VOL)
+    return lambda: None, run
+
+
+def bench_vol_trading_trade(server):
+    import Trading as tr
+    import Volatility_base_script as vb
+
+    def run(frames):
+        assets2, helper, market = frames
+        tr.trade(vb.session, assets2, helper, VOL, market=market)
+    return lambda: _vol_frames(vb), run
+
+
+def bench_vol_strategy2_trade(server):
+    import Strategy_2 as tr2
+    import Volatility_base_script as vb
+
+    def run(frames):
+        assets2, helper, market = frames
+        tr2.trade(vb.session, assets2, helper, VOL, market=market)
+    return lambda: _vol_frames(vb), run
+
+
+def bench_vol_parse_kelly(server):
+    import Parse
+    import Volatility_base_script as vb
+
+    def run(frames):
+        assets2 = frames[0]
+        etf_price = assets2['last'][0]
+        for i in range(1, len(assets2)):
+            try:
+                Parse.kelly(etf_price, VOL, assets2['last'][i], assets2['ticker'][i],
+                            assets2['delta'][i], assets2['diffcom'][i], 100)
+            except Exception:
+                pass  # no implied volatility for this price; Trading skips such options too
+    return lambda: _vol_frames(vb), run
+
+
+BENCHMARKS = {
+    "arb.step_once": ("arbitrage", bench_arb_step_once),
+    "arb.trade": ("arbitrage", bench_arb_trade),
+    "vol.main_iteration": ("volatility", bench_vol_main_iteration),
+    "vol.Trading.trade": ("volatility", bench_vol_trading_trade),
+    "vol.Strategy_2.trade": ("volatility", bench_vol_strategy2_trade),
+    "vol.Parse.kelly": ("volatility", bench_vol_parse_kelly),
+}
+
+
+# --------- RUNNER ----------
+def _rest_calls(server):
+    with server.market.lock:
+        return sum(server.market.stats.values())
+
+
+def run_one(server, factory, scenario, cycles=CYCLES, warmup=WARMUP, rate_limits=False):
+    params = dict(scenario)
+    server.reset(params.pop("case"), **params)
+    if not rate_limits:
+        # api_orders_per_second 0 = unlimited, so the order scheduler's pacing does not swamp the code's own time
+        for row in server.market.securities.values():
+            row["api_orders_per_second"] = 0
+    if warmup + cycles >= server.market.ticks:
+        raise ValueError(f"{warmup + cycles} cycles do not fit in a {server.market.ticks}-tick case")
+
+    prepare, run = factory(server)
+    samples, calls = [], 0
+    for i in range(warmup + cycles):
+        server.advance()
+        inputs = prepare()
+        before = _rest_calls(server)
+        start = perf_counter_ns()
+        run(inputs)
+        elapsed = perf_counter_ns() - start
+        if i >= warmup:
+            samples.append(elapsed)
+            calls += _rest_calls(server) - before
+
+    ns = np.array(samples, dtype=float)
+    return {
+        "cycles": cycles,
+        "cycles_per_s": cycles / (ns.sum() / 1e9) if ns.sum() else 0.0,
+        "p50_ms": float(np.percentile(ns, 50)) / 1e6,
+        "p99_ms": float(np.percentile(ns, 99)) / 1e6,
+        "rest_calls_per_cycle": calls / cycles,
+    }
+
+
+def run_suite(only=None, cycles=CYCLES, warmup=WARMUP, latency_ms=0.0, rate_limits=False):
+    elog.configure(level=elog.OFF)  # trade events are not part of what is measured
+    server = MockRitServer(tick_rate=0, latency_ms=latency_ms).start()
+    results = {}
+    try:
+        for name, (case, factory) in BENCHMARKS.items():
+            if only and not any(o in name for o in only):
+                continue
+            for scenario_name, scenario in SCENARIOS.items():
+                if scenario["case"] != case:
+                    continue
+                results[f"{name}/{scenario_name}"] = run_one(server, factory, scenario, cycles, warmup, rate_limits)
+    finally:
+        server.stop()
+    return results
+
+
+# --------- BASELINES ----------
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Flag per benchmark: REGRESSION, faster, ok, or new (no baseline)"""
+    flags = {}
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is None:
+            flags[key] = "new"
+        elif (r["p50_ms"] > base["p50_ms"] * (1 + tolerance) or r["p99_ms"] > base["p99_ms"] * (1 + tolerance)
+              # Call counts are exact for a scenario, but only comparable over the same number of cycles
+              or (r["cycles"] == base["cycles"] and r["rest_calls_per_cycle"] > base["rest_calls_per_cycle"] + 1e-9)):
+            flags[key] = "REGRESSION"
+        elif r["p50_ms"] < base["p50_ms"] * (1 - tolerance):
+            flags[key] = "faster"
+        else:
+            flags[key] = "ok"
+    return flags
+
+
+def report(results, baseline, flags):
+    width = max((len(key) for key in results), default=10)
+    print(f"{'benchmark':<{width}} {'cycles/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'REST/cyc':>9}  vs baseline")
+    for key, r in results.items():
+        base = baseline.get(key)
+        delta = f"p50 {r['p50_ms'] / base['p50_ms'] - 1:+.0%}" if base and base["p50_ms"] else ""
+        print(f"{key:<{width}} {r['cycles_per_s']:>9.1f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} "
+              f"{r['rest_calls_per_cycle']:>9.2f}  {flags[key]} {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="run benchmarks whose name contains one of these")
+    parser.add_argument("--cycles", type=int, default=CYCLES)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="server delay per request")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the case's api_orders_per_second")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run_suite(args.only, args.cycles, args.warmup, args.latency_ms, args.rate_limits)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    flags = compare(results, baseline, args.tolerance)
+    report(results, baseline, flags)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "flags": flags}, f, indent=2)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(dict(baseline, **results), f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+    elif "REGRESSION" in flags.values():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
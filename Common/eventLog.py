@@ -0,0 +1,196 @@
+"""
+RIT Market Simulator - Structured Event Log
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Replaces print() on the trading hot path. log.info("kind", "format {x}", x=1)
+only stores (seq, time, level, kind, format, fields) in a slot of a ring
+buffer preallocated at start-up; nothing is formatted and nothing touches
+stdout in the calling thread. A background writer thread drains the ring
+every flush_seconds, appends one JSON object per event to a JSONL file, and
+feeds the console, which is just another consumer: it only shows events at
+or above console_level and at most console_rate lines per second (the rest
+are counted and reported as suppressed).
+
+Levels:
+    TICK  per-tick status and tables (off unless level is lowered to TICK)
+    INFO  trades, closes, tenders, fills
+    WARN  rejects and failures
+    OFF   drop everything
+
+If the writer falls more than `capacity` events behind, the oldest unread
+events are overwritten and counted in `dropped`, so a slow disk or terminal
+can never stall the decision loop.
+"""
+
+import atexit
+import json
+import os
+from itertools import count
+from threading import Event, Thread
+from time import monotonic, time_ns
+
+TICK, INFO, WARN, OFF = 10, 20, 30, 100
+LEVEL_NAMES = {TICK: "TICK", INFO: "INFO", WARN: "WARN"}
+
+CAPACITY = 1 << 16     # ring slots (events buffered between flushes)
+FLUSH_SECONDS = 0.2    # writer wakes this often
+CONSOLE_RATE = 20.0    # console lines per second at most
+
+
+def _jsonable(value):
+    """Fields as JSON: DataFrames and structured arrays become records, NumPy scalars plain numbers"""
+    if hasattr(value, "to_dict"):
+        return value.to_dict(orient="records")
+    names = getattr(getattr(value, "dtype", None), "names", None)
+    if names:
+        rows = value.tolist()
+        return dict(zip(names, rows)) if isinstance(rows, tuple) else [dict(zip(names, row)) for row in rows]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _console_text(value):
+    if hasattr(value, "to_markdown"):
+        return "\n" + value.to_markdown() + "\n"
+    if getattr(getattr(value, "dtype", None), "names", None):
+        from tabulate import tabulate  # what to_markdown uses for DataFrames
+        rows = _jsonable(value)
+        return "\n" + tabulate([rows] if isinstance(rows, dict) else rows, headers="keys", tablefmt="pipe") + "\n"
+    return value
+
+
+class EventLog:
+    def __init__(self, path=None, level=INFO, console_level=INFO, capacity=CAPACITY,
+                 flush_seconds=FLUSH_SECONDS, console_rate=CONSOLE_RATE):
+        """
+        path: JSONL file to append to (None: console only).
+        level: events below it are dropped at the call site.
+        console_level: events below it go to the file only (OFF: no console at all).
+        """
+        self.level = level
+        self.console_level = console_level
+        self.capacity = capacity
+        self.flush_seconds = flush_seconds
+        self.console_rate = console_rate
+        self.slots = [None] * capacity
+        self.seq = count()        # next() is atomic under the GIL, so order-ack threads can log too
+        self.read = 0             # next sequence number the writer expects
+        self.dropped = 0          # overwritten before the writer reached them
+        self.suppressed = 0       # rate-limited off the console
+        self.console_budget = console_rate
+        self.console_refill = monotonic()
+        self.file = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.file = open(path, "a")
+        self.wake = Event()
+        self.stopped = False
+        self.writer = Thread(target=self._write_loop, name="event-log", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    # --------- HOT PATH (one slot store) ----------
+    def enabled(self, level):
+        """Guard for events whose fields are costly to build (copies of tables etc.)"""
+        return level >= self.level
+
+    def log(self, level, kind, msg="", **fields):
+        if level < self.level:
+            return
+        n = next(self.seq)
+        self.slots[n % self.capacity] = (n, time_ns(), level, kind, msg, fields)
+
+    def tick(self, kind, msg="", **fields):
+        self.log(TICK, kind, msg, **fields)
+
+    def info(self, kind, msg="", **fields):
+        self.log(INFO, kind, msg, **fields)
+
+    def warn(self, kind, msg="", **fields):
+        self.log(WARN, kind, msg, **fields)
+
+    def close(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.wake.set()
+        self.writer.join()
+        if self.file is not None:
+            self.file.close()
+
+    # --------- WRITER THREAD ----------
+    def _write_loop(self):
+        while not self.stopped:
+            self.wake.wait(self.flush_seconds)
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        lines = []
+        while True:
+            slot = self.slots[self.read % self.capacity]
+            if slot is None or slot[0] < self.read:
+                break  # not written yet (a logger may hold a sequence number it has not stored)
+            if slot[0] > self.read:
+                # Lapped: skip to the oldest event that can still be in the ring
+                oldest = slot[0] - self.capacity + 1
+                self.dropped += oldest - self.read
+                self.read = oldest
+                continue
+            self.read += 1
+            self._emit(slot, lines)
+
+        if lines and self.file is not None:
+            self.file.write("".join(lines))
+            self.file.flush()
+
+    def _emit(self, slot, lines):
+        _, ts, level, kind, msg, fields = slot
+        try:
+            text = msg.format(**fields) if msg else ""
+        except (KeyError, IndexError, ValueError):
+            text = msg
+        if self.file is not None:
+            record = {"ts_ns": ts, "level": LEVEL_NAMES.get(level, level), "kind": kind, "msg": text}
+            record.update(fields)
+            lines.append(json.dumps(record, default=_jsonable) + "\n")
+        if level >= self.console_level:
+            self._console(kind, text, fields)
+
+    def _console(self, kind, text, fields):
+        now = monotonic()
+        self.console_budget = min(self.console_rate,
+                                  self.console_budget + (now - self.console_refill) * self.console_rate)
+        self.console_refill = now
+        if self.console_budget < 1.0:
+            self.suppressed += 1
+            return
+        self.console_budget -= 1.0
+        if self.suppressed:
+            print(f"[log] {self.suppressed} console lines suppressed")
+            self.suppressed = 0
+        if not text:
+            text = " ".join(f"{k}={_console_text(v)}" for k, v in fields.items())
+        print(f"[{kind}] {text}")
+
+
+_log = None
+
+
+def configure(**kwargs):
+    """Replace the process-wide log (see EventLog for the arguments)"""
+    global _log
+    if _log is not None:
+        _log.close()
+    _log = EventLog(**kwargs)
+    return _log
+
+
+def get_log():
+    """The process-wide log; console only at INFO until configure() is called"""
+    global _log
+    if _log is None:
+        _log = EventLog()
+    return _log
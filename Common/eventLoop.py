@@ -0,0 +1,120 @@
+"""
+RIT Market Simulator - Adaptive Event Loop
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Replaces the fixed sleep(0.5) polling loops of the case scripts. Every cycle
+reads /case once, then asks the strategy for an observation of the market
+(books, securities, news...) and a hashable key summarising it. The strategy
+only runs when the key changes. While the market keeps changing the loop polls
+every min_interval; each quiet cycle stretches the wait by `backoff`, up to
+max_interval, and the first change snaps it back.
+
+The server rate-limits orders only (api_orders_per_second, which the shared
+order scheduler paces); the loop's GETs have no budget to derive a floor
+from. min_interval is just a floor that keeps a fast market from spinning
+the loop flat out, and it is well under one cycle's GET round trips.
+
+    loop = EventLoop(session, observe, on_change)
+    loop.run()
+    print(loop.stats())
+
+A strategy that reads /case together with the rest of its market state passes
+fetch: its result (anything with .tick and .status) replaces the loop's own
+/case read and is handed to observe in place of the tick.
+"""
+
+from time import perf_counter, sleep
+
+import eventLog as elog
+import latencyMonitor as lat
+
+API = "http://localhost:9999/v1"
+
+MIN_INTERVAL = 0.02   # s between cycles while things change (a CPU floor; reads are not rate-limited)
+MAX_INTERVAL = 0.5    # s between cycles on a quiet market (the old fixed sleep)
+BACKOFF = 1.5         # interval multiplier per quiet cycle
+REPORT_SECONDS = 10.0  # heartbeat and latency dump period (0 turns it off)
+
+
+class EventLoop:
+    def __init__(self, session, observe, on_change, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 backoff=BACKOFF, report_seconds=REPORT_SECONDS, fetch=None):
+        """
+        observe(tick) -> (key, observation): poll whatever the strategy watches.
+        on_change(tick, observation): called only when key differs from the last one.
+        fetch() -> state with .tick and .status: optional, read instead of /case; observe(state) then.
+        """
+        self.session = session
+        self.fetch = fetch
+        self.observe = observe
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.report_seconds = report_seconds
+        self.interval = min_interval
+        self.last_key = None
+        self.cycles = 0
+        self.useful_cycles = 0
+        self.busy_seconds = 0.0  # time spent inside on_change
+        self.started = None
+
+    def case_status(self):
+        r = self.session.get(f"{API}/case")
+        r.raise_for_status()
+        case = r.json()
+        return case["tick"], case["status"]
+
+    def run(self, stop=lambda: False):
+        """Run until the case stops or stop() returns True"""
+        self.started = last_report = perf_counter()
+        while not stop():
+            cycle_start = perf_counter()
+            with lat.timer("loop.case"):
+                if self.fetch is not None:
+                    state = self.fetch()
+                    tick, status = state.tick, state.status
+                else:
+                    tick, status = self.case_status()
+                    state = tick
+            if status != "ACTIVE":
+                break
+
+            with lat.timer("loop.observe"):
+                key, observation = self.observe(state)
+            self.cycles += 1
+            if key != self.last_key:
+                self.last_key = key
+                self.useful_cycles += 1
+                with lat.timer("loop.on_change"):
+                    self.on_change(tick, observation)
+                lat.record("loop.cycle", int((perf_counter() - cycle_start) * 1e9))
+                self.busy_seconds += perf_counter() - cycle_start
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+
+            now = perf_counter()
+            if self.report_seconds and now - last_report >= self.report_seconds:
+                last_report = now
+                elog.get_log().info("loop", self.summary(), **self.stats())
+                lat.dump()
+            sleep(max(0.0, self.interval - (now - cycle_start)))
+
+    def stats(self):
+        elapsed = perf_counter() - self.started if self.started else 0.0
+        return {
+            "cycles": self.cycles,
+            "useful_cycles": self.useful_cycles,
+            "elapsed_s": elapsed,
+            "cycles_per_s": self.cycles / elapsed if elapsed else 0.0,
+            "useful_cycles_per_s": self.useful_cycles / elapsed if elapsed else 0.0,
+            "busy_fraction": self.busy_seconds / elapsed if elapsed else 0.0,
+            "interval_ms": self.interval * 1000,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"loop: {s['useful_cycles_per_s']:.1f} useful / {s['cycles_per_s']:.1f} cycles/s, "
+                f"busy {s['busy_fraction']:.0%}, interval {s['interval_ms']:.0f}ms")
@@ -0,0 +1,261 @@
+"""
+RIT Market Simulator - Latency Monitor
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Where each tick's time goes. Stages are timed with perf_counter_ns and fed
+into HDR-style histograms: log-linear buckets with SUB_BUCKETS per power of
+two (about 3% resolution from 1 ns to ~36 minutes) in a fixed list of
+counters, so recording is a bit_length() and one increment. Every REST call
+made through an instrumented session lands in a per-endpoint histogram
+("GET /securities/book", "POST /orders", ids folded into {id}).
+
+    import latencyMonitor as lat
+    lat.instrument_session(session)
+
+    with lat.timer("arb.size"):
+        ...
+
+    t = perf_counter_ns()
+    ...
+    t = lat.lap("vol.news", t)       # one histogram per section of a long function
+
+    @lat.timed("vol.place_order")
+    def place_order(...): ...
+
+    lat.dump()                 # summary table to the event log (the EventLoop heartbeat calls it)
+    lat.export("latency.json") # percentiles plus raw buckets, for scripts and notebooks
+"""
+
+import json
+import os
+import re
+from functools import wraps
+from threading import Lock
+from time import perf_counter_ns, time_ns
+from urllib.parse import urlsplit
+
+import eventLog as elog
+
+ENABLED = True       # False turns every timer into a no-op
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS   # buckets per power of two
+MAX_SHIFT = 35                # values above ~2^41 ns land in the last bucket
+N_BUCKETS = 2 * SUB_BUCKETS + MAX_SHIFT * SUB_BUCKETS
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def bucket_index(ns):
+    """Exact below 2*SUB_BUCKETS ns, then SUB_BUCKETS log-spaced buckets per power of two"""
+    if ns < 2 * SUB_BUCKETS:
+        return max(ns, 0)
+    shift = ns.bit_length() - SUB_BITS - 1
+    return min(shift * SUB_BUCKETS + (ns >> shift), N_BUCKETS - 1)
+
+
+def bucket_bounds(index):
+    """[low, high) in ns covered by a bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index + 1
+    shift = (index - 2 * SUB_BUCKETS) // SUB_BUCKETS + 1
+    low = ((index - 2 * SUB_BUCKETS) % SUB_BUCKETS + SUB_BUCKETS) << shift
+    return low, low + (1 << shift)
+
+
+class Histogram:
+    # No lock: a record racing another thread's can, very rarely, lose one count. These are
+    # diagnostics, and a lock would double the cost of every timer.
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, ns):
+        if ns < 2 * SUB_BUCKETS:
+            i = max(ns, 0)
+        else:
+            shift = ns.bit_length() - SUB_BITS - 1
+            i = min(shift * SUB_BUCKETS + (ns >> shift), N_BUCKETS - 1)  # bucket_index(), inlined
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ns
+        if self.max < ns:
+            self.max = ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+
+    def percentile(self, q):
+        """Value (ns) at or below which q% of the samples fall, to bucket resolution"""
+        if not self.count:
+            return 0
+        target = max(1, -(-self.count * q // 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                low, high = bucket_bounds(i)
+                return min(max((low + high - 1) // 2, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        out = {"count": self.count,
+               "mean_us": self.total / self.count / 1e3 if self.count else 0.0,
+               "min_us": (self.min or 0) / 1e3,
+               "max_us": self.max / 1e3}
+        for q in PERCENTILES:
+            out[f"p{q:g}_us"] = self.percentile(q) / 1e3
+        return out
+
+    def buckets(self):
+        """Non-empty buckets as (low_ns, high_ns, count)"""
+        return [(*bucket_bounds(i), n) for i, n in enumerate(self.counts) if n]
+
+
+class _Timer:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(perf_counter_ns() - self.start)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class LatencyRegistry:
+    def __init__(self, export_path=None):
+        self.histograms = {}
+        self.export_path = export_path  # dump() also rewrites this file when set
+        self.lock = Lock()
+
+    def histogram(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self.lock:
+                hist = self.histograms.setdefault(name, Histogram())
+        return hist
+
+    def record(self, name, ns):
+        if ENABLED:
+            self.histogram(name).record(ns)
+
+    def lap(self, name, start):
+        """Record the time since start (perf_counter_ns) and return now, for timing a function section by section"""
+        now = perf_counter_ns()
+        if ENABLED:
+            self.histogram(name).record(now - start)
+        return now
+
+    def timer(self, name):
+        return _Timer(self.histogram(name)) if ENABLED else _NULL_TIMER
+
+    def timed(self, name):
+        """Decorator: time every call of the function under `name`"""
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return fn(*args, **kwargs)
+                start = perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.histogram(name).record(perf_counter_ns() - start)
+            return wrapper
+        return decorate
+
+    def instrument_session(self, session):
+        """Time every request made through session, per endpoint"""
+        if getattr(session, "_latency_instrumented", False):
+            return session
+        send = session.request
+
+        def request(method, url, *args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return send(method, url, *args, **kwargs)
+            finally:
+                self.record(f"{method.upper()} {_ID.sub('/{id}', urlsplit(url).path.replace('/v1', '', 1))}",
+                            perf_counter_ns() - start)
+
+        session.request = request
+        session._latency_instrumented = True
+        return session
+
+    def summary(self):
+        return {name: hist.summary() for name, hist in sorted(self.histograms.items())}
+
+    def table(self):
+        rows = self.summary()
+        width = max((len(name) for name in rows), default=5)
+        lines = [f"{'stage':<{width}} {'count':>8} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (us)"]
+        for name, s in rows.items():
+            lines.append(f"{name:<{width}} {s['count']:>8} {s['mean_us']:>9.1f} {s['p50_us']:>9.1f} "
+                         f"{s['p90_us']:>9.1f} {s['p99_us']:>9.1f} {s['max_us']:>9.1f}")
+        return "\n".join(lines)
+
+    def dump(self):
+        """Summary table to the event log (plus the export file, if one is configured)"""
+        if not self.histograms:
+            return
+        elog.get_log().info("latency", "\n" + self.table().replace("{", "{{").replace("}", "}}"))
+        if self.export_path:
+            self.export(self.export_path)
+
+    def export(self, path):
+        data = {"generated_ns": time_ns(),
+                "stages": {name: dict(hist.summary(), buckets=hist.buckets())
+                           for name, hist in sorted(self.histograms.items())}}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+
+# One registry per process, shared by every module that times something
+_registry = LatencyRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def configure(export_path=None):
+    _registry.export_path = export_path
+    return _registry
+
+
+timer = _registry.timer
+timed = _registry.timed
+record = _registry.record
+lap = _registry.lap
+instrument_session = _registry.instrument_session
+dump = _registry.dump
+export = _registry.export
@@ -0,0 +1,136 @@
+"""
+RIT Market Simulator - Liquidation Engine
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Flattens the whole book with market orders. Positions, order sizes and rate
+limits all come from one GET /securities: every tradeable position is cut
+into slices of that ticker's own max_trade_size, and the slices of all
+tickers are queued on the shared OrderScheduler at once, so they go out in
+parallel as fast as each ticker's api_orders_per_second allows.
+
+Currencies go second. Trading a security moves the cash of the currency it
+is quoted in (selling RITC adds USD), so the currency orders are sized from
+the first read plus what the acknowledged fills moved, not from a second
+read. One final GET /securities confirms the book is flat; whatever is left
+gets another pass, up to max_passes.
+
+    import liquidationEngine as liq
+    residual = liq.LiquidationEngine(session).liquidate()   # {} when flat
+"""
+
+from functools import partial
+from time import perf_counter_ns
+
+import eventLog as elog
+import latencyMonitor as lat
+import orderScheduler as osch
+
+API = "http://localhost:9999/v1"
+
+MAX_PASSES = 2     # liquidation rounds before giving up on a residual
+MIN_QTY = 1        # positions smaller than this count as flat (cash balances are fractional)
+
+
+def slices(qty, max_size):
+    """Split a quantity into child orders no larger than max_size"""
+    out = [max_size] * (qty // max_size)
+    if qty % max_size:
+        out.append(qty % max_size)
+    return out
+
+
+def plan_orders(rows, adjust=None):
+    """(ticker, action, [slice quantities]) that flatten every tradeable position of a /securities payload"""
+    adjust = adjust or {}
+    orders = []
+    for row in rows:
+        if not row.get("is_tradeable", True):
+            continue
+        position = row.get("position", 0) + adjust.get(row["ticker"], 0)
+        qty = int(round(abs(position)))
+        if qty < MIN_QTY:
+            continue
+        max_size = int(row.get("max_trade_size") or qty)
+        orders.append((row["ticker"], "SELL" if position > 0 else "BUY", slices(qty, max_size)))
+    return orders
+
+
+class LiquidationEngine:
+    def __init__(self, session, scheduler=None, priority=osch.PRIORITY_CLOSE, max_passes=MAX_PASSES):
+        self.session = session
+        self.scheduler = scheduler or osch.get_scheduler(session)
+        self.priority = priority
+        self.max_passes = max_passes
+
+    def securities(self):
+        r = self.session.get(f"{API}/securities")
+        r.raise_for_status()
+        return r.json()
+
+    def _send(self, ticker, action, qty):
+        return self.session.post(f"{API}/orders", params={"ticker": ticker, "type": "MARKET",
+                                                          "quantity": qty, "action": action})
+
+    def submit(self, orders):
+        """Queue every slice of every ticker at once; returns [(ticker, action, qty, response or None)]"""
+        pending = [(ticker, action, qty, self.scheduler.submit(ticker, partial(self._send, ticker, action, qty),
+                                                               self.priority))
+                   for ticker, action, sizes in orders for qty in sizes]
+        results = []
+        for ticker, action, qty, future in pending:
+            try:
+                response = future.result()
+            except Exception as e:
+                elog.get_log().warn("liquidation_error", "{action} {qty} {ticker} failed: {error}",
+                                    ticker=ticker, action=action, qty=qty, error=str(e))
+                response = None
+            else:
+                if not response.ok:
+                    elog.get_log().warn("liquidation_error", "{action} {qty} {ticker} rejected: {error}",
+                                        ticker=ticker, action=action, qty=qty, error=response.text)
+            results.append((ticker, action, qty, response))
+        return results
+
+    @staticmethod
+    def cash_moves(results, by_ticker):
+        """Change in each currency position implied by the acknowledged fills (notional and fees)"""
+        moves = {}
+        for ticker, action, qty, response in results:
+            if response is None or not response.ok:
+                continue
+            order = response.json()
+            filled, vwap = int(order.get("quantity_filled") or 0), order.get("vwap")
+            row = by_ticker[ticker]
+            currency = row.get("currency")
+            if not filled or vwap is None or currency == ticker or currency not in by_ticker:
+                continue
+            notional = filled * vwap * row.get("size", 1)
+            fee = filled * row.get("trading_fee", 0.0)
+            moves[currency] = moves.get(currency, 0.0) + (notional if action == "SELL" else -notional) - fee
+        return moves
+
+    @lat.timed("liquidation.run")
+    def liquidate(self):
+        """Flatten every tradeable position; returns {ticker: position} still open after the last check"""
+        start = perf_counter_ns()
+        rows = self.securities()
+        self.scheduler.load_limits(rows)  # same payload, no separate limits read
+        residual, sent = {}, 0
+        for n in range(1, self.max_passes + 1):
+            by_ticker = {row["ticker"]: row for row in rows}
+            results = self.submit(plan_orders([r for r in rows if r.get("type") != "CURRENCY"]))
+            moves = self.cash_moves(results, by_ticker)
+            results += self.submit(plan_orders([r for r in rows if r.get("type") == "CURRENCY"], moves))
+            sent += len(results)
+
+            rows = self.securities()  # the final check
+            residual = {row["ticker"]: row["position"] for row in rows
+                        if row.get("is_tradeable", True) and abs(row.get("position", 0)) >= MIN_QTY}
+            if not residual:
+                break
+            elog.get_log().warn("liquidation_residual", "Pass {n}: still open {residual}", n=n, residual=residual)
+
+        elog.get_log().info("liquidation", "Liquidated in {orders} orders, {ms:.0f} ms; residual {residual}",
+                            orders=sent, ms=(perf_counter_ns() - start) / 1e6, residual=residual)
+        return residual
@@ -0,0 +1,653 @@
+"""
+RIT Market Simulator - Local REST Stand-in Server
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+A small offline replacement for the RIT client's REST API, so the case
+scripts can be profiled, load-tested and regression-tested without the
+trading lab. It implements the endpoints the scripts use:
+
+    GET  /v1/case
+    GET  /v1/securities                  (?ticker=)
+    GET  /v1/securities/book             ?ticker= [&limit=]
+    GET  /v1/orders                      (?status=OPEN|TRANSACTED|CANCELLED)
+    POST /v1/orders                      ?ticker=&type=&quantity=&action= [&price=]
+    GET  /v1/orders/<id>
+    DELETE /v1/orders/<id>
+    GET  /v1/tenders
+    POST /v1/tenders/<id>                (?price=)
+    DELETE /v1/tenders/<id>
+    GET  /v1/news                        (?since=)
+    GET  /v1/assets
+    GET  /v1/leases
+    POST /v1/leases                      ?ticker=ETF-Creation|ETF-Redemption
+    POST /v1/leases/<id>                 ?from1=&quantity1= [&from2=&quantity2=]
+    DELETE /v1/leases/<id>
+
+Two cases are built in: "arbitrage" (CAD, USD, BULL, BEAR, RITC) and
+"volatility" (RTM plus RTM45C..RTM54P options). Prices are synthetic and
+seeded, or replayed from a CSV of tick,ticker,price rows. Market orders walk
+the book and pay trading_fee, resting limit orders earn limit_order_rebate
+when a later book crosses them. Ticks advance with wall time at --tick-rate
+ticks per second, and every response can be delayed with --latency-ms.
+A tick rate of 0 freezes the clock; advance() then moves it, one call per
+cycle, which is how benchmarkSuite.py gets the same market on every run.
+
+Run the arbitrage case ten times faster than real time:
+
+    python mockRitServer.py --case arbitrage --tick-rate 10
+
+then start Arbitrage_base_script.py (or Volatility_base_script.py with
+--case volatility) as usual. The scripts need no changes.
+"""
+
+import argparse
+import csv
+import json
+import math
+import random
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+from urllib.parse import parse_qs, urlparse
+
+PORT = 9999
+TICKS_PER_PERIOD = 300
+BOOK_LEVELS = 50
+
+# --------- CASE DEFINITIONS ----------
+# Fields every /securities row carries; the volatility script drops most of them by name
+_SECURITY_DEFAULTS = {
+    "type": "STOCK", "size": 1, "position": 0, "vwap": 0.0, "nlv": 0.0, "last": 0.0, "bid": 0.0, "bid_size": 0,
+    "ask": 0.0, "ask_size": 0, "volume": 0, "realized": 0.0, "unrealized": 0.0, "currency": "CAD",
+    "total_volume": 0, "limits": [], "is_tradeable": True, "is_shortable": True, "interest_rate": 0.0,
+    "start_period": 1, "stop_period": 1, "unit_multiplier": 1, "description": "", "display_unit": "",
+    "min_price": 0.0, "max_price": 0.0, "start_price": 0.0, "quoted_decimals": 2, "trading_fee": 0.0,
+    "limit_order_rebate": 0.0, "min_trade_size": 1, "max_trade_size": 10000, "required_tickers": None,
+    "underlying_tickers": None, "bond_coupon": 0.0, "interest_payments_per_period": 0, "base_security": "",
+    "fixing_ticker": None, "api_orders_per_second": 10, "execution_delay_ms": 0, "interest_rate_ticker": None,
+    "otc_price_range": 0.0,
+}
+
+
+def arbitrage_case():
+    equity = {"trading_fee": 0.02, "limit_order_rebate": 0.01, "max_trade_size": 10000}
+    fx = {"type": "CURRENCY", "trading_fee": 0.0, "limit_order_rebate": 0.0, "max_trade_size": 2500000,
+          "quoted_decimals": 4}
+    return [
+        dict(_SECURITY_DEFAULTS, ticker="CAD", start_price=1.0, is_tradeable=False, **fx),
+        dict(_SECURITY_DEFAULTS, ticker="USD", start_price=1.0, **fx),
+        dict(_SECURITY_DEFAULTS, ticker="BULL", start_price=10.0, **equity),
+        dict(_SECURITY_DEFAULTS, ticker="BEAR", start_price=15.0, **equity),
+        dict(_SECURITY_DEFAULTS, ticker="RITC", start_price=25.0, currency="USD", **equity),
+    ]
+
+
+def volatility_case():
+    rows = [dict(_SECURITY_DEFAULTS, ticker="RTM", start_price=50.0, trading_fee=0.01, max_trade_size=10000)]
+    for strike in range(45, 55):
+        for flag in ("C", "P"):
+            rows.append(dict(_SECURITY_DEFAULTS, ticker=f"RTM{strike}{flag}", type="OPTION", size=100,
+                             unit_multiplier=100, start_price=0.0, trading_fee=1.0, max_trade_size=100,
+                             underlying_tickers=["RTM"]))
+    return rows
+
+
+CASES = {"arbitrage": arbitrage_case, "volatility": volatility_case}
+
+# Converters of the arbitrage case: 1 RITC <-> 1 BULL + 1 BEAR, a flat CAD cost per use
+CONVERTER_SIZE = 10000
+CONVERTER_COST = 1500.0
+ASSETS = {
+    "ETF-Creation": {"convert_from": ("BULL", "BEAR"), "convert_to": ("RITC",)},
+    "ETF-Redemption": {"convert_from": ("RITC",), "convert_to": ("BULL", "BEAR")},
+}
+
+
+def _norm_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def bs_price(flag, s, k, t, sigma):
+    if t <= 0 or sigma <= 0:
+        return max(0.0, s - k) if flag == "C" else max(0.0, k - s)
+    d1 = (math.log(s / k) + 0.5 * sigma * sigma * t) / (sigma * math.sqrt(t))
+    d2 = d1 - sigma * math.sqrt(t)
+    if flag == "C":
+        return s * _norm_cdf(d1) - k * _norm_cdf(d2)
+    return k * _norm_cdf(-d2) - s * _norm_cdf(-d1)
+
+
+class ApiError(Exception):
+    def __init__(self, status, code, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body = dict(code=code, message=message, **extra)
+
+
+# --------- MARKET STATE ----------
+class Market:
+    """All simulated state; every public method must be called with self.lock held"""
+
+    def __init__(self, case="arbitrage", ticks=TICKS_PER_PERIOD, seed=0, replay=None, book_levels=BOOK_LEVELS,
+                 tender_every=30, news_every=37, enforce_rate_limit=False):
+        self.case = case
+        self.ticks = ticks
+        self.rng = random.Random(seed)
+        self.book_levels = book_levels
+        self.tender_every = tender_every
+        self.news_every = news_every
+        self.enforce_rate_limit = enforce_rate_limit
+        self.lock = threading.RLock()
+
+        self.securities = {row["ticker"]: row for row in CASES[case]()}
+        self.mid = {t: row["start_price"] for t, row in self.securities.items()}
+        self.books = {}
+        self.orders = {}
+        self.open_orders = {}
+        self.tenders = {}
+        self.leases = {}
+        self.news = []
+        self.next_order_id = 1
+        self.next_tender_id = 1
+        self.next_lease_id = 1
+        self.order_times = defaultdict(deque)  # ticker -> recent POST times (rate limit)
+        self.stats = defaultdict(int)          # endpoint -> request count
+
+        self.replay = self._load_replay(replay) if replay else None
+        self.tick = 0
+        self.true_vol = 0.20
+        self.arb_deviation = 0.0
+        if case == "volatility":
+            self._price_options()
+            self._publish_news(f"The realized volatility of RTM for the coming weeks is expected to be "
+                               f"{round(self.true_vol * 100)}%")
+        self._rebuild_books()
+
+    @staticmethod
+    def _load_replay(path):
+        prices = defaultdict(dict)
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                prices[int(row["tick"])][row["ticker"]] = float(row["price"])
+        return prices
+
+    # --------- CLOCK ----------
+    @property
+    def status(self):
+        return "ACTIVE" if self.tick < self.ticks else "STOPPED"
+
+    def advance_to(self, tick):
+        while self.tick < min(tick, self.ticks):
+            self.tick += 1
+            self._step()
+
+    def _step(self):
+        if self.replay is not None:
+            self.mid.update(self.replay.get(self.tick, {}))
+        elif self.case == "arbitrage":
+            self._step_arbitrage()
+        else:
+            self._step_volatility()
+            self._price_options()
+        self._rebuild_books()
+        self._match_resting_orders()
+        self._expire_tenders()
+        if self.case == "arbitrage" and self.tender_every and self.tick % self.tender_every == 0:
+            self._new_tender()
+        if self.case == "volatility" and self.news_every and self.tick % self.news_every == 0:
+            self.true_vol = self.rng.choice((0.15, 0.20, 0.25, 0.30, 0.35))
+            self._publish_news(f"Analysts now estimate RTM annualized volatility at {round(self.true_vol * 100)}%")
+
+    def _step_arbitrage(self):
+        g = self.rng.gauss
+        self.mid["BULL"] *= math.exp(0.003 * g(0, 1))
+        self.mid["BEAR"] *= math.exp(0.003 * g(0, 1))
+        self.mid["USD"] = max(0.5, self.mid["USD"] * math.exp(0.0005 * g(0, 1)))
+        # RITC trades around the basket with a mean-reverting mispricing
+        self.arb_deviation += -0.15 * self.arb_deviation + 0.004 * g(0, 1)
+        fair = (self.mid["BULL"] + self.mid["BEAR"]) / self.mid["USD"]
+        self.mid["RITC"] = fair * (1.0 + self.arb_deviation)
+
+    def _step_volatility(self):
+        dt = 1.0 / 3600  # the volatility scripts price with time_to_expiry(tick) = (300 - tick) / 3600
+        self.mid["RTM"] *= math.exp(-0.5 * self.true_vol ** 2 * dt + self.true_vol * math.sqrt(dt) * self.rng.gauss(0, 1))
+
+    def _price_options(self):
+        s, t = self.mid["RTM"], max(self.ticks - self.tick, 0) / 3600
+        for ticker, row in self.securities.items():
+            if row["type"] == "OPTION":
+                strike, flag = float(ticker[3:5]), ticker[5]
+                quoted_vol = max(0.05, self.true_vol + self.rng.gauss(0, 0.02))
+                self.mid[ticker] = max(0.01, bs_price(flag, s, strike, t, quoted_vol))
+
+    # --------- BOOKS ----------
+    def _tick_size(self, ticker):
+        return 10 ** -self.securities[ticker]["quoted_decimals"]
+
+    def _rebuild_books(self):
+        for ticker, row in self.securities.items():
+            if not row["is_tradeable"]:
+                self.books[ticker] = {"bids": [], "asks": []}
+                continue
+            step = self._tick_size(ticker)
+            mid = self.mid[ticker]
+            half = max(step, round(mid * 0.0005 / step) * step)
+            base = 1000000 if row["type"] == "CURRENCY" else (50 if row["type"] == "OPTION" else 2000)
+            bids, asks = [], []
+            for i in range(self.book_levels):
+                bid = round(mid - half - i * step, row["quoted_decimals"])
+                ask = round(mid + half + i * step, row["quoted_decimals"])
+                if bid > 0:
+                    bids.append([bid, self.rng.randint(base // 2, base * 2)])
+                asks.append([ask, self.rng.randint(base // 2, base * 2)])
+            self.books[ticker] = {"bids": bids, "asks": asks}
+            row["last"] = round(mid, row["quoted_decimals"])
+
+    def book(self, ticker, limit=20):
+        if ticker not in self.books:
+            raise ApiError(404, "NOT_FOUND", f"Unknown ticker {ticker}")
+        book = self.books[ticker]
+        fmt = lambda side, action: [
+            {"order_id": 0, "period": 1, "tick": self.tick, "trader_id": "ANON", "ticker": ticker, "type": "LIMIT",
+             "quantity": qty, "action": action, "price": price, "quantity_filled": 0, "vwap": None, "status": "OPEN"}
+            for price, qty in side[:limit]]
+        return {"bids": fmt(book["bids"], "BUY"), "asks": fmt(book["asks"], "SELL")}
+
+    # --------- POSITIONS & CASH ----------
+    def _book_fill(self, ticker, action, qty, price, fee_per_unit):
+        row = self.securities[ticker]
+        signed = qty if action == "BUY" else -qty
+        notional = qty * price * row["size"]
+        fee = qty * fee_per_unit
+        row["position"] += signed
+        row["volume"] += qty
+        row["total_volume"] += qty
+        row["realized"] -= fee
+        cash = self.securities.get(row["currency"])
+        if cash is not None and cash is not row:
+            cash["position"] += -notional if action == "BUY" else notional
+            cash["position"] -= fee
+
+    def _walk_book(self, ticker, action, qty, limit_price=None):
+        """Take liquidity from the opposite side; returns (filled, vwap)"""
+        side = self.books[ticker]["asks" if action == "BUY" else "bids"]
+        filled, notional = 0, 0.0
+        while side and filled < qty:
+            price, avail = side[0]
+            if limit_price is not None and (price > limit_price if action == "BUY" else price < limit_price):
+                break
+            take = min(avail, qty - filled)
+            filled += take
+            notional += take * price
+            if take == avail:
+                side.pop(0)
+            else:
+                side[0][1] -= take
+        return filled, (notional / filled if filled else None)
+
+    def securities_payload(self, ticker=None):
+        rows = [self.securities[ticker]] if ticker else list(self.securities.values())
+        out = []
+        for row in rows:
+            book = self.books.get(row["ticker"], {"bids": [], "asks": []})
+            row["bid"] = book["bids"][0][0] if book["bids"] else 0.0
+            row["bid_size"] = book["bids"][0][1] if book["bids"] else 0
+            row["ask"] = book["asks"][0][0] if book["asks"] else 0.0
+            row["ask_size"] = book["asks"][0][1] if book["asks"] else 0
+            row["unrealized"] = 0.0
+            out.append(dict(row))
+        return out
+
+    # --------- ORDERS ----------
+    def _check_rate(self, ticker, now):
+        limit = self.securities[ticker]["api_orders_per_second"]
+        times = self.order_times[ticker]
+        while times and now - times[0] >= 1.0:
+            times.popleft()
+        if self.enforce_rate_limit and limit and len(times) >= limit:
+            wait = 1.0 - (now - times[0])
+            raise ApiError(429, "TOO_MANY_REQUESTS", f"API request limit for {ticker} exceeded", wait=wait)
+        times.append(now)
+
+    def place_order(self, ticker, type, quantity, action, price=None, now=None):
+        row = self.securities.get(ticker)
+        if row is None or not row["is_tradeable"]:
+            raise ApiError(400, "INVALID_TICKER", f"{ticker} is not tradeable")
+        if self.status != "ACTIVE":
+            raise ApiError(400, "CASE_STOPPED", "The case is not running")
+        try:
+            quantity = float(quantity)
+        except (TypeError, ValueError):
+            raise ApiError(400, "INVALID_QUANTITY", "Quantity must be a number")
+        if quantity != int(quantity) or quantity <= 0:
+            raise ApiError(400, "INVALID_QUANTITY", "Quantity must be a positive whole number")
+        quantity = int(quantity)
+        if quantity > row["max_trade_size"]:
+            raise ApiError(400, "INVALID_QUANTITY", f"Quantity exceeds max_trade_size {row['max_trade_size']}")
+        if action not in ("BUY", "SELL") or type not in ("MARKET", "LIMIT"):
+            raise ApiError(400, "INVALID_ORDER", "Bad action or order type")
+        if type == "LIMIT" and price is None:
+            raise ApiError(400, "INVALID_PRICE", "Limit orders need a price")
+        self._check_rate(ticker, monotonic() if now is None else now)
+
+        order = {"order_id": self.next_order_id, "period": 1, "tick": self.tick, "trader_id": "MOCK",
+                 "ticker": ticker, "type": type, "quantity": quantity, "action": action,
+                 "price": None if price is None else float(price), "quantity_filled": 0, "vwap": None,
+                 "status": "OPEN"}
+        self.next_order_id += 1
+        self.orders[order["order_id"]] = order
+
+        filled, vwap = self._walk_book(ticker, action, quantity, order["price"] if type == "LIMIT" else None)
+        if filled:
+            self._book_fill(ticker, action, filled, vwap, row["trading_fee"])
+            order["quantity_filled"], order["vwap"] = filled, vwap
+        if type == "MARKET" or filled == quantity:
+            order["status"] = "TRANSACTED"
+        else:
+            self.open_orders[order["order_id"]] = order
+        return dict(order)
+
+    def _match_resting_orders(self):
+        """Resting limit orders fill (and earn the rebate) when the new book trades through them"""
+        for order_id, order in list(self.open_orders.items()):
+            book = self.books[order["ticker"]]
+            side = book["asks"] if order["action"] == "BUY" else book["bids"]
+            if not side:
+                continue
+            touch = side[0][0]
+            crosses = touch <= order["price"] if order["action"] == "BUY" else touch >= order["price"]
+            if not crosses:
+                continue
+            remaining = order["quantity"] - order["quantity_filled"]
+            fill = min(remaining, side[0][1])
+            row = self.securities[order["ticker"]]
+            self._book_fill(order["ticker"], order["action"], fill, order["price"], -row["limit_order_rebate"])
+            prev = order["quantity_filled"]
+            order["vwap"] = ((order["vwap"] or 0.0) * prev + order["price"] * fill) / (prev + fill)
+            order["quantity_filled"] = prev + fill
+            if order["quantity_filled"] == order["quantity"]:
+                order["status"] = "TRANSACTED"
+                del self.open_orders[order_id]
+
+    def cancel_order(self, order_id):
+        order = self.open_orders.pop(order_id, None)
+        if order is None:
+            raise ApiError(404, "NOT_FOUND", f"No open order {order_id}")
+        order["status"] = "CANCELLED"
+        return {"success": True}
+
+    def get_order(self, order_id):
+        if order_id not in self.orders:
+            raise ApiError(404, "NOT_FOUND", f"No order {order_id}")
+        return dict(self.orders[order_id])
+
+    def list_orders(self, status="OPEN"):
+        return [dict(o) for o in self.orders.values() if o["status"] == status]
+
+    # --------- TENDERS & NEWS ----------
+    def _new_tender(self):
+        action = self.rng.choice(("BUY", "SELL"))
+        quantity = self.rng.choice((10000, 20000, 50000, 100000))
+        premium = self.rng.uniform(0.0, 0.004) * self.mid["RITC"]
+        price = self.mid["RITC"] - premium if action == "BUY" else self.mid["RITC"] + premium
+        tender = {"tender_id": self.next_tender_id, "period": 1, "tick": self.tick, "expires": self.tick + 15,
+                  "caption": f"A client wants to {'sell' if action == 'BUY' else 'buy'} {quantity} RITC",
+                  "quantity": quantity, "action": action, "is_fixed_bid": self.rng.random() < 0.5,
+                  "price": round(price, 2), "ticker": "RITC"}
+        self.tenders[tender["tender_id"]] = tender
+        self.next_tender_id += 1
+
+    def _expire_tenders(self):
+        for tender_id in [i for i, t in self.tenders.items() if t["expires"] <= self.tick]:
+            del self.tenders[tender_id]
+
+    def accept_tender(self, tender_id, price=None):
+        tender = self.tenders.pop(tender_id, None)
+        if tender is None:
+            raise ApiError(404, "NOT_FOUND", f"No active tender {tender_id}")
+        fill_price = tender["price"] if tender["is_fixed_bid"] or price is None else float(price)
+        if not tender["is_fixed_bid"] and price is not None:
+            # Competitive bid: the client takes it only if it is no worse than their reserve
+            # (a client selling to us wants at least the reserve, one buying from us at most)
+            worse = fill_price < tender["price"] if tender["action"] == "BUY" else fill_price > tender["price"]
+            if worse:
+                return {"success": False}
+        self._book_fill(tender["ticker"], tender["action"], tender["quantity"], fill_price, 0.0)
+        return {"success": True}
+
+    def decline_tender(self, tender_id):
+        if self.tenders.pop(tender_id, None) is None:
+            raise ApiError(404, "NOT_FOUND", f"No active tender {tender_id}")
+        return {"success": True}
+
+    # --------- CONVERTERS ----------
+    def assets_payload(self):
+        if self.case != "arbitrage":
+            return []
+        return [{"ticker": ticker, "type": "CONVERTER", "description": f"{' + '.join(a['convert_from'])} -> "
+                 f"{' + '.join(a['convert_to'])}", "total_quantity": 1, "available_quantity": 1,
+                 "lease_price": 0.0, "convert_from": [{"ticker": t, "quantity": 1} for t in a["convert_from"]],
+                 "convert_to": [{"ticker": t, "quantity": 1} for t in a["convert_to"]],
+                 "containment": None, "ticks_per_conversion": 0, "ticks_per_lease": 0, "is_available": True,
+                 "start_period": 1, "stop_period": 1, "max_quantity_per_conversion": CONVERTER_SIZE,
+                 "conversion_price": CONVERTER_COST} for ticker, a in ASSETS.items()]
+
+    def lease(self, ticker):
+        if self.case != "arbitrage" or ticker not in ASSETS:
+            raise ApiError(400, "INVALID_TICKER", f"{ticker} is not a leasable asset")
+        lease = {"id": self.next_lease_id, "ticker": ticker, "type": "CONVERTER", "start_lease_period": 1,
+                 "start_lease_tick": self.tick, "next_lease_period": 1, "next_lease_tick": self.ticks,
+                 "convert_from": [{"ticker": t, "quantity": 1} for t in ASSETS[ticker]["convert_from"]],
+                 "convert_to": [{"ticker": t, "quantity": 1} for t in ASSETS[ticker]["convert_to"]],
+                 "containment_usage": None}
+        self.leases[lease["id"]] = lease
+        self.next_lease_id += 1
+        return lease
+
+    def use_lease(self, lease_id, query):
+        lease = self.leases.get(lease_id)
+        if lease is None:
+            raise ApiError(404, "NOT_FOUND", f"No lease {lease_id}")
+        asset = ASSETS[lease["ticker"]]
+        given = {query[f"from{i}"]: float(query[f"quantity{i}"]) for i in range(1, 4) if f"from{i}" in query}
+        quantities = set(given.values())
+        if set(given) != set(asset["convert_from"]) or len(quantities) != 1:
+            raise ApiError(400, "INVALID_CONVERSION", f"{lease['ticker']} converts {asset['convert_from']} 1:1")
+        quantity = quantities.pop()
+        if quantity != int(quantity) or not 0 < quantity <= CONVERTER_SIZE:
+            raise ApiError(400, "INVALID_QUANTITY", f"Conversions are 1..{CONVERTER_SIZE} units")
+        for ticker in asset["convert_from"]:
+            self.securities[ticker]["position"] -= int(quantity)
+        for ticker in asset["convert_to"]:
+            self.securities[ticker]["position"] += int(quantity)
+        self.securities["CAD"]["position"] -= CONVERTER_COST
+        self.securities["RITC"]["realized"] -= CONVERTER_COST
+        return lease
+
+    def unlease(self, lease_id):
+        if self.leases.pop(lease_id, None) is None:
+            raise ApiError(404, "NOT_FOUND", f"No lease {lease_id}")
+        return {"success": True}
+
+    def _publish_news(self, body):
+        self.news.append({"news_id": len(self.news) + 1, "period": 1, "tick": self.tick, "ticker": "RTM",
+                          "headline": "Volatility update", "body": body})
+
+    def news_since(self, since=0):
+        return [n for n in reversed(self.news) if n["news_id"] > since]
+
+    def case_payload(self):
+        return {"name": f"Mock RIT {self.case} case", "period": 1, "tick": self.tick,
+                "ticks_per_period": self.ticks, "total_periods": 1, "status": self.status,
+                "is_enforce_trading_limits": True}
+
+
+# --------- HTTP ----------
+class MockRitServer:
+    def __init__(self, case="arbitrage", tick_rate=1.0, ticks=TICKS_PER_PERIOD, latency_ms=0.0, jitter_ms=0.0,
+                 seed=0, replay=None, port=PORT, host="localhost", **market_kwargs):
+        self.market = Market(case, ticks, seed, replay, **market_kwargs)
+        self.tick_rate = tick_rate
+        self.latency_s = latency_ms / 1000
+        self.jitter_s = jitter_ms / 1000
+        self.jitter_rng = random.Random(seed + 1)
+        self.started = monotonic()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def current_tick(self):
+        if self.tick_rate <= 0:
+            return self.market.tick  # manual clock: only advance() moves it
+        return int((monotonic() - self.started) * self.tick_rate)
+
+    def advance(self, ticks=1):
+        """Step a manual-clock market forward"""
+        with self.market.lock:
+            self.market.advance_to(self.market.tick + ticks)
+            return self.market.tick
+
+    def reset(self, case=None, ticks=None, seed=0, replay=None, **market_kwargs):
+        """Start a fresh market on the running server (same port, same keep-alive connections)"""
+        market = Market(case or self.market.case, ticks or self.market.ticks, seed, replay, **market_kwargs)
+        with self.market.lock:
+            self.market = market
+        self.started = monotonic()
+
+    def start(self):
+        """Serve from a background thread (for benchmarks and tests)"""
+        self.started = monotonic()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-rit", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        self.started = monotonic()
+        self.httpd.serve_forever()
+
+    def _route(self, method, path, query):
+        m = self.market
+        parts = [p for p in path.split("/") if p]
+        if not parts or parts[0] != "v1":
+            raise ApiError(404, "NOT_FOUND", path)
+        parts = parts[1:]
+        q = {k: v[-1] for k, v in query.items()}
+        m.stats[f"{method} /{parts[0] if parts else ''}{'/book' if parts[1:2] == ['book'] else ''}"] += 1
+
+        if parts == ["case"] and method == "GET":
+            return m.case_payload()
+        if parts == ["securities"] and method == "GET":
+            return m.securities_payload(q.get("ticker"))
+        if parts == ["securities", "book"] and method == "GET":
+            return m.book(q["ticker"], int(q.get("limit", 20)))
+        if parts == ["orders"] and method == "GET":
+            return m.list_orders(q.get("status", "OPEN"))
+        if parts == ["orders"] and method == "POST":
+            return m.place_order(q.get("ticker"), q.get("type", "MARKET"), q.get("quantity"), q.get("action"),
+                                 q.get("price"))
+        if len(parts) == 2 and parts[0] == "orders":
+            order_id = int(parts[1])
+            if method == "GET":
+                return m.get_order(order_id)
+            if method == "DELETE":
+                return m.cancel_order(order_id)
+        if parts == ["tenders"] and method == "GET":
+            return list(m.tenders.values())
+        if len(parts) == 2 and parts[0] == "tenders":
+            tender_id = int(parts[1])
+            if method == "POST":
+                return m.accept_tender(tender_id, q.get("price"))
+            if method == "DELETE":
+                return m.decline_tender(tender_id)
+        if parts == ["assets"] and method == "GET":
+            return m.assets_payload()
+        if parts == ["leases"] and method == "GET":
+            return list(m.leases.values())
+        if parts == ["leases"] and method == "POST":
+            return m.lease(q.get("ticker"))
+        if len(parts) == 2 and parts[0] == "leases":
+            lease_id = int(parts[1])
+            if method == "POST":
+                return m.use_lease(lease_id, q)
+            if method == "DELETE":
+                return m.unlease(lease_id)
+        if parts == ["news"] and method == "GET":
+            return m.news_since(int(q.get("since", 0)))
+        if parts == ["_mock", "stats"] and method == "GET":
+            return dict(m.stats)
+        raise ApiError(404, "NOT_FOUND", f"{method} {path}")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real client
+            disable_nagle_algorithm = True  # headers and body go out as separate writes; Nagle would hold the body ~40ms
+
+            def _serve(self, method):
+                if server.latency_s or server.jitter_s:
+                    sleep(server.latency_s + server.jitter_rng.uniform(0, server.jitter_s))
+                url = urlparse(self.path)
+                try:
+                    with server.market.lock:
+                        server.market.advance_to(server.current_tick())
+                        body, status = server._route(method, url.path, parse_qs(url.query)), 200
+                except ApiError as e:
+                    body, status = e.body, e.status
+                except (KeyError, ValueError) as e:
+                    body, status = {"code": "BAD_REQUEST", "message": str(e)}, 400
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def do_DELETE(self):
+                self._serve("DELETE")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", choices=sorted(CASES), default="arbitrage")
+    parser.add_argument("--tick-rate", type=float, default=1.0, help="ticks per second (RIT runs at 1; 0 freezes the clock)")
+    parser.add_argument("--ticks", type=int, default=TICKS_PER_PERIOD, help="ticks in the case")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="CSV of tick,ticker,price rows to replay instead of synthetic prices")
+    parser.add_argument("--book-levels", type=int, default=BOOK_LEVELS)
+    parser.add_argument("--enforce-rate-limit", action="store_true", help="answer 429 above api_orders_per_second")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    server = MockRitServer(args.case, args.tick_rate, args.ticks, args.latency_ms, args.jitter_ms, args.seed,
+                           args.replay, args.port, book_levels=args.book_levels,
+                           enforce_rate_limit=args.enforce_rate_limit)
+    print(f"Mock RIT {args.case} case on http://localhost:{args.port}/v1 "
+          f"({args.ticks} ticks at {args.tick_rate} ticks/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+RIT Market Simulator - Shared Order Scheduler
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Used by both the arbitrage and the volatility case. The /securities payload
+carries api_orders_per_second for every ticker; this module turns it into
+one token bucket per ticker and sends queued orders as fast as those buckets
+allow, most urgent first (hedges, then closes, then new positions). Orders
+wait in one priority heap per ticker, so a dispatch only compares the head
+of each ticker's queue: its cost grows with the number of tickers, not with
+the number of orders queued. Queue depth and wait times are available from
+metrics().
+
+Usage from a case script (the case folders add Common/ to sys.path):
+
+    import orderScheduler as osch
+    scheduler = osch.get_scheduler(session)
+    scheduler.load_limits(securities)   # the /securities JSON you already have
+    response = scheduler.post_order(params, osch.PRIORITY_HEDGE)
+"""
+
+import heapq
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic
+
+import eventLog as elog
+import latencyMonitor as lat
+
+API = "http://localhost:9999/v1"
+
+# Lower number goes first
+PRIORITY_HEDGE = 0
+PRIORITY_CLOSE = 1
+PRIORITY_OPEN = 2
+PRIORITY_NAMES = {PRIORITY_HEDGE: "hedge", PRIORITY_CLOSE: "close", PRIORITY_OPEN: "open"}
+
+DEFAULT_ORDERS_PER_SECOND = 0  # 0 = no limit until the real one is known
+MAX_WORKERS = 8                # orders in flight at once
+
+
+class TokenBucket:
+    """Classic token bucket; a rate of 0 means unlimited"""
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate)  # allow a one-second burst
+        self.tokens = self.capacity
+        self.last = monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1.0
+
+
+class _WaitStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count, self.total, self.max = 0, 0.0, 0.0
+
+    def add(self, wait_s):
+        self.count += 1
+        self.total += wait_s
+        self.max = max(self.max, wait_s)
+
+    def as_dict(self):
+        mean = self.total / self.count if self.count else 0.0
+        return {"count": self.count, "mean_wait_ms": mean * 1e3, "max_wait_ms": self.max * 1e3}
+
+
+class OrderScheduler:
+    def __init__(self, session, default_rate=DEFAULT_ORDERS_PER_SECOND, max_workers=MAX_WORKERS):
+        self.session = session
+        self.default_rate = default_rate
+        self.buckets = {}             # ticker -> TokenBucket
+        self.limits_loaded = False
+
+        self._queues = {}             # ticker -> heap of (priority, seq, queued_at, fn, future), never empty
+        self._queued = 0
+        self._seq = count()
+        self._cond = Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sched")
+        self._waits = {p: _WaitStats() for p in PRIORITY_NAMES}
+        self.sent = 0
+        self.throttled = 0  # dispatch passes where every queued ticker was out of tokens
+
+        Thread(target=self._dispatch_loop, name="order-scheduler", daemon=True).start()
+
+    # --------- LIMITS ----------
+    def load_limits(self, securities):
+        """Read api_orders_per_second from a /securities payload"""
+        with self._cond:
+            for sec in securities:
+                ticker = sec["ticker"]
+                rate = sec.get("api_orders_per_second") or self.default_rate
+                bucket = self.buckets.get(ticker)
+                if bucket is None or bucket.rate != rate:
+                    self.buckets[ticker] = TokenBucket(rate)
+            self.limits_loaded = True
+            self._cond.notify()
+
+    def refresh_limits(self):
+        r = self.session.get(f"{API}/securities")
+        r.raise_for_status()
+        self.load_limits(r.json())
+
+    def _bucket(self, ticker):
+        bucket = self.buckets.get(ticker)
+        if bucket is None:
+            bucket = self.buckets[ticker] = TokenBucket(self.default_rate)
+        return bucket
+
+    # --------- QUEUE ----------
+    def submit(self, ticker, fn, priority=PRIORITY_OPEN):
+        """Queue fn() (which sends one order for ticker); returns a Future with its result"""
+        if not self.limits_loaded:
+            try:
+                self.refresh_limits()
+            except Exception as e:
+                elog.get_log().warn("limits_error", "Could not load order limits: {error}", error=str(e))
+                self.limits_loaded = True  # fall back to default_rate rather than retry every order
+        future = Future()
+        with self._cond:
+            heapq.heappush(self._queues.setdefault(ticker, []), (priority, next(self._seq), monotonic(), fn, future))
+            self._queued += 1
+            self._cond.notify()
+        return future
+
+    def post_order(self, params, priority=PRIORITY_OPEN):
+        """Send one POST /orders through the queue and wait for the response"""
+        fn = lambda: self.session.post(f"{API}/orders", params=params)
+        return self.submit(params["ticker"], fn, priority).result()
+
+    def _next_ticker(self, now):
+        """Ticker whose queue head is the most urgent order with a token, else (None, seconds until a token)"""
+        best, next_wait = None, None
+        for ticker, queue in self._queues.items():
+            wait = self._bucket(ticker).wait_time(now)
+            if wait > 0:
+                next_wait = wait if next_wait is None else min(next_wait, wait)
+            elif best is None or queue[0] < self._queues[best][0]:
+                best = ticker
+        return best, next_wait
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._queues:
+                        self._cond.wait()
+                        continue
+                    # Others may overtake a throttled ticker
+                    ticker, next_wait = self._next_ticker(monotonic())
+                    if ticker is not None:
+                        break
+                    self.throttled += 1
+                    self._cond.wait(next_wait)
+
+                queue = self._queues[ticker]
+                priority, _, queued_at, fn, future = heapq.heappop(queue)
+                if not queue:
+                    del self._queues[ticker]
+                self._queued -= 1
+                self._bucket(ticker).take()
+                waited = monotonic() - queued_at
+                self._waits.get(priority, self._waits[PRIORITY_OPEN]).add(waited)
+                lat.record(f"scheduler.wait.{PRIORITY_NAMES.get(priority, 'open')}", int(waited * 1e9))
+                self.sent += 1
+
+            self._pool.submit(self._run, fn, future)
+
+    @staticmethod
+    def _run(fn, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+
+    # --------- METRICS ----------
+    def queue_depth(self):
+        with self._cond:
+            return self._queued
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "queue_depth": self._queued,
+                "sent": self.sent,
+                "throttled": self.throttled,
+                "wait": {PRIORITY_NAMES[p]: s.as_dict() for p, s in self._waits.items()},
+            }
+
+
+# One scheduler per session, shared by every module that sends orders on it
+_schedulers = {}
+
+def get_scheduler(session):
+    """Return the scheduler for this session, creating it on first use"""
+    scheduler = _schedulers.get(id(session))
+    if scheduler is None or scheduler.session is not session:
+        scheduler = _schedulers[id(session)] = OrderScheduler(session)
+    return scheduler
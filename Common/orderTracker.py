@@ -0,0 +1,250 @@
+"""
+RIT Market Simulator - Order Tracker
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Keeps every order we submit: its ID, the price we expected when we decided
+to trade, and what we actually got. Acknowledgements register orders; orders
+still OPEN are refreshed in batches - one GET /orders?status=OPEN for all of
+them, plus one GET /orders/{id} for each order that has left the open list
+since the last poll (never the TRANSACTED/CANCELLED lists, which hold every
+order of the case and only grow). Every new fill (quantity and price) goes
+to on_fill, which is how a case script keeps fill-accurate positions without
+a /securities round trip.
+
+Slippage: decision() stamps the reference price every (ticker, action) was
+expected to trade at and the edge the trade was sized on; orders acknowledged
+inside it belong to that decision. Slippage per share is what a fill cost
+beyond its reference (> 0: worse), converted to CAD with the decision's rates,
+and the realized edge is the expected edge minus the slippage per unit.
+
+    tracker = OrderTracker(session, on_fill=on_fill)   # on_fill(ticker, action, qty, price, order_id)
+    with tracker.decision("basket_rich", edge1, qty, {(BULL, "SELL"): bull_bid, ...}, rates={RITC: usd_ask}):
+        gateway.submit_package(legs)      # gateway on_ack -> tracker.on_order_ack
+    tracker.poll()                        # once per loop
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import count
+from threading import RLock
+from time import monotonic
+
+import eventLog as elog
+
+API = "http://localhost:9999/v1"
+
+POLL_SECONDS = 0.25               # batched refresh at most this often (unless forced)
+FINAL = ("TRANSACTED", "CANCELLED")
+
+
+@dataclass
+class TrackedOrder:
+    order_id: int
+    ticker: str
+    action: str
+    qty: int
+    expected_price: float = None  # reference at decision time (None: no slippage accounting)
+    decision: object = None
+    filled: int = 0
+    vwap: float = None
+    status: str = "OPEN"
+
+    @property
+    def slippage(self):
+        """Cost per share beyond the reference, in the ticker's currency (> 0: worse than expected)"""
+        if self.expected_price is None or self.vwap is None or not self.filled:
+            return None
+        diff = self.vwap - self.expected_price
+        return diff if self.action == "BUY" else -diff
+
+
+@dataclass
+class Decision:
+    decision_id: int
+    tag: str
+    edge: float       # expected edge per unit, CAD
+    qty: int          # units the decision was sized for
+    expected: dict    # (ticker, action) -> reference price
+    rates: dict       # ticker -> CAD per unit of its quote currency (default 1)
+    orders: list = field(default_factory=list)
+    closed: bool = False    # no more orders will join
+    finished: bool = False  # realized edge booked
+
+    def slippage_cad(self):
+        return sum(o.slippage * o.filled * self.rates.get(o.ticker, 1.0)
+                   for o in self.orders if o.slippage is not None)
+
+    def realized_edge(self):
+        return self.edge - self.slippage_cad() / self.qty if self.qty else None
+
+    @property
+    def done(self):
+        return self.closed and all(o.status in FINAL for o in self.orders)
+
+
+class OrderTracker:
+    def __init__(self, session, on_fill=None, poll_seconds=POLL_SECONDS, clock=monotonic):
+        self.session = session
+        self.on_fill = on_fill            # (ticker, action, qty, price, order_id) for every new fill
+        self.poll_seconds = poll_seconds
+        self.clock = clock                # the backtest swaps in the tick counter
+        self.orders = {}                  # order_id -> TrackedOrder, everything we sent
+        self.working = {}                 # order_id -> TrackedOrder still OPEN
+        self.positions = defaultdict(int)  # net filled quantity per ticker since start
+        self.current = None               # Decision orders are acknowledged into
+        self.decision_ids = count(1)
+        self.last_poll = None
+        self.poll_requests = 0
+        # tag -> [decisions, expected edge sum, realized edge sum]; ticker -> [shares, slippage sum]
+        self.by_tag = defaultdict(lambda: [0, 0.0, 0.0])
+        self.by_ticker = defaultdict(lambda: [0, 0.0])
+        self.lock = RLock()               # acks arrive from the order threads
+
+    # --------- SUBMISSION ----------
+    @contextmanager
+    def decision(self, tag, edge, qty, expected, rates=None):
+        """Orders acknowledged inside the block are measured against `expected`"""
+        decision = Decision(next(self.decision_ids), tag, edge, qty, expected, rates or {})
+        self.current = decision
+        try:
+            yield decision
+        finally:
+            self.current = None
+            with self.lock:
+                decision.closed = True
+                self._maybe_finish(decision)
+
+    def on_order_ack(self, ticker, action, qty, response, expected_price=None):
+        """Same signature as the ExecutionGateway on_ack hook"""
+        if not response.ok:
+            return None
+        try:
+            data = response.json()
+            order_id = data["order_id"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        decision = self.current
+        if expected_price is None and decision is not None:
+            expected_price = decision.expected.get((ticker, action))
+        order = TrackedOrder(order_id, ticker, action, int(qty), expected_price,
+                             decision if expected_price is not None else None)
+        with self.lock:
+            self.orders[order_id] = order
+            self.working[order_id] = order
+            if order.decision is not None:
+                order.decision.orders.append(order)
+        self._update(order, data)
+        return order
+
+    # --------- REFRESH ----------
+    def poll(self, force=False):
+        """Refresh every working order in one batch (plus one GET per order that left the book); returns the requests made"""
+        if not self.working:
+            return 0
+        now = self.clock()
+        if not force and self.last_poll is not None and now - self.last_poll < self.poll_seconds:
+            return 0
+        self.last_poll = now
+
+        requests = 1
+        r = self.session.get(f"{API}/orders", params={"status": "OPEN"})
+        if not r.ok:
+            return requests
+        still_open = {o["order_id"]: o for o in r.json()}
+        missing = []
+        for order in list(self.working.values()):
+            data = still_open.get(order.order_id)
+            if data is None:
+                missing.append(order)
+            else:
+                self._update(order, data)
+
+        # Orders that left the book since the last poll: one GET each for their final fill
+        for order in missing:
+            requests += 1
+            r = self.session.get(f"{API}/orders/{order.order_id}")
+            if r.ok:
+                self._update(order, r.json())
+        self.poll_requests += requests
+        return requests
+
+    def refresh(self, order_id):
+        """Refresh one order now (after a cancel, to catch fills that beat it)"""
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        r = self.session.get(f"{API}/orders/{order_id}")
+        if r.ok:
+            self._update(order, r.json())
+        return order
+
+    def get(self, order_id):
+        return self.orders.get(order_id)
+
+    def _update(self, order, data):
+        filled = int(data.get("quantity_filled") or 0)
+        vwap = data.get("vwap")
+        status = data.get("status") or ("TRANSACTED" if filled >= order.qty else "OPEN")
+        with self.lock:
+            new = filled - order.filled
+            price = None
+            if new > 0 and vwap is not None:
+                # Price of just the new fills, from the change in filled notional
+                price = (vwap * filled - (order.vwap or 0.0) * order.filled) / new
+            order.filled, order.vwap, order.status = filled, vwap, status
+            if new > 0:
+                self.positions[order.ticker] += new if order.action == "BUY" else -new
+            if status in FINAL:
+                self.working.pop(order.order_id, None)
+                if order.slippage is not None:
+                    stats = self.by_ticker[order.ticker]
+                    stats[0] += order.filled
+                    stats[1] += order.slippage * order.filled
+                if order.decision is not None:
+                    self._maybe_finish(order.decision)
+        if new > 0 and self.on_fill is not None:
+            self.on_fill(order.ticker, order.action, new, price, order.order_id)
+
+    def _maybe_finish(self, decision):
+        if decision.finished or not decision.done:
+            return
+        decision.finished = True
+        if not decision.orders:
+            return  # nothing was accepted; there is no realized edge to book
+        realized = decision.realized_edge()
+        stats = self.by_tag[decision.tag]
+        stats[0] += 1
+        stats[1] += decision.edge
+        stats[2] += realized
+        elog.get_log().info("slippage", "{tag} decision {decision_id}: expected edge {edge:.4f}, "
+                            "realized {realized:.4f} CAD/unit (slippage {slippage:.0f} CAD)",
+                            tag=decision.tag, decision_id=decision.decision_id, edge=decision.edge,
+                            realized=realized, slippage=decision.slippage_cad(), qty=decision.qty)
+
+    # --------- REPORTING ----------
+    def report(self):
+        """Expected vs realized edge per decision tag, and mean slippage per share per ticker"""
+        with self.lock:
+            return {
+                "decisions": {tag: {"count": n, "expected_edge": e / n, "realized_edge": r / n}
+                              for tag, (n, e, r) in self.by_tag.items() if n},
+                "slippage_per_share": {t: s / n for t, (n, s) in self.by_ticker.items() if n},
+                "working": len(self.working),
+                "orders": len(self.orders),
+                "poll_requests": self.poll_requests,
+            }
+
+
+# One tracker per session, for scripts that send orders without a trader object
+_trackers = {}
+
+
+def get_tracker(session):
+    """Return the tracker for this session, creating it on first use"""
+    tracker = _trackers.get(id(session))
+    if tracker is None:
+        tracker = _trackers[id(session)] = OrderTracker(session)
+    return tracker
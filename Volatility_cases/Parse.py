@@ -1,6 +1,7 @@
 from py_vollib.black_scholes.implied_volatility import implied_volatility as iv
 import math
 import numpy as np
+import instrumentRegistry as ir
 
 def parse_news(news):
     volatilities = []
@@ -83,19 +84,26 @@ def calculate_improved_win_probability(volDiff, etfIV, news_volatilities=None):
     return winProb
 
 def kelly(etfPrice, etfIV, optionPrice, name, 
-          delta, diffcom, sharesLeft, news_volatilities = None):
+          delta, diffcom, sharesLeft, news_volatilities = None, optionIV = None, expiry = None):
     #debugging
     """print("THIS IS KELLY PARAMETER", etfPrice, etfIV, optionPrice, name, 
           delta, diffcom, sharesLeft, optionIV)"""
     
     #we don't actually get the IV of the option. Imma black scholes it here
-    expiry = (20/240) 
+    registry = ir.get_registry()
+    if expiry is None:
+        expiry = registry.time_to_expiry(0) #time to expiry at tick 0; pass MarketState.time_to_expiry for the live value
     safetyMargin = 0.9
-    strike = float(name[3:5])
-    type = 'c' if 'C' in name else 'p'
+    option = registry.get(name) #strike and put/call worked out once, not from the ticker every call
+    strike = option.strike
+    type = 'c' if option.is_call else 'p'
     sgn = 1
 
-    optionIV = iv(optionPrice, etfPrice, strike, expiry, 0.0, type) #implied vol of the option
+    if optionIV is None:
+        optionIV = iv(optionPrice, etfPrice, strike, expiry, 0.0, type) #implied vol of the option
+    elif not optionIV > 0:
+        # the chain solve found no implied vol for this price (NaN) - same as iv() raising
+        raise ValueError(f"no implied volatility for {name} at {optionPrice}")
     
     #for the scholes 
     d1 = (math.log(etfPrice/strike) + 0.5*(optionIV**2)*expiry) / (optionIV*math.sqrt(expiry))
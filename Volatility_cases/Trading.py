@@ -3,38 +3,45 @@ import warnings
 import signal
 import requests
 from time import sleep
+import os
+import sys
 import pandas as pd
 import numpy as np
 import Parse
 
-def place_order(session, ticker, type, quantity, action):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import orderScheduler as osch
+import eventLog as elog
+import latencyMonitor as lat
+import orderTracker as ot
+import instrumentRegistry as ir
+
+def log_response(session, params, response, expected_price=None):
+    # Order acks go to the event log (written off this thread) instead of stdout, and to the order tracker
+    level = elog.INFO if response.ok else elog.WARN
+    elog.get_log().log(level, "order", "{action} {quantity} {ticker}: HTTP {status}", ticker=params['ticker'],
+                       action=params['action'], quantity=params['quantity'], status=response.status_code)
+    ot.get_tracker(session).on_order_ack(params['ticker'], params['action'], params['quantity'], response,
+                                         expected_price)
+
+@lat.timed("vol.place_order")
+def place_order(session, ticker, type, quantity, action, priority=osch.PRIORITY_OPEN, expected_price=None):
+    # Every child order goes through the shared scheduler, which paces it to the ticker's api_orders_per_second;
+    # expected_price (the price the decision was made at) lets the order tracker measure slippage
+    scheduler = osch.get_scheduler(session)
     #print("PLACING ORDER:", ticker, type, quantity, action)
-    if ticker == "RTM" and quantity > 10000:
-        while(quantity > 10000):
-            params = {
-                'ticker': ticker,
-                'type': type,
-                'quantity': 9999,
-                'action': action
-            }
-            # Make the POST request with proper URL and 
-            response = session.post('http://localhost:9999/v1/orders', params=params)
-            print(response, "9999 stocks")
-            quantity = quantity - 9000
-
-    if ticker != "RTM" and quantity > 100:
-        while(quantity > 100):
-            amount = 99
-            params = {
-                'ticker': ticker,
-                'type': type, 
-                'quantity': amount,
-                'action': action
-         }
-            # Make the POST request with proper URL and 
-            response = session.post('http://localhost:9999/v1/orders', params=params)
-            print(response, "99 opt")
-            quantity = quantity - amount
+    # Child orders of the ticker's max_trade_size, from the instrument registry
+    max_size = ir.get_registry().max_trade_size(ticker)
+    while(quantity > max_size):
+        params = {
+            'ticker': ticker,
+            'type': type,
+            'quantity': max_size,
+            'action': action
+        }
+        response = scheduler.post_order(params, priority)
+        log_response(session, params, response, expected_price)
+        quantity = quantity - max_size
 
     params = {
         'ticker': ticker,
@@ -42,34 +49,36 @@ def place_order(session, ticker, type, quantity, action):
         'quantity': quantity,
         'action': action
         }
-    response = session.post('http://localhost:9999/v1/orders', params=params)
-    print(response)
+    response = scheduler.post_order(params, priority)
+    log_response(session, params, response, expected_price)
     return response
 
     
 
-def trade(session, assets2, helper, vol, news_volatilities=None):
+def trade(session, assets2, helper, vol, news_volatilities=None, market=None):
     """
     Trading logic for volatility case.
     Parameters
     ----------
-    assets2 : pd.DataFrame
-        DataFrame from main loop with option data:
+    assets2 : np.ndarray
+        OptionChain rows from the main loop, the underlying first (structured array):
         ['ticker', 'last', 'delta', 'diffcom', 'decision', 'position', 'size', ...]
-    helper : pd.DataFrame
-        Contains hedging and exposure calculations (share_exposure, required_hedge, etc.)
+    helper : np.void
+        OptionChain hedge record (share_exposure, required_hedge, must_be_traded, etc.)
+    market : MarketState, optional
+        Snapshot the chain was evaluated from; Kelly sizing takes its time to expiry
     """
    #Trade the shares to match the required hedge first
-    current_exposure = helper['must_be_traded'].iloc[0]
+    current_exposure = helper['must_be_traded']
     if np.isnan(current_exposure):
         current_exposure = 0
     #print("CURRENT EXPOSURE:", current_exposure)
     if current_exposure > 0:
         #print("BUYING EXPOSURE SHARES:")
-        place_order(session, assets2['ticker'].iloc[0], "MARKET", 1.05 * int(current_exposure), "BUY")
+        place_order(session, assets2['ticker'][0], "MARKET", 1.05 * int(current_exposure), "BUY", osch.PRIORITY_HEDGE, expected_price=assets2['last'][0])
     if current_exposure < 0:
         #print("SELLING EXPOSURE SHARES:")
-        place_order(session, assets2['ticker'].iloc[0], "MARKET", 1.05 * abs(int(current_exposure)), "SELL")
+        place_order(session, assets2['ticker'][0], "MARKET", 1.05 * abs(int(current_exposure)), "SELL", osch.PRIORITY_HEDGE, expected_price=assets2['last'][0])
 
      # --- Risk Limits ---
     DELTA_LIMIT = 7000
@@ -78,17 +87,15 @@ def trade(session, assets2, helper, vol, news_volatilities=None):
     OPT_NET_LIMIT = 1000
 
     #Position details
-    profitability = np.abs(np.array(assets2['diffcom'].iloc[1:]))
-    detlas = np.array(assets2['delta'].iloc[1:])
-    decisions = np.array(assets2['decision'].iloc[1:])
-    positions = np.array(assets2['position'])
-    sizes = np.array(assets2['size'])
+    profitability = np.abs(assets2['diffcom'][1:])
+    detlas = assets2['delta'][1:]
+    decisions = assets2['decision'][1:]
+    positions = assets2['position'].copy()  # the puts' sign is flipped below, the chain must keep its own
+    sizes = assets2['size']
         
 
     option_positions = positions[1:]
-    for i in range(len(option_positions)):
-        if 'P' in assets2['ticker'].iloc[i+1]:
-            option_positions[i] *= -1  # Invert position for puts'
+    option_positions[assets2['type'][1:] == 'PUT'] *= -1  # Invert position for puts (type is the registry's)
 
     #Limit calculations
     stock_position = positions[0] * sizes[0]
@@ -103,7 +110,7 @@ def trade(session, assets2, helper, vol, news_volatilities=None):
             opt_size = sizes[i]
             opt_delta = detlas[i]
             proposed_sell = abs(opt_pos)
-            #print("Preparing to SELL", proposed_sell, "contracts of", assets2['ticker'].iloc[i+1], "opt_pos:", opt_pos, "opt_size:", opt_size, "opt_delta:", opt_delta)
+            #print("Preparing to SELL", proposed_sell, "contracts of", assets2['ticker'][i+1], "opt_pos:", opt_pos, "opt_size:", opt_size, "opt_delta:", opt_delta)
 
             # Check option net after selling
             projected_net = opt_net - opt_pos
@@ -134,15 +141,15 @@ def trade(session, assets2, helper, vol, news_volatilities=None):
 
             # Execute if still positive
             if proposed_sell > 0:
-                #print(f"Placing SELL order for {proposed_sell} contracts of {assets2['ticker'].iloc[i+1]} with hedge {hedge_shares} shares")
-                place_order(session, assets2['ticker'].iloc[i+1], "MARKET", int(proposed_sell), "SELL")
+                #print(f"Placing SELL order for {proposed_sell} contracts of {assets2['ticker'][i+1]} with hedge {hedge_shares} shares")
+                place_order(session, assets2['ticker'][i+1], "MARKET", int(proposed_sell), "SELL", osch.PRIORITY_CLOSE, expected_price=assets2['last'][i+1])
 
             if abs(hedge_shares) > 0:
-                #print(f"Placing hedge order for {hedge_shares} shares of {assets2['ticker'].iloc[0]}")
+                #print(f"Placing hedge order for {hedge_shares} shares of {assets2['ticker'][0]}")
                 if hedge_shares < 0:
-                    place_order(session, assets2['ticker'].iloc[0], "MARKET", abs(hedge_shares), "BUY")
+                    place_order(session, assets2['ticker'][0], "MARKET", abs(hedge_shares), "BUY", osch.PRIORITY_HEDGE, expected_price=assets2['last'][0])
                 else:
-                    place_order(session, assets2['ticker'].iloc[0], "MARKET", abs(hedge_shares), "SELL")
+                    place_order(session, assets2['ticker'][0], "MARKET", abs(hedge_shares), "SELL", osch.PRIORITY_HEDGE, expected_price=assets2['last'][0])
    
     
     #Get current trade details
@@ -153,18 +160,20 @@ def trade(session, assets2, helper, vol, news_volatilities=None):
     # Step 2: Trading logic for BUY
     if decision == "BUY":
 
-        num_contracts = Parse.kelly(assets2['last'].iloc[0], vol, assets2['last'].iloc[max_id+1], 
-                              assets2['ticker'].iloc[max_id+1], 
+        num_contracts = Parse.kelly(assets2['last'][0], vol, assets2['last'][max_id+1], 
+                              assets2['ticker'][max_id+1], 
                               detlas[max_id], profitability[max_id], 
-                              OPT_GROSS_LIMIT - opt_gross, news_volatilities=news_volatilities)
+                              OPT_GROSS_LIMIT - opt_gross, news_volatilities=news_volatilities,
+                              optionIV=assets2['i_vol'][max_id+1],
+                              expiry=market.time_to_expiry if market is not None else None)
         #print("THIS IS NUM KELLY CONTRACTS:", num_contracts)
         #num_contracts = (profitability[max_id] * 20) // delta_val
-        if 'P' in assets2['ticker'].iloc[max_id+1]:
+        if assets2['type'][max_id+1] == 'PUT':
             num_contracts = num_contracts * -1
     
         #Enforce option gross limit
         #print("OPT_GROSS", opt_gross, "OPT_NET", opt_net)
-        #print("NUM CONTRACTS BEFORE LIMITS:", num_contracts, "OF", assets2['ticker'].iloc[max_id+1])
+        #print("NUM CONTRACTS BEFORE LIMITS:", num_contracts, "OF", assets2['ticker'][max_id+1])
 
         if abs(num_contracts) + opt_gross > OPT_GROSS_LIMIT:
             num_contracts = (OPT_GROSS_LIMIT - opt_gross) * np.sign(num_contracts)
@@ -218,18 +227,18 @@ def trade(session, assets2, helper, vol, news_volatilities=None):
         if trade_size == 0:
             pass
         else:
-            #print("Placing BUY order for {num_contracts} contracts of {assets2['ticker'].iloc[max_id]} with hedge {need_hedge} shares")
+            #print("Placing BUY order for {num_contracts} contracts of {assets2['ticker'][max_id]} with hedge {need_hedge} shares")
             # with the current exposure added (from helper['share_exposure'])
             if abs(num_contracts) > 0:
-                place_order(session, assets2['ticker'].iloc[max_id+1], "MARKET", int(abs(num_contracts)), "BUY")
+                place_order(session, assets2['ticker'][max_id+1], "MARKET", int(abs(num_contracts)), "BUY", expected_price=assets2['last'][max_id+1])
             if need_hedge != 0:
                 #print("NEED HEDGE:", need_hedge)
                 if need_hedge  > 0:
                     #print("BUYING HEDGE SHARES:")
-                    place_order(session, assets2['ticker'].iloc[0], "MARKET", int(need_hedge), "BUY")
+                    place_order(session, assets2['ticker'][0], "MARKET", int(need_hedge), "BUY", osch.PRIORITY_HEDGE, expected_price=assets2['last'][0])
                 else:
                     #print("SELLING HEDGE SHARES:")
-                    place_order(session, assets2['ticker'].iloc[0], "MARKET", int(abs(need_hedge)), "SELL")
+                    place_order(session, assets2['ticker'][0], "MARKET", int(abs(need_hedge)), "SELL", osch.PRIORITY_HEDGE, expected_price=assets2['last'][0])
         
 
     
@@ -3,19 +3,29 @@ RIT Market Simulator Volatility Trading Case - Support File
 Rotman BMO Finance Research and Trading Lab, Uniersity of Toronto (C)
 All rights reserved.
 """
+import os
+import sys
 import warnings
 import signal
 import requests
-from time import sleep
-import pandas as pd
+from time import sleep, perf_counter_ns
 import numpy as np
 #black scholes libraries
-from py_vollib.black_scholes import black_scholes as bs
-from py_vollib.black_scholes.greeks.analytical import delta
-import py_vollib.black.implied_volatility as iv
 import Trading as tr
 import Strategy_2 as tr2
 import Parse
+import optionPricing as op
+import marketState as mst
+import optionChain as oc
+import instrumentRegistry as ir
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import orderScheduler as osch
+import eventLog as elog
+import latencyMonitor as lat
+import orderTracker as ot
+from eventLoop import EventLoop
+
 """
 To install py_vollib, use conda install jholdom::py_vollib, since it requires Python versions between 3.6 and 3.8.
 If that doesn’t work, try:
@@ -29,10 +39,6 @@ If that doesn’t work, try:
 # strike price k
 # time remaining (in years)
 
-#class that passes error message, ends the program
-class ApiException(Exception):
-    pass
-
 #code that lets us shut down if CTRL C is pressed
 def signal_handler(signum, frame):
     global shutdown
@@ -41,167 +47,148 @@ def signal_handler(signum, frame):
     
 API_KEY = {'X-API-Key': 'WILL'}
 shutdown = False
+
+# Structured event log (JSONL, written off the trading thread). elog.TICK brings back the per-step
+# vol and the assets/helper tables; CONSOLE_LEVEL = elog.OFF keeps everything in the file
+LOG_FILE = 'logs/volatility_events.jsonl'
+LOG_LEVEL = elog.INFO
+CONSOLE_LEVEL = elog.INFO
+
+# Per-stage and per-endpoint latency histograms, rewritten at every heartbeat and at the end
+LATENCY_FILE = 'logs/volatility_latency.json'
+
 session = requests.Session()
 session.headers.update(API_KEY)
     
-#code that gets the current tick
-def get_tick(session):
-    resp = session.get('http://localhost:9999/v1/case')
-    if resp.ok:
-        case = resp.json()
-        return case['tick']
-    raise ApiException('fail - cannot get tick')
-
-#code that gets the securities via json  
-def get_s(session):
-    price_act = session.get('http://localhost:9999/v1/securities')
-    if price_act.ok:
-        prices = price_act.json()
-        return prices
-    raise ApiException('fail - cannot get securities')
-
-def years_r(mat, tick):
-    yr = (mat - tick)/3600 
-    return yr
-
+# Last news item seen; fetch() reads only what came after it
 last_newsid = 0
 
-def get_news(session):
-    global last_newsid
-    params = {
-        'since': last_newsid 
-    }
-    news = session.get('http://localhost:9999/v1/news', params=params)
-    news = news.json()
-    if news and len(news) > 0:  # Check if news list is not empty
-        latest_id = max([item['news_id'] for item in news])
-        last_newsid = latest_id
-        return news
+
+def evaluate(session, market, vol):
+    """Price every option of a MarketState at vol and work out the share hedge; returns (rows, hedge) of the OptionChain"""
+    t = perf_counter_ns()
+    # Order rate limits (api_orders_per_second) feed the shared scheduler from the same payload
+    osch.get_scheduler(session).load_limits(market.securities)
+    # The chain's array is allocated once and overwritten in place, no per-step DataFrame
+    chain = oc.get_chain().update(market.securities)
+    rows, options, hedge = chain.rows, chain.options, chain.hedge
+    t = lat.lap('vol.frame', t)
+
+    # Price and delta for the whole chain in one call (reused as is while spot, vol and tick are unchanged)
+    tickers = chain.tickers
+    last = rows['last']
+    pricer = op.get_pricer().chain(tickers)
+    if market.tick < ir.get_registry().expiry_tick:
+        greeks = pricer.price(tickers, last[0], market.time_to_expiry, vol)
+        rows['delta'] = greeks.delta
+        rows['bsprice'] = greeks.price
+
+        # Implied volatility of the whole chain in one solve (warm-started from the last tick; Kelly reuses it)
+        rows['i_vol'] = pricer.implied_vols(tickers, last, last[0], market.time_to_expiry)
+        unsolved = pricer.is_option & np.isnan(rows['i_vol'])
+        if unsolved.any():
+            elog.get_log().warn("iv_error", "No implied volatility for {tickers} (price outside no-arbitrage bounds)",
+                                tickers=[tickers[i] for i in np.flatnonzero(unsolved)])
     else:
-        return []
-    
-    
+        # Expired: nothing to price, and last step's values must not carry over
+        rows['delta'] = rows['bsprice'] = rows['i_vol'] = np.nan
+
+    # Mispricing net of the 0.02 commission, and the side it points to
+    diff = last - rows['bsprice']
+    diffcom = np.where(diff > 0, diff - 0.02, np.where(diff < 0, diff + 0.02, np.nan))
+    rows['diffcom'] = diffcom
+    rows['abs_val'] = np.abs(diffcom)
+    rows['decision'] = np.where(diffcom > 0.02, 'SELL', np.where(diffcom < -0.02, 'BUY', 'NO DECISION'))
+    warnings.filterwarnings('ignore')
+    t = lat.lap('vol.pricing', t)
+
+    hedge['share_exposure'] = np.nansum(options['position'] * options['size'] * options['delta'])
+    hedge['required_hedge'] = hedge['share_exposure'] * -1
+    position = chain.underlying['position']
+    hedge['must_be_traded'] = hedge['required_hedge'] - position
+    hedge['current_pos'] = 'LONG' if position > 0 else 'SHORT' if position < 0 else 'NO POSITION'
+    required = hedge['required_hedge']
+    hedge['required_pos'] = 'LONG' if required > 0 else 'SHORT' if required < 0 else 'NO POSITION'
+    hedge['same'] = hedge['required_pos'] == hedge['current_pos']
+    t = lat.lap('vol.exposure', t)
+    return rows, hedge
+
+
+def step(session, market, vol):
+    """One evaluation of the options book from one MarketState; returns the updated volatility estimate"""
+    t = perf_counter_ns()
+    elog.get_log().tick("vol", "vol {vol:.4f}", vol=vol)
+    if market.stale:
+        elog.get_log().warn("stale_state", "Case, securities and news received {skew:.0f} ms apart",
+                            tick=market.tick, skew=market.skew_ms)
+
+    #ESTIMATE YOUR VOLATILITY:
+    news_volatilities = None
+    if market.news:
+        volatilities = Parse.parse_news(market.news)
+        news_volatilities = volatilities
+        vol = sum(volatilities)/len(volatilities) if len(volatilities) > 0 else vol
+    t = lat.lap('vol.news', t)
+
+    assets2, helper = evaluate(session, market, vol)
+
+    t = perf_counter_ns()
+    ot.get_tracker(session).poll()  # fills of orders still working, one batched /orders call
+    tr.trade(session, assets2, helper, vol, news_volatilities, market=market)
+    #tr2.trade(session, assets2, helper, vol, news_volatilities, market=market)
+    lat.lap('vol.trade', t)
+
+    # The chain is overwritten next step, so the log gets copies (and only when TICK is on)
+    log = elog.get_log()
+    if log.enabled(elog.TICK):
+        log.tick("assets", assets=assets2.copy(), helper=helper.copy())
+
+    # import matplotlib.pyplot as plt
+    # y = assets2['last']
+    # plt.plot(y)
+    # plt.plotsize(50, 30)
+    return vol
+
+
+def fetch(session):
+    # Case, securities and news of this cycle in one parallel fetch; the news cursor moves past what it returned
+    global last_newsid
+    market = mst.fetch_state(session, last_newsid)
+    last_newsid = market.last_news_id
+    return market
+
+
+def observe(market):
+    # What the event loop watches: prices and positions of every security, plus new news
+    return market.fingerprint(), market
+
+
 def main():
-    vol = 0.15 #initial volatility estimate
+    state = {'vol': 0.15} #initial volatility estimate
+    elog.configure(path=LOG_FILE, level=LOG_LEVEL, console_level=CONSOLE_LEVEL)
+    lat.configure(export_path=LATENCY_FILE)
+    signal.signal(signal.SIGINT, signal_handler)
 
     with requests.Session() as session:
         session.headers.update(API_KEY)
-        while get_tick(session) < 300 and not shutdown:
-            print(vol)
-            news = get_news(session)
-            
-            #ESTIMATE YOUR VOLATILITY:
-            news_volatilities = None
-            if news:
-                volatilities = Parse.parse_news(news)
-                news_volatilities = volatilities
-                vol = sum(volatilities)/len(volatilities) if len(volatilities) > 0 else vol
-
-            assets = pd.DataFrame(get_s(session))
-            assets2 = assets.drop(columns=['vwap', 'nlv', 'bid_size', 'ask_size', 'volume', 'realized', 'unrealized', 'currency', 
-                                           'total_volume', 'limits', 'is_tradeable', 'is_shortable', 'interest_rate', 'start_period', 'stop_period', 'unit_multiplier', 
-                                           'description', 'unit_multiplier', 'display_unit', 'min_price', 'max_price', 'start_price', 'quoted_decimals', 'trading_fee', 'limit_order_rebate',
-                                           'min_trade_size', 'max_trade_size', 'required_tickers', 'underlying_tickers', 'bond_coupon', 'interest_payments_per_period', 'base_security', 'fixing_ticker',
-                                           'api_orders_per_second', 'execution_delay_ms', 'interest_rate_ticker', 'otc_price_range'])
-            helper = pd.DataFrame(index = range(1),columns = ['share_exposure', 'required_hedge', 'must_be_traded', 'current_pos', 'required_pos', 'SAME?'])
-            assets2['delta'] = np.nan
-            assets2['i_vol'] = np.nan
-            assets2['bsprice'] = np.nan
-            assets2['diffcom'] = np.nan
-            assets2['abs_val'] = np.nan
-            
-            assets2['decision'] = np.nan
-            assets2
-            
-            for row in assets2.index.values:
-                if 'P' in assets2['ticker'].iloc[row]:
-                    assets2['type'].iloc[row] = 'PUT'
-                    market_price = assets2['last'].iloc[row]
-                    
-                    if get_tick(session) < 300:
-                        assets2['delta'].iloc[row] = delta('p', assets2['last'].iloc[0], float(assets2['ticker'].iloc[row][3:5]), 
-                                                           years_r(300, get_tick(session)), 0, vol)
-                        assets2['bsprice'].iloc[row] = bs('p', assets2['last'].iloc[0], float(assets2['ticker'].iloc[row][3:5]), 
-                                                           years_r(300, get_tick(session)), 0, vol)
-                        
-                        # Compute intrinsic make sure the volatility is not below the intrinsic value.
-                        try:
-                            assets2['i_vol'].iloc[row] = iv.implied_volatility(assets2['last'].iloc[row], assets2['last'].iloc[0],
-                                                                      float(assets2['ticker'].iloc[row][3:5]), 0, years_r(300, get_tick(session)),
-                                                                      'p')
-                        except Exception as e:
-                            print(f"Implied volatility error {e}")
-                            assets2['i_vol'].iloc[row] = np.nan
-                        
-                elif 'C' in assets2['ticker'].iloc[row]:
-                    assets2['type'].iloc[row] = 'CALL'
-                    if get_tick(session) < 300:
-                        assets2['delta'].iloc[row] = delta('c', assets2['last'].iloc[0], float(assets2['ticker'].iloc[row][3:5]), 
-                                                           years_r(300, get_tick(session)), 0, vol)
-                        assets2['bsprice'].iloc[row] = bs('c', assets2['last'].iloc[0], float(assets2['ticker'].iloc[row][3:5]), 
-                                                           years_r(300, get_tick(session)), 0, vol)
-                        
-                        # intrinsic = max(float(assets2['ticker'].iloc[row][3:5]) - assets2['last'].iloc[0], 0)
-                        # if assets2['last'].iloc[row] < intrinsic:
-                        #     assets2['i_vol'].iloc[row] = np.nan  # or a default/estimated vol
-                        # else:
-                        try:
-                            assets2['i_vol'].iloc[row] = iv.implied_volatility(assets2['last'].iloc[row], assets2['last'].iloc[0],
-                                                                      float(assets2['ticker'].iloc[row][3:5]), 0, years_r(300, get_tick(session)),
-                                                                      'c')
-                        except Exception as e:
-                            print(f"Implied volatility error {e}")
-                            assets2['i_vol'].iloc[row] = np.nan
-                        
-                if assets2['last'].iloc[row] - assets2['bsprice'].iloc[row] > 0:
-                    assets2['diffcom'].iloc[row] = assets2['last'].iloc[row] - assets2['bsprice'].iloc[row] - 0.02
-                    assets2['abs_val'].iloc[row] = abs(assets2['diffcom'].iloc[row])
-                elif assets2['last'].iloc[row] - assets2['bsprice'].iloc[row] < 0:
-                    assets2['diffcom'].iloc[row] = assets2['last'].iloc[row] - assets2['bsprice'].iloc[row] + 0.02
-                    assets2['abs_val'].iloc[row] = abs(assets2['diffcom'].iloc[row])
-                if assets2['diffcom'].iloc[row] > 0.02: 
-                    assets2['decision'].iloc[row] = 'SELL'
-                elif assets2['diffcom'].iloc[row] < -0.02:
-                    assets2['decision'].iloc[row] = 'BUY'
-                else:
-                    assets2['decision'].iloc[row] = 'NO DECISION'
-                warnings.filterwarnings('ignore')
-                
-            a1 = np.array(assets2['position'].iloc[1:])
-            a2 = np.array(assets2['size'].iloc[1:])
-            a3 = np.array(assets2['delta'].iloc[1:])
-            
-            helper['share_exposure'] = np.nansum(a1 * a2 * a3)
-            helper['required_hedge'] = helper['share_exposure'].iloc[0] * -1
-            helper['must_be_traded'] = helper['required_hedge'] - assets2['position'].iloc[0]
-            if assets2['position'].iloc[0] > 0:
-                helper['current_pos'] = 'LONG'
-            elif assets2['position'].iloc[0] < 0:
-                helper['current_pos'] = 'SHORT'
-            else:
-                helper['current_pos'] = 'NO POSITION'
-            if helper['required_hedge'].iloc[0] > 0:
-                helper['required_pos'] = 'LONG'
-            elif helper['required_hedge'].iloc[0] < 0:
-                helper['required_pos'] = 'SHORT'
-            else:
-                helper['required_pos'] = 'NO POSITION'
-            helper['SAME?'] = (helper['required_pos'] == helper['current_pos'])
-
-            tr.trade(session, assets2, helper, vol, news_volatilities)
-            #tr2.trade(session, assets2, helper, vol, news_volatilities)
-
-            print(assets2.to_markdown(), end='\n'*2)
-            print(helper.to_markdown(), end='\n'*2)
-            
-            # import matplotlib.pyplot as plt
-            # y = assets2['last']
-            # plt.plot(y)
-            # plt.plotsize(50, 30)
-            sleep(0.5)
-
-            #Now, trade using Trading module
-            
+        lat.instrument_session(session)
+        # Strikes, sizes, order limits and expiry, read once for the whole case
+        registry = ir.load_registry(session)
+        elog.get_log().info("instruments", "{underlying} and {options} options, expiry at tick {expiry}",
+                            underlying=registry.underlying, options=int(registry.is_option.sum()),
+                            expiry=registry.expiry_tick)
+
+        def on_change(tick, market):
+            state['vol'] = step(session, market, state['vol'])
+
+        # One MarketState per cycle (also the loop's tick); re-evaluate only when a price, position or the news changes
+        loop = EventLoop(session, observe, on_change, fetch=lambda: fetch(session))
+        loop.run(stop=lambda: shutdown)
+        elog.get_log().info("loop", loop.summary(), **loop.stats())
+        elog.get_log().info("orders", "Order tracker: {report}", report=ot.get_tracker(session).report())
+    lat.dump()
+    elog.get_log().close()
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
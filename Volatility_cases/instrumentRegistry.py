@@ -0,0 +1,130 @@
+"""
+RIT Market Simulator Volatility Trading Case - Instrument Registry
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Everything about the case's instruments that does not change during the
+case, worked out once from /securities (and /case for the expiry) at
+startup: put/call and strike (parsed from the ticker once, RTM48C -> call,
+strike 48), contract size, max_trade_size, trading fee and tick size.
+Instruments are kept in one fixed order - the underlying first, then the
+options as /securities lists them - with per-row arrays in that order
+(is_call, is_put, is_option masks; strikes, sizes, max_trade_sizes, fees,
+tick_sizes), so the option chain, the pricer, Trading and Parse look things
+up instead of slicing ticker strings every tick.
+
+    registry = instrumentRegistry.load_registry(session)   # once, before the loop
+    registry.get('RTM48P').strike, registry.max_trade_size('RTM'), registry.time_to_expiry(tick)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+API = "http://localhost:9999/v1"
+
+EXPIRY_TICK = 300       # the options expire at the end of the case (when /case does not say otherwise)
+TICKS_PER_YEAR = 3600   # 300 ticks are one month
+
+Instrument = namedtuple("Instrument", ["ticker", "type", "is_call", "strike", "size", "max_trade_size",
+                                       "trading_fee", "tick_size"])
+
+
+def parse_ticker(ticker):
+    """(flag, strike) of an option ticker - ('p', 48.0) for RTM48P - or (None, nan) for anything else"""
+    if 'P' in ticker:
+        return 'p', float(ticker[3:5])
+    if 'C' in ticker:
+        return 'c', float(ticker[3:5])
+    return None, np.nan
+
+
+def _instrument(row):
+    flag, strike = parse_ticker(row['ticker'])
+    decimals = row.get('quoted_decimals')
+    return Instrument(row['ticker'], {'c': 'CALL', 'p': 'PUT'}.get(flag, row.get('type', '')), flag == 'c', strike,
+                      row.get('size', 1), row.get('max_trade_size') or np.inf, row.get('trading_fee', 0.0),
+                      10.0 ** -decimals if decimals is not None else np.nan)
+
+
+class InstrumentRegistry:
+    def __init__(self):
+        self.source_tickers = None  # /securities order the registry was built from
+        self.order = ()             # registry row -> /securities row
+        self.tickers = ()           # registry order: the underlying first
+        self.instruments = ()
+        self.by_ticker = {}
+        self.underlying = None
+        self.expiry_tick = EXPIRY_TICK
+        self.is_option = self.is_call = self.is_put = None
+        self.strikes = self.sizes = self.max_trade_sizes = self.fees = self.tick_sizes = None
+
+    def load(self, securities, case=None):
+        """Build every lookup from one /securities payload; `case` (a /case response) sets the expiry tick"""
+        parsed = [_instrument(row) for row in securities]
+        named = {t for row in securities for t in row.get('underlying_tickers') or ()}
+        first = next((i for i, inst in enumerate(parsed) if inst.ticker in named), None)
+        if first is None:
+            first = next((i for i, inst in enumerate(parsed) if inst.type not in ('CALL', 'PUT')), None)
+        order = ([first] if first is not None else []) + [i for i in range(len(parsed)) if i != first]
+
+        self.source_tickers = tuple(row['ticker'] for row in securities)
+        self.order = np.array(order, dtype=int)
+        self.instruments = tuple(parsed[i] for i in order)
+        self.tickers = tuple(inst.ticker for inst in self.instruments)
+        self.by_ticker = {inst.ticker: inst for inst in self.instruments}
+        self.underlying = parsed[first].ticker if first is not None else None
+
+        types = np.array([inst.type for inst in self.instruments])
+        self.is_call = types == 'CALL'
+        self.is_put = types == 'PUT'
+        self.is_option = self.is_call | self.is_put
+        self.strikes = np.array([inst.strike for inst in self.instruments], dtype=float)
+        self.sizes = np.array([inst.size for inst in self.instruments], dtype=float)
+        self.max_trade_sizes = np.array([inst.max_trade_size for inst in self.instruments], dtype=float)
+        self.fees = np.array([inst.trading_fee for inst in self.instruments], dtype=float)
+        self.tick_sizes = np.array([inst.tick_size for inst in self.instruments], dtype=float)
+
+        if case is not None:
+            # Options run until the end of their last period
+            stop = max((row.get('stop_period', 1) for row, inst in zip(securities, parsed)
+                        if inst.type in ('CALL', 'PUT')), default=1)
+            self.expiry_tick = stop * case.get('ticks_per_period', EXPIRY_TICK)
+        return self
+
+    def ensure(self, securities):
+        """Reload (keeping the expiry) only when /securities lists different tickers than last time"""
+        if tuple(row['ticker'] for row in securities) != self.source_tickers:
+            expiry_tick = self.expiry_tick
+            self.load(securities)
+            self.expiry_tick = expiry_tick
+        return self
+
+    def get(self, ticker):
+        """Instrument for a ticker; one the registry was not loaded with is parsed on the spot"""
+        inst = self.by_ticker.get(ticker)
+        return inst if inst is not None else _instrument({'ticker': ticker})
+
+    def max_trade_size(self, ticker):
+        return self.get(ticker).max_trade_size
+
+    def time_to_expiry(self, tick):
+        """Years left on the options at this tick"""
+        return (self.expiry_tick - tick) / TICKS_PER_YEAR
+
+
+# One registry for the case, loaded once at startup
+_registry = InstrumentRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def load_registry(session):
+    """Read /securities and /case once and (re)build the shared registry"""
+    securities = session.get(f"{API}/securities")
+    securities.raise_for_status()
+    case = session.get(f"{API}/case")
+    case.raise_for_status()
+    return _registry.load(securities.json(), case.json())
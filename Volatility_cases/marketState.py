@@ -0,0 +1,86 @@
+"""
+RIT Market Simulator Volatility Trading Case - Market State
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Fetches /case, /securities and new /news items at the same time over one
+keep-alive session and freezes them into a single immutable MarketState, so
+every option of a cycle is priced off the same tick, the same time to expiry
+and the same prices. Nothing downstream (evaluate, Trading, Strategy_2,
+Parse) asks the server for the tick again.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import time_ns
+from types import MappingProxyType
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Common"))
+import latencyMonitor as lat
+import instrumentRegistry as ir
+
+API = "http://localhost:9999/v1"
+
+# Flag a state whose three responses were received further apart than this
+MAX_STATE_SKEW_MS = 50.0
+
+# One worker per endpoint, so all three requests are in flight together
+_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="state")
+
+
+@dataclass(frozen=True)
+class MarketState:
+    """Case, securities and news of one cycle, fetched together"""
+    tick: int
+    status: str
+    securities: tuple             # /securities rows, in server order (the underlying first)
+    news: tuple                   # news items newer than the cursor the state was fetched with
+    since_news_id: int            # that cursor
+    received_ns: MappingProxyType  # endpoint -> receive time (time_ns)
+    sent_ns: int                  # when the requests were fired
+
+    @property
+    def time_to_expiry(self):
+        """Years left on the options at this tick (expiry from the instrument registry)"""
+        return ir.get_registry().time_to_expiry(self.tick)
+
+    @property
+    def last_news_id(self):
+        """Cursor for the next fetch"""
+        return max((item['news_id'] for item in self.news), default=self.since_news_id)
+
+    @property
+    def skew_ms(self):
+        """Spread between the first and last response receive times"""
+        times = self.received_ns.values()
+        return (max(times) - min(times)) / 1e6
+
+    @property
+    def stale(self):
+        """True when the responses are too far apart to be one moment of the market (the tick may have moved)"""
+        return self.skew_ms > MAX_STATE_SKEW_MS
+
+    def fingerprint(self):
+        """Hashable summary for the event loop: tick, news and every price and position"""
+        return (self.tick, self.last_news_id, tuple((row['last'], row['position']) for row in self.securities))
+
+
+def _fetch(session, path, params=None):
+    r = session.get(f"{API}{path}", params=params)
+    r.raise_for_status()
+    return r.json(), time_ns()
+
+
+@lat.timed("vol.fetch_state")
+def fetch_state(session, since_news_id=0):
+    """Request case, securities and news in parallel and return one MarketState"""
+    sent_ns = time_ns()
+    case = _pool.submit(_fetch, session, "/case")
+    securities = _pool.submit(_fetch, session, "/securities")
+    news = _pool.submit(_fetch, session, "/news", {"since": since_news_id})
+
+    (case, case_ns), (securities, securities_ns), (news, news_ns) = case.result(), securities.result(), news.result()
+    return MarketState(case['tick'], case['status'], tuple(securities), tuple(news or ()), since_news_id,
+                       MappingProxyType({"case": case_ns, "securities": securities_ns, "news": news_ns}), sent_ns)
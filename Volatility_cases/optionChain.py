@@ -0,0 +1,80 @@
+"""
+RIT Market Simulator Volatility Trading Case - Option Chain
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+The underlying and every option of the case in one NumPy structured array,
+one row per instrument in the instrument registry's order (the underlying
+first, whatever order /securities lists them in). The array is allocated
+when the chain is first seen, with type and size from the registry, and
+afterwards only overwritten in place: update() copies the few /securities
+fields that move, and evaluate() writes the pricing columns. The hedge
+summary lives in a one-record array next to it.
+
+    chain = optionChain.get_chain()
+    chain.update(market.securities)
+    chain.rows['last'], chain.options['delta'], chain.underlying['position'], chain.hedge['must_be_traded']
+
+Rows and views are reused on the next update; copy() them to keep a cycle's values.
+"""
+
+import numpy as np
+
+import instrumentRegistry as ir
+
+# Per instrument: what /securities says, then what evaluate() works out
+ROW_DTYPE = np.dtype([
+    ('ticker', 'U16'), ('type', 'U8'), ('size', 'i8'), ('position', 'i8'),
+    ('last', 'f8'), ('bid', 'f8'), ('ask', 'f8'),
+    ('delta', 'f8'), ('i_vol', 'f8'), ('bsprice', 'f8'), ('diffcom', 'f8'), ('abs_val', 'f8'),
+    ('decision', 'U11'),
+])
+
+# Fields copied from every /securities response (type and size are the registry's)
+SECURITY_FIELDS = ('position', 'last', 'bid', 'ask')
+
+# Share hedge of the whole option book
+HEDGE_DTYPE = np.dtype([
+    ('share_exposure', 'f8'), ('required_hedge', 'f8'), ('must_be_traded', 'f8'),
+    ('current_pos', 'U11'), ('required_pos', 'U11'), ('same', '?'),
+])
+
+
+class OptionChain:
+    def __init__(self):
+        self.source_tickers = None  # /securities order the array was allocated for
+        self.tickers = None  # row order: the registry's
+        self.order = None    # row -> /securities row
+        self.rows = None     # structured array, ROW_DTYPE
+        self.underlying = None
+        self.options = None
+        self._hedge = np.zeros(1, dtype=HEDGE_DTYPE)
+        self.hedge = self._hedge[0]  # record view: hedge['required_hedge'] = x writes through
+
+    def _allocate(self, securities, source_tickers):
+        registry = ir.get_registry().ensure(securities)
+        rows = np.zeros(len(registry.tickers), dtype=ROW_DTYPE)
+        rows['ticker'] = registry.tickers
+        rows['type'] = [inst.type for inst in registry.instruments]
+        rows['size'] = registry.sizes
+        self.source_tickers, self.tickers, self.order, self.rows = source_tickers, registry.tickers, registry.order, rows
+        self.underlying = rows[0]   # record view of the first row
+        self.options = rows[1:]     # view, no copy
+
+    def update(self, securities):
+        """Overwrite the market fields in place (reallocating only when the list of tickers changes)"""
+        source_tickers = tuple(sec['ticker'] for sec in securities)
+        if source_tickers != self.source_tickers:
+            self._allocate(securities, source_tickers)
+        rows, ordered = self.rows, [securities[i] for i in self.order]
+        for field in SECURITY_FIELDS:
+            rows[field] = [sec[field] for sec in ordered]
+        return self
+
+
+# One chain for the case, reused every cycle
+_chain = OptionChain()
+
+
+def get_chain():
+    return _chain
@@ -0,0 +1,190 @@
+"""
+RIT Market Simulator Volatility Trading Case - Option Pricing
+Rotman BMO Finance Research and Trading Lab, University of Toronto (C)
+All rights reserved.
+
+Black-Scholes price, delta, gamma and vega for the whole option chain in
+one NumPy call, instead of py_vollib's scalar bs()/delta() once per row.
+Strikes and put/call flags come from the instrument registry once per
+chain, and the last result is kept: when spot, vol and
+time to expiry are the same as on the previous call (an unchanged tick),
+the arrays are returned as they are.
+
+    greeks = optionPricing.price_chain(tickers, spot, market.time_to_expiry, vol)
+    greeks.price, greeks.delta, greeks.gamma, greeks.vega   # one entry per ticker, NaN for non-options
+
+Vega is per unit of volatility (py_vollib's analytical vega is per 1%).
+
+Implied volatilities are inverted for the whole chain at once as well:
+Newton steps on every unsolved option together, falling back to bisection
+for any option whose step leaves its bracket. Each option starts from its
+own implied volatility of the previous tick, so a quiet tick converges in
+a step or two. Prices outside the no-arbitrage bounds come back as NaN.
+
+    i_vol = optionPricing.get_pricer().implied_vols(tickers, last, spot, market.time_to_expiry)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from scipy.special import ndtr  # vectorized standard normal CDF
+
+import instrumentRegistry as ir
+
+Greeks = namedtuple("Greeks", ["price", "delta", "gamma", "vega"])
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+IV_MIN, IV_MAX = 1e-6, 5.0   # bracket every implied volatility starts in
+IV_START = 0.3               # first guess for options without a previous tick
+IV_TOL = 1e-10               # price error that counts as solved
+IV_MAX_ITER = 100            # bisection alone needs ~40 steps on [IV_MIN, IV_MAX]
+
+
+def black_scholes(is_call, S, K, t, r, sigma):
+    """Price, delta, gamma and vega for arrays of strikes and put/call flags (S, t, r, sigma broadcast)"""
+    K = np.asarray(K, dtype=float)
+    is_call = np.asarray(is_call, dtype=bool)
+    sqrt_t = np.sqrt(t)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    discount = np.exp(-r * t)
+    nd1, nd2 = ndtr(d1), ndtr(d2)
+    pdf = np.exp(-0.5 * d1 * d1) / _SQRT_2PI
+
+    call = S * nd1 - K * discount * nd2
+    price = np.where(is_call, call, call - S + K * discount)  # put-call parity
+    delta = np.where(is_call, nd1, nd1 - 1.0)
+    gamma = pdf / (S * sigma * sqrt_t)
+    vega = S * pdf * sqrt_t
+    return Greeks(price, delta, gamma, vega)
+
+
+def _price_vega(is_call, S, K, t, r, sigma):
+    """Just the price and vega black_scholes() would give, for the solver's inner loop"""
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    discount = np.exp(-r * t)
+    call = S * ndtr(d1) - K * discount * ndtr(d1 - sigma * sqrt_t)
+    return np.where(is_call, call, call - S + K * discount), S * np.exp(-0.5 * d1 * d1) / _SQRT_2PI * sqrt_t
+
+
+def implied_vol(price, is_call, S, K, t, r=0.0, guess=None, tol=IV_TOL, max_iter=IV_MAX_ITER):
+    """
+    Implied volatilities for arrays of option prices and strikes (S, t and r scalars).
+    Returns (iv, valid): valid is False, and iv NaN, where the price is outside the
+    no-arbitrage bounds or did not converge.
+    """
+    price = np.asarray(price, dtype=float)
+    K = np.asarray(K, dtype=float)
+    is_call = np.asarray(is_call, dtype=bool)
+    discount = np.exp(-r * t)
+    lower = np.where(is_call, np.maximum(S - K * discount, 0.0), np.maximum(K * discount - S, 0.0))
+    upper = np.where(is_call, S, K * discount)
+    # Within tol of a bound there is no volatility to find (a price at intrinsic value, down to float noise)
+    valid = np.isfinite(price) & (price > lower + tol) & (price < upper - tol)
+
+    lo = np.full(price.shape, IV_MIN)
+    hi = np.full(price.shape, IV_MAX)
+    sigma = np.full(price.shape, IV_START)
+    if guess is not None:
+        guess = np.asarray(guess, dtype=float)
+        warm = np.isfinite(guess) & (guess > IV_MIN) & (guess < IV_MAX)
+        sigma[warm] = guess[warm]
+
+    todo = np.flatnonzero(valid)
+    for _ in range(max_iter):
+        if not todo.size:
+            break
+        s = sigma[todo]
+        model, vega = _price_vega(is_call[todo], S, K[todo], t, r, s)
+        diff = model - price[todo]
+        solved = np.abs(diff) < tol
+        # Price rises with volatility, so every guess tightens the bracket
+        hi[todo] = np.where(diff > 0, s, hi[todo])
+        lo[todo] = np.where(diff < 0, s, lo[todo])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = s - diff / vega
+        bisect = ~np.isfinite(step) | (step <= lo[todo]) | (step >= hi[todo])
+        sigma[todo] = np.where(solved, s, np.where(bisect, 0.5 * (lo[todo] + hi[todo]), step))
+        todo = todo[~solved]
+    valid[todo] = False  # never got within tol
+
+    return np.where(valid, sigma, np.nan), valid
+
+
+class ChainPricer:
+    def __init__(self):
+        self.tickers = None   # chain the strikes/flags belong to
+        self.is_call = None
+        self.strikes = None
+        self.is_option = None
+        self.key = None       # (tickers, spot, t, vol, r) of the cached result
+        self.greeks = None
+        self.hits = 0
+        self.misses = 0
+        self.iv_key = None    # (tickers, prices, spot, t, r) of the cached implied volatilities
+        self.iv = None        # also the warm start of the next solve
+        self.iv_valid = None
+
+    def _parse(self, tickers):
+        registry = ir.get_registry()
+        if registry.tickers != tickers:
+            registry = ir.InstrumentRegistry().load([{'ticker': t} for t in tickers])  # a chain of its own
+        self.tickers = tickers
+        self.is_call = registry.is_call
+        self.is_option = registry.is_option
+        self.strikes = registry.strikes
+        self.iv_key, self.iv, self.iv_valid = None, None, None  # no warm start across chains
+
+    def chain(self, tickers):
+        """Strikes and flags of this chain in is_call/is_option/strikes, looked up once per list of tickers"""
+        tickers = tuple(tickers)
+        if tickers != self.tickers:
+            self._parse(tickers)
+        return self
+
+    def price(self, tickers, spot, t, vol, r=0.0):
+        """Greeks for every ticker (NaN where it is not an option); reused while the inputs are unchanged"""
+        tickers = tuple(tickers)
+        key = (tickers, spot, t, vol, r)
+        if key == self.key:
+            self.hits += 1
+            return self.greeks
+        self.misses += 1
+        self.chain(tickers)
+
+        greeks = black_scholes(self.is_call, spot, self.strikes, t, r, vol)
+        greeks = Greeks(*(np.where(self.is_option, g, np.nan) for g in greeks))
+        for g in greeks:
+            g.flags.writeable = False  # shared with the next caller on a cache hit
+        self.key, self.greeks = key, greeks
+        return greeks
+
+    def implied_vols(self, tickers, prices, spot, t, r=0.0):
+        """Implied volatility for every ticker (NaN for non-options and unsolvable prices), solved once per tick"""
+        tickers = tuple(tickers)
+        prices = np.asarray(prices, dtype=float)
+        key = (tickers, prices.tobytes(), spot, t, r)
+        if key == self.iv_key:
+            return self.iv
+        self.chain(tickers)
+
+        iv, valid = implied_vol(prices, self.is_call, spot, self.strikes, t, r, guess=self.iv)
+        valid &= self.is_option
+        iv[~valid] = np.nan
+        iv.flags.writeable = False
+        self.iv_key, self.iv, self.iv_valid = key, iv, valid
+        return iv
+
+
+# One pricer for the case, so an unchanged tick reuses the previous chain
+_pricer = ChainPricer()
+
+
+def get_pricer():
+    return _pricer
+
+
+price_chain = _pricer.price
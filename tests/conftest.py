@@ -0,0 +1,11 @@
+"""
+The case scripts import their siblings and Common/ by bare name, as they do
+when run from their own directory; put all three directories on the path.
+"""
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+for directory in ("Common", "Arbitrage_cases", "Volatility_cases"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,147 @@
+"""ArbitrageTrader against a gateway whose legs can fail or fill short"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+import arbTrading as arb
+import backtest as bt
+from executionGateway import LegResult, PackageResult
+from marketRecorder import ACTION_CODE, TICKER_CODE, MarketRecorder, RecordedSession
+from tenderEngine import TenderDecision
+
+
+class FakeGateway:
+    """First package fills each leg up to `fills` (short legs fail); later ones fill in full"""
+    def __init__(self, fills):
+        self.fills = fills
+        self.sent = []
+
+    def submit_package(self, legs, order_type="MARKET", price=None, priority=None):
+        fills, self.fills = self.fills, {}
+        self.sent.append(list(legs))
+        results = []
+        for ticker, action, qty in legs:
+            filled = min(qty, fills.get(ticker, qty))
+            results.append(LegResult(ticker, action, qty, filled, errors=["rejected"] if filled < qty else []))
+        return PackageResult(results)
+
+
+def make_trader(fills):
+    trader = arb.ArbitrageTrader(bt.SimExchange(), scheduler=bt.InlineScheduler())
+    trader.gateway = FakeGateway(fills)
+    trader.last_prices = {"bull_bid": 10.0, "bull_ask": 10.02, "bear_bid": 10.0, "bear_ask": 10.02,
+                          "ritc_bid_usd": 20.0, "ritc_ask_usd": 20.02, "usd_bid": 1.0, "usd_ask": 1.0}
+    return trader
+
+
+def package(direction, qty):
+    signed = qty if direction == "basket_rich" else -qty
+    return {"type": direction, "ritc_qty": signed, "bull_qty": -signed, "bear_qty": -signed}
+
+
+def test_failed_market_close_keeps_the_unclosed_packages():
+    trader = make_trader({arb.RITC: 60})
+    first, second = package("basket_rich", 100), package("basket_rich", 50)
+    trader.arb_positions.append(first)
+    trader.arb_positions.append(second)
+
+    # A wide edge makes the market cheaper than a converter use
+    trader.close_packages(list(trader.arb_positions), {"edge1": 1.0, "edge2": 1.0})
+
+    close, unwind = trader.gateway.sent
+    assert close == [(arb.BULL, "BUY", 150), (arb.BEAR, "BUY", 150), (arb.RITC, "SELL", 150)]
+    assert unwind == [(arb.BULL, "SELL", 90), (arb.BEAR, "SELL", 90)]  # basket bought beyond the RITC sold
+    assert list(trader.arb_positions) == [first, second]
+    assert first["ritc_qty"] == 40 and second["ritc_qty"] == 50
+    assert trader.arb_positions.net_ritc() == 90
+
+
+def test_market_close_removes_the_packages():
+    trader = make_trader({})
+    trader.arb_positions.append(package("etf_rich", 100))
+
+    trader.close_packages(list(trader.arb_positions), {"edge1": 1.0, "edge2": 1.0})
+
+    assert trader.gateway.sent == [[(arb.BULL, "SELL", 100), (arb.BEAR, "SELL", 100), (arb.RITC, "BUY", 100)]]
+    assert len(trader.arb_positions) == 0
+
+
+class TenderSession:
+    """Takes every tender"""
+    def post(self, url, params=None):
+        return bt.SimResponse({"success": True})
+
+    def delete(self, url, params=None):
+        return bt.SimResponse({"success": True})
+
+
+def accept_buy_tender(monkeypatch, fills):
+    trader = make_trader(fills)
+    trader.session = TenderSession()
+    trader.get_positions = lambda: {arb.BULL: 0, arb.BEAR: 0, arb.RITC: 0, arb.USD: 0}
+    decision = TenderDecision(7, True, None, 500.0, 0.05, book_qty=400, convert_qty=600)
+    monkeypatch.setattr(arb, "evaluate_tenders", lambda offers, depth: [decision])
+    offer = {"tender_id": 7, "action": "BUY", "quantity": 1000, "price": 20.0}
+    trader.handle_tenders([offer], SimpleNamespace(depth=None))
+    return trader
+
+
+def test_tender_unwind_books_a_package_for_the_hedged_basket(monkeypatch):
+    trader = accept_buy_tender(monkeypatch, {})
+
+    assert trader.gateway.sent == [[(arb.RITC, "SELL", 400), (arb.BULL, "SELL", 600), (arb.BEAR, "SELL", 600)]]
+    package, = trader.arb_positions
+    assert (package["type"], package["ritc_qty"], package["bull_qty"]) == ("basket_rich", 600, -600)
+
+
+def test_failed_tender_hedge_books_only_what_filled(monkeypatch):
+    trader = accept_buy_tender(monkeypatch, {arb.BULL: 250, arb.BEAR: 0})
+
+    assert trader.gateway.sent[1] == [(arb.BULL, "BUY", 250)]  # lone basket leg squared
+    assert len(trader.arb_positions) == 0
+
+
+def test_partly_filled_tender_hedge_sizes_the_package_from_both_legs(monkeypatch):
+    trader = accept_buy_tender(monkeypatch, {arb.BULL: 500, arb.BEAR: 300})
+
+    assert trader.gateway.sent[1] == [(arb.BULL, "BUY", 200)]
+    package, = trader.arb_positions
+    assert (package["ritc_qty"], package["bull_qty"], package["bear_qty"]) == (300, -300, -300)
+
+
+def test_leaving_passive_mode_pulls_the_resting_quotes():
+    exchange = bt.SimExchange()
+    trader = arb.ArbitrageTrader(exchange, dict(arb.DEFAULT_PARAMS, execution_mode="passive", passive_threshold=-10.0),
+                                 scheduler=bt.InlineScheduler())
+    stream = iter(bt.synthetic_stream(seed=3, ticks=20))
+    for tick, snapshot in stream:
+        exchange.set_snapshot(tick, snapshot)
+        trader.trade(exchange, *(q for t in bt.TICKERS for q in snapshot.best_bid_ask(t)), snapshot=snapshot)
+        if trader.quoter.working:
+            break
+    assert any(o["ticker"] == arb.RITC for o in exchange.open_orders.values())
+
+    trader.execution_mode = "market"
+    tick, snapshot = next(stream)
+    exchange.set_snapshot(tick, snapshot)
+    trader.trade(exchange, *(q for t in bt.TICKERS for q in snapshot.best_bid_ask(t)), snapshot=snapshot)
+    assert not trader.quoter.working
+    assert not exchange.open_orders
+
+
+def test_recorder_gets_every_fill_including_passive_ones(tmp_path):
+    exchange = bt.SimExchange()
+    trader = arb.ArbitrageTrader(exchange, dict(arb.DEFAULT_PARAMS, execution_mode="passive", passive_threshold=-10.0),
+                                 scheduler=bt.InlineScheduler())
+    trader.recorder = MarketRecorder(str(tmp_path))
+    for tick, snapshot in bt.synthetic_stream(seed=3, ticks=40):
+        exchange.set_snapshot(tick, snapshot)
+        trader.trade(exchange, *(q for t in bt.TICKERS for q in snapshot.best_bid_ask(t)), snapshot=snapshot)
+    trader.recorder.close()
+
+    fills = RecordedSession(str(tmp_path)).fills
+    signed = np.where(fills["action"] == ACTION_CODE["BUY"], fills["quantity"], -fills["quantity"])
+    for ticker in (arb.BULL, arb.BEAR, arb.RITC):
+        assert signed[fills["ticker"] == TICKER_CODE[ticker]].sum() == trader.tracker.positions[ticker]
+    assert (fills["ticker"] == TICKER_CODE[arb.RITC]).any()
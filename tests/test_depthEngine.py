@@ -0,0 +1,67 @@
+"""Depth-walk sizing against hand-computed book sweeps"""
+
+import math
+
+import numpy as np
+import pytest
+
+from depthEngine import BEAR, BULL, RITC, USD, BookSide, DepthBook, size_arbitrage
+
+
+def levels(*pairs):
+    return [{"price": price, "quantity": qty} for price, qty in pairs]
+
+
+def books(usd_bid=1.0, usd_ask=1.0):
+    # Basket bids worth 20.20 for the first 200, 20.00 after; RITC offered at 20.00 USD for 400
+    deep = 10 ** 9
+    return {
+        BULL: {"bids": levels((10.10, 200), (10.00, 200)), "asks": levels((10.20, 1000))},
+        BEAR: {"bids": levels((10.10, 200), (10.00, 200)), "asks": levels((10.20, 1000))},
+        RITC: {"bids": levels((20.00, 1000)), "asks": levels((20.00, 400))},
+        USD: {"bids": levels((usd_bid, deep)), "asks": levels((usd_ask, deep))},
+    }
+
+
+def test_fill_value_walks_the_levels():
+    side = BookSide([{"price": 10.0, "quantity": 150, "quantity_filled": 50}, {"price": 9.9, "quantity": 200}])
+    value = side.fill_value([50, 100, 150, 300, 301])
+    assert value[:4] == pytest.approx([500.0, 1000.0, 1495.0, 2980.0])
+    assert math.isnan(value[4])  # beyond the visible depth
+    assert side.depth == 300
+
+
+def test_empty_side_has_no_fill_value():
+    assert np.isnan(BookSide([]).fill_value([1, 100])).all()
+
+
+def test_edges_per_share_at_each_size():
+    edge1, edge2 = DepthBook(books()).edges([100, 200, 300, 400, 500])
+    assert edge1[:4] == pytest.approx([0.2, 0.2, 40 / 300, 0.1])
+    assert math.isnan(edge1[4])
+    assert edge2 == pytest.approx([-0.4] * 5)
+
+
+def test_ritc_leg_is_converted_through_the_usd_book():
+    edge1, edge2 = DepthBook(books(usd_bid=0.99, usd_ask=1.01)).edges([100])
+    assert edge1[0] == pytest.approx(20.2 - 20.0 * 1.01)
+    assert edge2[0] == pytest.approx(20.0 * 0.99 - 20.4)
+
+
+@pytest.mark.parametrize("threshold, qty, net_edge", [
+    (0.10, 200, 0.14),             # only the top of the basket bids clears
+    (0.05, 300, 40 / 300 - 0.06),  # one level deeper
+    (0.00, 400, 0.04),             # all of the RITC offer; 500 runs out of depth
+])
+def test_size_arbitrage_takes_the_largest_clearing_size(threshold, qty, net_edge):
+    sized = size_arbitrage(DepthBook(books()), threshold, fee=0.02, max_qty=600)
+    assert sized["qty1"] == qty
+    assert sized["net_edge1"] == pytest.approx(net_edge)
+    assert sized["qty2"] == 0 and math.isnan(sized["net_edge2"])
+
+
+def test_size_arbitrage_takes_a_threshold_per_direction():
+    sized = size_arbitrage(DepthBook(books()), (0.10, -1.0), fee=0.02, max_qty=600)
+    assert sized["qty1"] == 200
+    assert sized["qty2"] == 600
+    assert sized["net_edge2"] == pytest.approx(-0.46)
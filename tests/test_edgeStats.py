@@ -0,0 +1,101 @@
+"""Rolling edge statistics against a full recomputation over the same window"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+import marketSnapshot as ms
+from edgeStats import EdgeStats, RollingStats
+
+
+def ar1_series(n, phi, seed=1, mean=0.1, noise=0.02):
+    rng = random.Random(seed)
+    x, out = mean, []
+    for _ in range(n):
+        x = mean + phi * (x - mean) + rng.gauss(0.0, noise)
+        out.append(x)
+    return out
+
+
+@pytest.mark.parametrize("n", [1, 2, 37, 50, 51, 149, 1000])  # before, at and past the window and the rebuild
+def test_mean_std_and_quantiles_match_the_window(n):
+    window = 50
+    xs = ar1_series(n, 0.8)
+    stats = RollingStats(window)
+    for x in xs:
+        stats.push(x)
+
+    last = np.array(xs[-window:])
+    assert stats.values() == list(last)
+    assert stats.mean == pytest.approx(last.mean(), abs=1e-12)
+    assert stats.std == pytest.approx(last.std(ddof=1) if len(last) > 1 else 0.0, abs=1e-12)
+    for q in (0.0, 0.05, 0.5, 0.95, 1.0):
+        assert stats.quantile(q) == pytest.approx(np.quantile(last, q), abs=1e-12)
+
+
+def test_lag_one_fit_matches_least_squares_over_the_window():
+    xs = ar1_series(700, 0.9)
+    stats = RollingStats(300)
+    for x in xs:
+        stats.push(x)
+
+    window = np.array(xs[-300:])
+    slope = np.polyfit(window[:-1], window[1:], 1)[0]
+    assert stats.ar1 == pytest.approx(slope, rel=1e-9)
+    assert stats.half_life == pytest.approx(-math.log(2) / math.log(slope), rel=1e-9)
+
+
+def test_half_life_recovers_the_reversion_speed():
+    stats = RollingStats(5000)
+    for x in ar1_series(5000, 0.9, seed=7):
+        stats.push(x)
+    assert stats.half_life == pytest.approx(-math.log(2) / math.log(0.9), rel=0.15)  # ~6.6 observations
+
+
+def test_trending_series_never_reverts():
+    stats = RollingStats(100)
+    for i in range(100):
+        stats.push(i * 0.01)
+    assert stats.half_life == math.inf
+
+
+def test_empty_window():
+    stats = RollingStats(10)
+    assert math.isnan(stats.quantile(0.5))
+    assert stats.std == 0.0
+    assert math.isnan(stats.ar1)
+
+
+def test_non_finite_edges_are_skipped():
+    edges = EdgeStats(10)
+    assert edges.update(0.1, -0.1)
+    assert not edges.update(math.nan, -0.1)
+    assert not edges.update(0.1, -math.inf)
+    assert edges.count == 1
+    assert edges["basket_rich"].values() == [0.1]
+    assert edges["etf_rich"].values() == [-0.1]
+
+
+def test_empty_book_side_is_one_sided():
+    assert ms.one_sided(ms.EMPTY_BID, 25.0)
+    assert ms.one_sided(24.9, ms.EMPTY_ASK)
+    assert not ms.one_sided(24.9, 25.0)
+
+
+def test_trader_keeps_empty_book_sides_out_of_the_statistics():
+    import arbTrading as arb
+    import backtest as bt
+
+    exchange = bt.SimExchange()
+    trader = arb.ArbitrageTrader(exchange, scheduler=bt.InlineScheduler())
+    (tick, snapshot), = bt.synthetic_stream(seed=3, ticks=1)
+    books = dict(snapshot.books)
+    books[arb.RITC] = dict(books[arb.RITC], asks=[])
+    for snap in (snapshot, bt._snapshot(books)):
+        exchange.set_snapshot(tick, snap)
+        trader.trade(exchange, *(q for t in bt.TICKERS for q in snap.best_bid_ask(t)), snapshot=snap)
+
+    assert trader.edge_stats.count == 1
+    assert abs(trader.edge_stats["basket_rich"].mean) < 10  # not pulled towards -1e12
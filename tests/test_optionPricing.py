@@ -0,0 +1,61 @@
+"""Implied volatilities recovered from Black-Scholes prices"""
+
+import numpy as np
+import pytest
+
+import optionPricing as op
+
+S, T, R = 50.0, 0.25, 0.01
+STRIKES = np.array([45.0, 48.0, 50.0, 52.0, 55.0] * 2)
+IS_CALL = np.array([True] * 5 + [False] * 5)
+
+
+def test_round_trip_across_the_chain():
+    sigma = np.linspace(0.15, 0.6, len(STRIKES))
+    price = op.black_scholes(IS_CALL, S, STRIKES, T, R, sigma).price
+
+    iv, valid = op.implied_vol(price, IS_CALL, S, STRIKES, T, R)
+    assert valid.all()
+    assert iv == pytest.approx(sigma, abs=1e-8)
+
+
+def test_prices_outside_the_bounds_are_nan():
+    K = np.array([45.0, 45.0, 55.0, 55.0, 50.0])
+    is_call = np.array([True, True, False, False, True])
+    discount = np.exp(-R * T)
+    price = np.array([
+        S - 45.0 * discount - 0.01,  # call below intrinsic value
+        S + 0.01,                    # call above the share
+        55.0 * discount - S - 0.01,  # put below intrinsic value
+        55.0 * discount + 0.01,      # put above the discounted strike
+        np.nan,                      # no last price
+    ])
+
+    iv, valid = op.implied_vol(price, is_call, S, K, T, R)
+    assert not valid.any()
+    assert np.isnan(iv).all()
+
+
+def test_warm_start_converges_where_a_cold_start_cannot():
+    sigma = np.full(len(STRIKES), 0.45)
+    price = op.black_scholes(IS_CALL, S, STRIKES, T, R, sigma).price
+
+    _, cold = op.implied_vol(price, IS_CALL, S, STRIKES, T, R, max_iter=1)
+    warm_iv, warm = op.implied_vol(price, IS_CALL, S, STRIKES, T, R, guess=sigma + 1e-12, max_iter=1)
+    assert not cold.any()
+    assert warm.all()
+    assert warm_iv == pytest.approx(sigma, abs=1e-8)
+
+
+def test_pricer_solves_options_only_once_per_tick():
+    tickers = ("RTM", "RTM48C", "RTM50P")
+    sigma = np.array([np.nan, 0.2, 0.3])
+    price = op.black_scholes([False, True, False], S, [np.nan, 48.0, 50.0], T, R, sigma).price
+    price[0] = S  # the underlying's last price
+
+    pricer = op.ChainPricer()
+    iv = pricer.implied_vols(tickers, price, S, T, R)
+    assert np.isnan(iv[0])
+    assert iv[1:] == pytest.approx(sigma[1:], abs=1e-8)
+    assert pricer.implied_vols(tickers, price, S, T, R) is iv  # same tick: cached
+    np.testing.assert_array_equal(pricer.iv_valid, [False, True, True])
@@ -0,0 +1,45 @@
+"""Priority order and per-ticker pacing of the shared order scheduler"""
+
+from threading import Lock
+from time import monotonic
+
+import orderScheduler as osch
+
+
+def scheduler_with(limits):
+    scheduler = osch.OrderScheduler(session=None, max_workers=1)
+    scheduler.load_limits([{"ticker": t, "api_orders_per_second": rate} for t, rate in limits.items()])
+    return scheduler
+
+
+def test_most_urgent_first_while_throttled():
+    scheduler = scheduler_with({"A": 5})
+    sent, lock = [], Lock()
+
+    def send(name):
+        def fn():
+            with lock:
+                sent.append(name)
+        return fn
+
+    for f in [scheduler.submit("A", send("burst")) for _ in range(5)]:  # uses up the bucket
+        f.result(timeout=5)
+    queued = [scheduler.submit("A", send(name), priority) for name, priority in
+              (("open", osch.PRIORITY_OPEN), ("close", osch.PRIORITY_CLOSE), ("hedge", osch.PRIORITY_HEDGE),
+               ("open-2", osch.PRIORITY_OPEN))]
+    for f in queued:
+        f.result(timeout=5)
+    assert sent[5:] == ["hedge", "close", "open", "open-2"]
+    assert scheduler.queue_depth() == 0
+
+
+def test_throttled_ticker_is_overtaken_and_paced():
+    scheduler = scheduler_with({"SLOW": 5, "FAST": 0})
+    start = monotonic()
+    slow = [scheduler.submit("SLOW", monotonic, osch.PRIORITY_HEDGE) for _ in range(7)]  # 5 burst, then 5/s
+    fast = scheduler.submit("FAST", monotonic, osch.PRIORITY_OPEN)
+
+    times = [f.result(timeout=5) - start for f in slow]
+    assert fast.result(timeout=5) - start < times[-1]  # did not wait behind SLOW's throttle
+    assert times[-1] >= 0.35                             # two orders past the burst at 5/s
+    assert scheduler.metrics()["sent"] == 8
@@ -0,0 +1,146 @@
+"""OrderTracker fill deltas and their interaction with the arbitrage PositionLedger"""
+
+from urllib.parse import urlparse
+
+import pytest
+
+from orderTracker import OrderTracker
+from positionLedger import PositionLedger
+
+
+class Response:
+    def __init__(self, payload, ok=True):
+        self.payload = payload
+        self.ok = ok
+        self.status_code = 200 if ok else 400
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        assert self.ok
+
+
+class FakeServer:
+    """Orders and positions, with fills applied by the test (a resting order filling between requests)"""
+
+    def __init__(self):
+        self.orders = {}
+        self.positions = {"RITC": 0}
+        self.requests = []
+
+    def submit(self, ticker, action, qty, filled=0, vwap=None):
+        order_id = len(self.orders) + 1
+        self.orders[order_id] = {"order_id": order_id, "ticker": ticker, "action": action, "quantity": qty,
+                                 "quantity_filled": 0, "vwap": None, "status": "OPEN"}
+        if filled:
+            self.fill(order_id, filled, vwap)
+        return Response(dict(self.orders[order_id]))
+
+    def fill(self, order_id, qty, price):
+        order = self.orders[order_id]
+        done = order["quantity_filled"]
+        order["vwap"] = ((order["vwap"] or 0.0) * done + price * qty) / (done + qty)
+        order["quantity_filled"] = done + qty
+        if order["quantity_filled"] == order["quantity"]:
+            order["status"] = "TRANSACTED"
+        self.positions[order["ticker"]] += qty if order["action"] == "BUY" else -qty
+
+    def get(self, url, params=None):
+        path = urlparse(url).path
+        self.requests.append((path, (params or {}).get("status")))
+        if path.endswith("/securities"):
+            return Response([{"ticker": t, "position": q} for t, q in self.positions.items()])
+        if "/orders/" in path:
+            return Response(dict(self.orders[int(path.rsplit("/", 1)[1])]))
+        status = (params or {}).get("status")
+        return Response([dict(o) for o in self.orders.values() if o["status"] == status])
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+@pytest.fixture
+def ledger(server):
+    return PositionLedger(server)
+
+
+@pytest.fixture
+def tracker(server, ledger):
+    fills = []
+
+    def on_fill(ticker, action, qty, price, order_id):
+        fills.append((ticker, action, qty, price))
+        ledger.apply_order_fill(order_id, ticker, action, qty)
+    tracker = OrderTracker(server, on_fill=on_fill, poll_seconds=0)
+    tracker.fills = fills
+    return tracker
+
+
+def ack(server, tracker, ledger, ticker, action, qty, **fill):
+    # what ArbitrageTrader.on_order_ack does with a gateway acknowledgement
+    order = tracker.on_order_ack(ticker, action, qty, server.submit(ticker, action, qty, **fill))
+    ledger.track_order(order.order_id)
+    return order
+
+
+def test_fills_are_reported_once_as_deltas_with_their_own_price(server, tracker, ledger):
+    order = ack(server, tracker, ledger, "RITC", "BUY", 300, filled=100, vwap=10.0)
+    server.fill(order.order_id, 200, 10.3)
+    tracker.poll()
+    tracker.poll()
+
+    assert tracker.fills == [("RITC", "BUY", 100, 10.0), ("RITC", "BUY", 200, pytest.approx(10.3))]
+    assert order.status == "TRANSACTED" and order.filled == 300
+    assert tracker.positions["RITC"] == 300
+    assert not tracker.working
+
+
+def test_finished_orders_are_fetched_by_id_not_by_status_list(server, tracker, ledger):
+    order = ack(server, tracker, ledger, "RITC", "SELL", 100)
+    server.fill(order.order_id, 100, 9.9)
+    assert tracker.poll() == 2
+    assert server.requests == [("/v1/orders", "OPEN"), (f"/v1/orders/{order.order_id}", None)]
+
+
+def test_fill_between_polls_without_a_sync_is_booked_directly(server, tracker, ledger):
+    ledger.reconcile()
+    order = ack(server, tracker, ledger, "RITC", "BUY", 100)
+    server.fill(order.order_id, 100, 10.0)
+    tracker.poll()
+
+    assert not ledger.dirty
+    assert ledger.get_positions()["RITC"] == 100
+    assert ledger.reconcile_count == 1
+
+
+def test_reconcile_between_ack_and_poll_does_not_count_a_resting_fill_twice(server, tracker, ledger):
+    ledger.reconcile()
+    order = ack(server, tracker, ledger, "RITC", "BUY", 100, filled=40, vwap=10.0)
+    server.fill(order.order_id, 60, 10.0)  # rests, then fills while nobody is looking
+
+    ledger.reconcile()  # the timed /securities sync already holds all 100
+    assert ledger.positions["RITC"] == 100
+    tracker.poll()      # ...and the tracker only now sees the last 60
+
+    assert ledger.positions["RITC"] == 100  # not 160
+    assert ledger.dirty
+    assert ledger.get_positions()["RITC"] == 100
+    assert server.positions["RITC"] == 100
+
+
+def test_fills_straddling_each_sync_resolve_through_a_resync(server, tracker, ledger):
+    ledger.reconcile()
+    order = ack(server, tracker, ledger, "RITC", "BUY", 300)
+    expected = 0
+    for qty in (100, 150, 50):
+        server.fill(order.order_id, qty, 10.0)
+        if qty == 100:
+            ledger.reconcile()     # the timed sync lands between the fill and the poll
+        tracker.poll()
+        expected += qty
+        assert ledger.positions["RITC"] in (expected - qty, expected)  # never double counted
+        assert ledger.get_positions()["RITC"] == expected
+    assert ledger.reconcile_count <= 5  # at most one resync per straddling fill
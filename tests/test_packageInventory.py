@@ -0,0 +1,65 @@
+"""Opposite arbitrage packages cancel FIFO inside the inventory, without orders"""
+
+from packageInventory import PackageInventory
+
+
+def package(direction, qty):
+    signed = qty if direction == "basket_rich" else -qty  # basket_rich: long RITC, short BULL+BEAR
+    return {"type": direction, "ritc_qty": signed, "bull_qty": -signed, "bear_qty": -signed}
+
+
+def test_same_direction_packages_stack():
+    inventory = PackageInventory()
+    assert inventory.append(package("basket_rich", 100)) == 100
+    assert inventory.append(package("basket_rich", 50)) == 50
+    assert len(inventory) == 2
+    assert inventory.net_ritc() == 150
+    assert inventory.netted_qty == 0
+
+
+def test_opposite_package_cancels_oldest_first():
+    ticks = iter(range(10))
+    inventory = PackageInventory(clock=lambda: next(ticks))
+    first, second = package("basket_rich", 100), package("basket_rich", 80)
+    inventory.append(first)
+    inventory.append(second)
+
+    # 150 short RITC: all of the oldest package, then 50 of the next one
+    assert inventory.append(package("etf_rich", 150)) == 0
+    assert list(inventory) == [second]
+    assert second == {"type": "basket_rich", "ritc_qty": 30, "bull_qty": -30, "bear_qty": -30, "opened": 1}
+    assert inventory.net_ritc() == 30
+    assert inventory.netted_qty == 150
+
+
+def test_residual_of_a_larger_opposite_package_stays_open():
+    inventory = PackageInventory()
+    inventory.append(package("etf_rich", 40))
+    incoming = package("basket_rich", 100)
+
+    assert inventory.append(incoming) == 60
+    assert list(inventory) == [incoming]
+    assert (incoming["ritc_qty"], incoming["bull_qty"], incoming["bear_qty"]) == (60, -60, -60)
+    assert inventory.netted_qty == 40
+
+
+def test_exact_offset_leaves_the_inventory_empty():
+    inventory = PackageInventory()
+    inventory.append(package("etf_rich", 25))
+    inventory.append(package("etf_rich", 25))
+
+    assert inventory.append(package("basket_rich", 50)) == 0
+    assert len(inventory) == 0
+    assert inventory.net_ritc() == 0
+    assert inventory.netted_qty == 50
+
+
+def test_reduce_takes_units_off_the_oldest_packages():
+    inventory = PackageInventory()
+    first, second = package("basket_rich", 100), package("basket_rich", 50)
+    inventory.append(first)
+    inventory.append(second)
+
+    inventory.reduce(list(inventory), 120)
+    assert list(inventory) == [second]
+    assert (second["ritc_qty"], second["bull_qty"], second["bear_qty"]) == (30, -30, -30)